@@ -1,11 +1,58 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import hmac
+import json
+import logging
+import os
+import time
 import uvicorn
-from scripts.inference import predict_ticket_final
+from scripts.executor import InferenceExecutor, ExecutorSaturated, configure_torch_threads
 
-app = FastAPI(title="AI Ticket Classification API")
+# Must run before the models are loaded (TORCH_INTRA_OP_THREADS / TORCH_INTER_OP_THREADS)
+configure_torch_threads()
+
+from scripts.inference import (
+    prepare_ticket, finalize_ticket, model_predict_batch, predict_tickets_batch, registry, warmup, translator, result_cache, rules,
+    similar_tickets, processed_texts, stage_costs, batch_stage_costs, model_manager
+)
+from scripts.model_versions import list_versions
+from scripts.model_manager import SHADOW_SAMPLE_RATE
+from scripts.deadline import Deadline, OverloadMonitor, LATENCY_BUDGET_MS, LATENCY_BUDGET_HEADER, parse_budget
+from scripts.similarity import IndexAppender, SIMILAR_APPEND
+from scripts.batching import MicroBatcher
+from scripts.streaming import TicketStream, LineTooLong, iter_lines, STREAM_RETRY_SECONDS
+from scripts.timing import StageTimer
+from scripts.telemetry import (
+    metrics, stats_callback, observe_stages, observe_prediction, log_event,
+    REQUEST_LATENCY, REQUESTS_REJECTED, MICROBATCH_SIZE, BATCH_REQUEST_SIZE, STREAM_TICKETS, STREAM_WAITS,
+    STAGES_SKIPPED
+)
+
+# Start loading all models in parallel at startup instead of on the first request
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "1") == "1"
+# Push a few dummy tickets through the pipeline once the models are loaded
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if PRELOAD_MODELS:
+        registry.start_background_load(then=warmup if MODEL_WARMUP else None)
+    # Follow model versions activated by other workers / the model_versions CLI
+    model_manager.start_watch()
+    yield
+    model_manager.stop_watch()
+    model_manager.stop_shadow()
+    await batcher.close()
+    executor.shutdown()
+
+app = FastAPI(title="AI Ticket Classification API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -16,9 +63,148 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# /admin endpoints need this in X-Admin-Token; without it they are disabled
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Upper bound on tickets accepted by a single /classify/batch call
+MAX_BATCH_TICKETS = 512
+
+# Blocking pipeline stages run here, off the event loop
+# (tune with INFERENCE_WORKERS / INFERENCE_MAX_PENDING)
+executor = InferenceExecutor()
+
+def _model_predict_microbatch(texts):
+    MICROBATCH_SIZE.observe(len(texts))
+    return model_predict_batch(texts)
+
+# Newly classified tickets join the similar-ticket index in the background (SIMILAR_APPEND=1)
+HAS_SIMILAR_INDEX = "similar_index" in registry.names()
+appender = IndexAppender(lambda: registry.get("similar_index"), processed_texts) if SIMILAR_APPEND and HAS_SIMILAR_INDEX else None
+MAX_SIMILAR_K = 50
+
+# Past OVERLOAD_QUEUE_DEPTH pending requests every request takes the cheap path
+overload = OverloadMonitor(lambda: executor.pending)
+
+def _deadline(budget_ms, header_budget, start, costs):
+    """Deadline for an admitted request: its own budget, else the header's, else LATENCY_BUDGET_MS."""
+    budget = parse_budget(budget_ms) or parse_budget(header_budget) or parse_budget(LATENCY_BUDGET_MS)
+    return Deadline(budget, costs, cheap=overload.active(), start=start)
+
+# Stage cost estimates only learn from requests that found these already loaded
+PIPELINE_COMPONENTS = [name for name in ("backend", "nlp", "keywords", "fast_model") if name in registry.names()]
+
+def _count_skipped(deadline):
+    for stage in deadline.skipped:
+        STAGES_SKIPPED.inc(stage=stage, reason=deadline.reason)
+
+# Concurrent /classify calls share one batched forward pass
+# (tune with MICROBATCH_MAX_SIZE / MICROBATCH_MAX_WAIT_MS)
+batcher = MicroBatcher(_model_predict_microbatch, executor=executor.pool)
+
+# ===============================
+# Metrics read at scrape time
+# ===============================
+metrics.callback("ticket_inflight_requests", "Requests admitted to the inference executor (running + queued)", "gauge",
+                 lambda: [({}, executor.pending)])
+metrics.callback("ticket_inflight_max", "Admission limit of the inference executor", "gauge",
+                 lambda: [({}, executor.max_pending)])
+metrics.callback("ticket_microbatch_queue_depth", "Tickets waiting for the next coalesced model call", "gauge",
+                 lambda: [({}, batcher.queue_depth())])
+metrics.callback("ticket_result_cache_lookups_total", "Result cache lookups", "counter",
+                 stats_callback(result_cache.stats, {"hits": {"result": "hit"}, "misses": {"result": "miss"}}),
+                 labels=("result",))
+metrics.callback("ticket_result_cache_hit_ratio", "Result cache hit ratio since start", "gauge",
+                 stats_callback(result_cache.stats, {"hit_rate": {}}))
+metrics.callback("ticket_translation_lookups_total", "Translation requests by how they were served", "counter",
+                 stats_callback(translator.stats, {"ascii_skips": {"result": "ascii_skip"}, "cache_hits": {"result": "hit"},
+                                                   "cache_misses": {"result": "miss"}}),
+                 labels=("result",))
+metrics.callback("ticket_translation_cache_hit_ratio", "Translation cache hit ratio since start", "gauge",
+                 stats_callback(translator.stats, {"cache_hit_rate": {}}))
+metrics.callback("ticket_translation_calls_total", "Calls to the translation backend", "counter",
+                 stats_callback(translator.stats, {"translation_calls": {"outcome": "ok"}, "translation_errors": {"outcome": "error"}}),
+                 labels=("outcome",))
+metrics.callback("ticket_overload_mode", "1 while overload mode skips every optional stage", "gauge",
+                 lambda: [({}, int(overload.overloaded))])
+metrics.callback("ticket_model_version_info", "Model version being served (1)", "gauge",
+                 lambda: [({"version": model_manager.active or "unversioned"}, 1)], labels=("version",))
+metrics.callback("ticket_shadow_scored_total", "Live tickets scored by the shadow candidate", "counter",
+                 lambda: [({}, model_manager.shadow.scored)] if model_manager.shadow else [])
+metrics.callback("ticket_shadow_agreement_ratio", "Share of shadow-scored tickets where the candidate agrees", "gauge",
+                 lambda: [({"head": head}, ratio) for head, ratio in model_manager.shadow.report()["agreement"].items()
+                          if ratio is not None] if model_manager.shadow else [],
+                 labels=("head",))
+metrics.callback("ticket_model_component_ready", "1 once a model component is loaded", "gauge",
+                 lambda: [({"component": name}, int(s["state"] == "ready")) for name, s in registry.status().items()],
+                 labels=("component",))
+
+# Open /classify/stream and /classify/ws connections
+open_streams = {"stream": 0, "ws": 0}
+metrics.callback("ticket_open_streams", "Open streaming classification connections", "gauge",
+                 lambda: [({"transport": t}, n) for t, n in open_streams.items()], labels=("transport",))
+metrics.callback("ticket_similar_index_rows", "Tickets in the similar-ticket index", "gauge",
+                 lambda: [({}, registry.get("similar_index").rows)] if HAS_SIMILAR_INDEX and registry.is_loaded("similar_index") else [])
+
+def _record(endpoint, outcome, start, responses=(), **fields):
+    elapsed = time.perf_counter() - start
+    REQUEST_LATENCY.observe(elapsed, endpoint=endpoint, outcome=outcome)
+    for response in responses:
+        observe_prediction(response)
+    log_event("request", endpoint=endpoint, outcome=outcome, latency_ms=round(elapsed * 1000, 2), **fields)
+
+@app.exception_handler(ExecutorSaturated)
+async def saturated_handler(request: Request, exc: ExecutorSaturated):
+    REQUESTS_REJECTED.inc()
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "queue_depth": exc.queue_depth, "max_pending": exc.max_pending},
+        headers={"Retry-After": "1", "X-Queue-Depth": str(exc.queue_depth)}
+    )
+
 class TicketInput(BaseModel):
     title: str
     description: str
+    # Optional stages are skipped once they no longer fit (overrides the X-Latency-Budget-Ms header)
+    latency_budget_ms: Optional[float] = None
+
+class TicketBatchInput(BaseModel):
+    tickets: List[TicketInput]
+    # Budget for the whole batch; per-ticket budgets are ignored here
+    latency_budget_ms: Optional[float] = None
+
+class DeployInput(BaseModel):
+    version: str
+    # Score a sample of live traffic with the candidate instead of swapping it in
+    shadow: bool = False
+    sample_rate: float = SHADOW_SAMPLE_RATE
+
+class SimilarInput(BaseModel):
+    title: str = ""
+    description: str
+    k: int = 5
+
+def build_response(prediction, data, timings=None):
+    response = {
+        "title": prediction.get("title", data.title),
+        "category": prediction.get("category", "general").lower(),
+        "priority": prediction.get("priority", "medium").lower(),
+        "entities": prediction.get("entities", {"devices": [], "usernames": [], "error_codes": []}),
+        "status": "open",
+        "created_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+        "category_confidence": float(prediction.get("category_confidence", 0.5)),
+        "priority_confidence": float(prediction.get("priority_confidence", 0.5)),
+        "tier": prediction.get("tier", "transformer"),
+        "skipped_stages": prediction.get("skipped_stages", []),
+        "description": data.description
+    }
+    # Server-side milliseconds per pipeline stage ("cache" for result-cache hits)
+    if timings is not None:
+        response["timings"] = timings
+    return response
+
+def _cache_timings(start):
+    return {"cache": round((time.perf_counter() - start) * 1000, 3)}
+
 
 # Health check endpoint
 @app.get("/")
@@ -29,7 +215,15 @@ async def health_check():
         "timestamp": datetime.now().isoformat(),
         "endpoints": {
             "health": "/ (GET)",
-            "classify": "/classify (POST)"
+            "ready": "/ready (GET)",
+            "classify": "/classify (POST)",
+            "classify_batch": "/classify/batch (POST)",
+            "classify_stream": "/classify/stream (POST, NDJSON)",
+            "classify_ws": "/classify/ws (WebSocket)",
+            "similar": "/similar (POST)",
+            "metrics": "/metrics (GET)",
+            "admin_models": "/admin/models (GET), /admin/models/deploy (POST), /admin/models/promote (POST), "
+                            "/admin/models/shadow (GET, DELETE)"
         }
     }
 
@@ -39,48 +233,347 @@ async def health():
     return {
         "status": "healthy",
         "service": "AI Ticket Classification API",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat(),
+        "pid": os.getpid(),
+        "executor": executor.stats(),
+        "translation": translator.stats(),
+        "result_cache": result_cache.stats(),
+        "rules": rules.stats(),
+        "model": model_manager.stats(),
+        "open_streams": open_streams,
+        "overload": overload.stats(),
+        "stage_cost_estimates_ms": stage_costs.snapshot(),
+        "similar_index": registry.get("similar_index").stats() if HAS_SIMILAR_INDEX and registry.is_loaded("similar_index") else None,
+        "similar_append": appender.stats() if appender else None
     }
 
+# Readiness check: 200 only once every model component is loaded (and warmed up, if enabled)
+@app.get("/ready")
+async def ready():
+    is_ready = registry.ready() and (registry.warmed_up or not MODEL_WARMUP or not PRELOAD_MODELS)
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={
+            "ready": is_ready,
+            "components": registry.status(),
+            "warmed_up": registry.warmed_up,
+            "pid": os.getpid(),
+            "timestamp": datetime.now().isoformat()
+        }
+    )
+
+# Prometheus text format
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.post("/classify")
-async def classify_ticket(data: TicketInput):
+async def classify_ticket(data: TicketInput, x_latency_budget_ms: Optional[str] = Header(None)):
+    start = time.perf_counter()
+    fields = {"title_chars": len(data.title), "description_chars": len(data.description)}
+    # Duplicate tickets are answered from the result cache without taking a pipeline slot
+    cached = result_cache.get(data.title, data.description)
+    if cached is not None:
+        response = build_response(cached, data, _cache_timings(start))
+        _record("classify", "cached", start, [response], **fields)
+        return response
+
+    outcome, responses = "error", []
     try:
-        print(f"DEBUG: Received request - Title: {data.title}")
-        print(f"DEBUG: Description length: {len(data.description)} chars")
-        
-        # Generate dynamic prediction from your BERT model
-        prediction = predict_ticket_final(
-            title=data.title,
-            description=data.description
-        )
-
-        # Log to server console so you can see the raw model output
-        print(f"DEBUG: Model Output -> {prediction}")
-
-        response = {
-            "title": prediction.get("title", data.title),
-            "category": prediction.get("category", "general").lower(),
-            "priority": prediction.get("priority", "medium").lower(),
-            "entities": prediction.get("entities", {"devices": [], "usernames": [], "error_codes": []}),
-            "status": "open",
-            "created_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-            "category_confidence": float(prediction.get("category_confidence", 0.5)),
-            "priority_confidence": float(prediction.get("priority_confidence", 0.5)),
-            "description": data.description
-        }
-        
-        print(f"DEBUG: Sending response -> {response}")
+        async with executor.admit():
+            response = await _classify_ticket(data, _deadline(data.latency_budget_ms, x_latency_budget_ms, start, stage_costs))
+        outcome, responses = "ok", [response]
+        fields.update(category=response["category"], priority=response["priority"], tier=response["tier"],
+                      skipped=response["skipped_stages"])
         return response
-        
+    except ExecutorSaturated:
+        outcome = "rejected"
+        raise
+    finally:
+        _record("classify", outcome, start, responses, **fields)
+
+async def _classify_ticket(data: TicketInput, deadline=None):
+    try:
+        timer = StageTimer()
+        loaded = registry.ready(PIPELINE_COMPONENTS)
+        # The model call is coalesced with other in-flight requests by the micro-batcher
+        prepared = await executor.run(prepare_ticket, title=data.title, description=data.description, timer=timer,
+                                      deadline=deadline)
+        with timer.stage("model"):
+            raw_pred = await batcher.submit(prepared["processed"])
+        prediction = await executor.run(finalize_ticket, prepared, raw_pred)
+        observe_stages(timer.timings)
+        if loaded:
+            stage_costs.observe(timer.timings, skipped=prepared["skipped"])
+        if deadline:
+            _count_skipped(deadline)
+        # Degraded results are not cached (or indexed), so a later request with time to spare gets the full pipeline
+        if prepared["skipped"]:
+            return build_response(prediction, data, timer.timings)
+        result_cache.set(data.title, data.description, prediction)
+        if appender:
+            appender.submit([{"title": data.title, "description": data.description, "processed": prepared["processed"],
+                              "category": prediction["category"], "priority": prediction["priority"]}])
+        return build_response(prediction, data, timer.timings)
+
+    except Exception as e:
+        log_event("classify_error", sampled=False, level=logging.ERROR, exc_info=True, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/classify/batch")
+async def classify_batch(data: TicketBatchInput, x_latency_budget_ms: Optional[str] = Header(None)):
+    if len(data.tickets) > MAX_BATCH_TICKETS:
+        raise HTTPException(status_code=413, detail=f"Batch too large: max {MAX_BATCH_TICKETS} tickets per request")
+    start = time.perf_counter()
+    BATCH_REQUEST_SIZE.observe(len(data.tickets))
+    outcome, responses = "error", []
+    try:
+        async with executor.admit():
+            result = await _classify_batch(data, _deadline(data.latency_budget_ms, x_latency_budget_ms, start, batch_stage_costs))
+        outcome, responses = "ok", result["results"]
+        return result
+    except ExecutorSaturated:
+        outcome = "rejected"
+        raise
+    finally:
+        _record("classify_batch", outcome, start, responses, tickets=len(data.tickets))
+
+async def _classify_batch(data: TicketBatchInput, deadline=None):
+    try:
+        predictions = [result_cache.get(t.title, t.description) for t in data.tickets]
+        misses = [i for i, p in enumerate(predictions) if p is None]
+        timings = {}
+        if misses:
+            timer = StageTimer()
+            loaded = registry.ready(PIPELINE_COMPONENTS)
+            fresh = await executor.run(
+                predict_tickets_batch,
+                [{"title": data.tickets[i].title, "description": data.tickets[i].description} for i in misses],
+                timer=timer, deadline=deadline
+            )
+            observe_stages(timer.timings, path="batch")
+            timings = timer.timings
+            if loaded:
+                batch_stage_costs.observe(timer.timings, tickets=len(misses), skipped=deadline.skipped if deadline else ())
+            if deadline:
+                _count_skipped(deadline)
+            complete = []
+            for i, prediction in zip(misses, fresh):
+                predictions[i] = prediction
+                if not prediction["skipped_stages"]:
+                    complete.append(i)
+                    result_cache.set(data.tickets[i].title, data.tickets[i].description, prediction)
+            if appender and complete:
+                appender.submit([{"title": data.tickets[i].title, "description": data.tickets[i].description,
+                                  "category": predictions[i]["category"], "priority": predictions[i]["priority"]}
+                                 for i in complete])
+
+        # Whole-batch stage totals; `cached` tickets came from the result cache
+        return {"results": [build_response(p, t) for p, t in zip(predictions, data.tickets)],
+                "timings": timings, "cached": len(data.tickets) - len(misses)}
+
+    except Exception as e:
+        log_event("classify_batch_error", sampled=False, level=logging.ERROR, exc_info=True, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ===============================
+# Streaming (NDJSON / WebSocket)
+# ===============================
+class NDJSONStreamingResponse(StreamingResponse):
+    """Streams without also listening for a disconnect: the request body is still being read
+    while results go out, and a disconnect surfaces in that reader instead."""
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+async def _classify_streamed(ticket, transport, header_budget=None):
+    data = TicketInput(title=ticket.get("title") or "", description=ticket["description"],
+                       latency_budget_ms=ticket.get("latency_budget_ms"))
+    endpoint = f"classify_{transport}"
+    start = time.perf_counter()
+    cached = result_cache.get(data.title, data.description)
+    if cached is not None:
+        response = build_response(cached, data, _cache_timings(start))
+        _record(endpoint, "cached", start, [response])
+        return response
+
+    outcome, responses = "error", []
+    try:
+        while True:
+            try:
+                async with executor.admit():
+                    # The budget counts from when the ticket was read, including any wait for a slot
+                    deadline = _deadline(data.latency_budget_ms, header_budget, start, stage_costs)
+                    response = await _classify_ticket(data, deadline)
+                break
+            except ExecutorSaturated:
+                # A stream waits for capacity instead of failing the ticket; its unread
+                # input then backs up to the producer
+                STREAM_WAITS.inc(transport=transport)
+                await asyncio.sleep(STREAM_RETRY_SECONDS)
+        outcome, responses = "ok", [response]
+        return response
+    finally:
+        _record(endpoint, outcome, start, responses)
+
+@app.post("/classify/stream")
+async def classify_stream(request: Request):
+    """NDJSON in (one ticket per line), NDJSON out (one result per ticket, in completion order)."""
+    header_budget = request.headers.get(LATENCY_BUDGET_HEADER)
+    stream = TicketStream(lambda ticket: _classify_streamed(ticket, "stream", header_budget))
+
+    async def read_body():
+        try:
+            async for line in iter_lines(request.stream()):
+                if line.strip():
+                    await stream.submit(line)
+        except LineTooLong as e:
+            stream.reject(str(e))
+        except ClientDisconnect:
+            stream.cancel()
+        finally:
+            stream.close()
+
+    async def write_results():
+        open_streams["stream"] += 1
+        reader = asyncio.create_task(read_body())
+        try:
+            async for message in stream.results():
+                STREAM_TICKETS.inc(transport="stream", status=message["status"])
+                yield json.dumps(message) + "\n"
+        finally:
+            open_streams["stream"] -= 1
+            reader.cancel()
+            stream.cancel()
+
+    return NDJSONStreamingResponse(write_results(), media_type="application/x-ndjson")
+
+@app.websocket("/classify/ws")
+async def classify_ws(websocket: WebSocket):
+    """One or more tickets per text message (NDJSON); one result message per ticket.
+    Send {"type": "end"} to get the remaining results and a normal close."""
+    await websocket.accept()
+    header_budget = websocket.headers.get(LATENCY_BUDGET_HEADER)
+    stream = TicketStream(lambda ticket: _classify_streamed(ticket, "ws", header_budget))
+
+    async def send_results():
+        async for message in stream.results():
+            STREAM_TICKETS.inc(transport="ws", status=message["status"])
+            await websocket.send_text(json.dumps(message))
+
+    open_streams["ws"] += 1
+    sender = asyncio.create_task(send_results())
+    try:
+        ended = False
+        while not ended:
+            for line in (await websocket.receive_text()).splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    ended = json.loads(line) == {"type": "end"}
+                except ValueError:
+                    pass
+                if ended:
+                    break
+                await stream.submit(line)
+        stream.close()
+        await sender
+        await websocket.close()
+    except WebSocketDisconnect:
+        stream.cancel()
+        sender.cancel()
+    finally:
+        open_streams["ws"] -= 1
+
+@app.post("/similar")
+async def similar(data: SimilarInput):
+    if not HAS_SIMILAR_INDEX:
+        raise HTTPException(status_code=503, detail="No similar-ticket index; build one with `python -m scripts.similarity --build`")
+    if not 1 <= data.k <= MAX_SIMILAR_K:
+        raise HTTPException(status_code=422, detail=f"k must be between 1 and {MAX_SIMILAR_K}")
+    start = time.perf_counter()
+    outcome, fields = "error", {"k": data.k}
+    try:
+        async with executor.admit():
+            timer = StageTimer()
+            results = await executor.run(similar_tickets, data.title, data.description, k=data.k, timer=timer)
+        outcome = "ok"
+        fields["duplicates"] = sum(r["duplicate"] for r in results)
+        return {"results": results, "duplicates": fields["duplicates"], "timings": timer.timings}
+    except ExecutorSaturated:
+        outcome = "rejected"
+        raise
     except Exception as e:
-        print(f"SERVER ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log_event("similar_error", sampled=False, level=logging.ERROR, exc_info=True, error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        _record("similar", outcome, start, **fields)
+
+# ===============================
+# Admin: model versions
+# ===============================
+def _check_admin(request: Request):
+    # No peer-address fallback: behind a local proxy (or via CORS from a local browser) every caller looks local
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/models")
+async def admin_models(request: Request):
+    _check_admin(request)
+    return {**model_manager.stats(), "pid": os.getpid(), "versions": list_versions()}
+
+@app.post("/admin/models/deploy", status_code=202)
+async def admin_deploy(data: DeployInput, request: Request):
+    """Load, warm up and swap in (or shadow-score) a published model version, in the background."""
+    _check_admin(request)
+    if not 0 < data.sample_rate <= 1:
+        raise HTTPException(status_code=422, detail="sample_rate must be in (0, 1]")
+    try:
+        status = model_manager.deploy(data.version, shadow=data.shadow, sample_rate=data.sample_rate)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    log_event("model_deploy", sampled=False, version=data.version, shadow=data.shadow)
+    return {**status, "pid": os.getpid()}
+
+@app.post("/admin/models/promote")
+async def admin_promote(request: Request):
+    _check_admin(request)
+    try:
+        report = model_manager.promote()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    log_event("model_promote", sampled=False, version=model_manager.active)
+    return {**model_manager.stats(), "pid": os.getpid(), "shadow_report": report}
+
+@app.get("/admin/models/shadow")
+async def admin_shadow(request: Request):
+    _check_admin(request)
+    shadow = model_manager.shadow
+    if shadow is None:
+        raise HTTPException(status_code=404, detail="No shadow candidate in this worker")
+    return {**shadow.report(), "pid": os.getpid()}
+
+@app.delete("/admin/models/shadow")
+async def admin_stop_shadow(request: Request):
+    _check_admin(request)
+    report = model_manager.stop_shadow()
+    if report is None:
+        raise HTTPException(status_code=404, detail="No shadow candidate in this worker")
+    return {**report, "pid": os.getpid()}
 
 if __name__ == "__main__":
     print("Starting AI Ticket Classification API...")
     print("Service will be available at: http://127.0.0.1:8000")
     print("Health check: http://127.0.0.1:8000/health")
+    print("Readiness check: http://127.0.0.1:8000/ready")
     print("Classification endpoint: http://127.0.0.1:8000/classify")
+    print("Batch classification endpoint: http://127.0.0.1:8000/classify/batch")
+    print("Streaming endpoints: http://127.0.0.1:8000/classify/stream (NDJSON), ws://127.0.0.1:8000/classify/ws")
+    print("Similar tickets endpoint: http://127.0.0.1:8000/similar")
+    print("Metrics: http://127.0.0.1:8000/metrics")
+    print("Model admin: http://127.0.0.1:8000/admin/models")
     uvicorn.run(app, host="127.0.0.1", port=8000, reload=False)
\ No newline at end of file
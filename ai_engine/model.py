@@ -1,12 +1,40 @@
 import streamlit as st
 import requests
+import os
+import re
 import time
 import pandas as pd
-import numpy as np
 import plotly.express as px
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-from datetime import datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from wordcloud import WordCloud, STOPWORDS
+
+# --- Backend ---
+API_URL = os.getenv("AI_ENGINE_URL", "http://127.0.0.1:8000")
+REQUEST_TIMEOUT = 30
+# Bulk upload: tickets per /classify/batch call (the API accepts up to 512) and calls in flight at once
+BULK_CHUNK_SIZE = 64
+BULK_CONCURRENCY = 4
+# Attempts per chunk while the API answers 503 (inference queue full)
+BULK_MAX_ATTEMPTS = 5
+WORDCLOUD_MAX_WORDS = 200
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+WORD_PATTERN = re.compile(r"[a-z]{3,}")
+
+# Pipeline stages as reported in the API's "timings"
+STAGE_LABELS = {
+    "cache": "Served from result cache",
+    "translate": "Translation engine",
+    "clean": "Cleaning noise",
+    "spacy": "spaCy parse",
+    "analyze": "Lemmatizing",
+    "keywords": "Keyword title",
+    "entities": "Entity extraction",
+    "model": "BERT inference (category + priority)",
+    "rules": "Minimal safety overrides",
+}
 
 # --- Page Config ---
 st.set_page_config(page_title="ServiceDesk AI Pro", page_icon="🎫", layout="wide")
@@ -43,8 +71,74 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-if 'history' not in st.session_state:
+# --- Backend Session ---
+@st.cache_resource
+def get_session():
+    # One keep-alive connection pool for every rerun and user instead of a new connection per submit
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=BULK_CONCURRENCY,
+                          max_retries=Retry(total=2, connect=2, read=0, backoff_factor=0.2))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def post_batch(tickets):
+    """POST one chunk to /classify/batch, waiting out 503s (queue full) as the API's Retry-After asks."""
+    for _ in range(BULK_MAX_ATTEMPTS):
+        res = get_session().post(f"{API_URL}/classify/batch", json={"tickets": tickets}, timeout=REQUEST_TIMEOUT * 4)
+        if res.status_code != 503:
+            break
+        time.sleep(float(res.headers.get("Retry-After", 1)))
+    res.raise_for_status()
+    return res.json()
+
+# --- Session Analytics ---
+# Running counters updated once per result, so no page rebuilds anything from the whole history
+def new_analytics():
+    return {"count": 0, "confidence_sum": 0.0, "categories": Counter(), "priorities": Counter(), "words": Counter(), "version": 0}
+
+def record_results(results):
+    analytics = st.session_state['analytics']
+    for res in results:
+        st.session_state['history'].append(res)
+        analytics["count"] += 1
+        analytics["confidence_sum"] += res['category_confidence']
+        analytics["categories"][res['category']] += 1
+        analytics["priorities"][res['priority']] += 1
+        analytics["words"].update(w for w in WORD_PATTERN.findall(res['description'].lower()) if w not in STOPWORDS)
+    analytics["version"] += 1
+
+def cached_view(name, build):
+    """Result of build(), rebuilt only when new results have been recorded since."""
+    version = st.session_state['analytics']["version"]
+    views = st.session_state['views']
+    if name not in views or views[name][0] != version:
+        views[name] = (version, build())
+    return views[name][1]
+
+def reset_session():
     st.session_state['history'] = []
+    st.session_state['analytics'] = new_analytics()
+    st.session_state['views'] = {}
+    for key in ('last_res', 'last_round_trip_ms', 'last_bulk'):
+        st.session_state.pop(key, None)
+
+def timing_log(res, round_trip_ms):
+    timings = res.get('timings', {})
+    lines = [f"{STAGE_LABELS.get(stage, stage)} ... {ms:.1f} ms" for stage, ms in timings.items()]
+    lines += [f"{STAGE_LABELS.get(stage, stage)} ... skipped (latency budget)" for stage in res.get('skipped_stages', [])]
+    lines.append(f"SUCCESS: server {sum(timings.values()):.1f} ms, round trip {round_trip_ms:.1f} ms")
+    return "<br>".join(lines)
+
+def report_image(name, caption, **kwargs):
+    path = os.path.join(ASSETS_DIR, f"{name}.png")
+    if os.path.exists(path):
+        st.image(path, caption=caption, **kwargs)
+    else:
+        st.caption(f"{caption}: not generated yet")
+
+if 'history' not in st.session_state:
+    reset_session()
 
 # --- Sidebar ---
 with st.sidebar:
@@ -54,7 +148,7 @@ with st.sidebar:
     st.subheader("Model Version")
     st.code("Transformer: BERT-v2\nLogic: Hybrid-Minimal")
     if st.button("🗑️ Clear All Sessions", use_container_width=True):
-        st.session_state['history'] = []
+        reset_session()
         st.rerun()
 
 # ==========================================
@@ -62,148 +156,215 @@ with st.sidebar:
 # ==========================================
 if page == "🎫 Live Ticket Desk":
     st.markdown("<h1 class='main-title'>AI Classification Desk</h1>", unsafe_allow_html=True)
-    
-    col1, col2 = st.columns([1, 1.2], gap="large")
+    input_mode = st.radio("Input Mode:", ["📝 Single Ticket", "📤 Bulk CSV Upload"], horizontal=True)
 
-    with col1:
-        st.subheader("📝 New Incident")
+    if input_mode == "📤 Bulk CSV Upload":
+        st.subheader("📤 Bulk Classification")
         with st.container(border=True):
-            t_input = st.text_input("Subject", placeholder="Briefly state the problem...")
-            d_input = st.text_area("Detailed Description", height=180, placeholder="Explain in any language...")
-            
-            if st.button("🚀 Process with AI", type="primary", use_container_width=True):
-                if not d_input:
-                    st.error("Description is required.")
+            upload = st.file_uploader("CSV with a 'description' column (and optionally 'title')", type="csv")
+            if upload is not None:
+                frame = pd.read_csv(upload, dtype=str).fillna("")
+                columns = {c.lower().strip(): c for c in frame.columns}
+                if "description" not in columns:
+                    st.error("The CSV needs a 'description' column.")
                 else:
-                    log_placeholder = st.empty()
-                    progress_bar = st.progress(0)
-                    logs = []
-                    
-                    def add_log(msg):
-                        logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
-                        log_placeholder.markdown(f"<div class='log-container'>{'<br>'.join(logs)}</div>", unsafe_allow_html=True)
-
-                    steps = [
-                        ("Initiating Translation Engine...", 20),
-                        ("Cleaning noise & lemmatizing...", 40),
-                        ("Running BERT Inference (Category)...", 60),
-                        ("Running BERT Inference (Priority)...", 80),
-                        ("Applying minimal safety overrides...", 100)
-                    ]
-                    
-                    for m, v in steps:
-                        add_log(m)
-                        progress_bar.progress(v)
-                        time.sleep(0.3)
-
-                    try:
-                        res = requests.post("http://127.0.0.1:8000/classify", json={"title": t_input, "description": d_input})
-                        if res.status_code == 200:
-                            data = res.json()
-                            # Store description for the history/archive
-                            data['description'] = d_input
-                            st.session_state['last_res'] = data
-                            st.session_state['history'].append(data)
-                            add_log("SUCCESS: Prediction generated.")
-                        else: st.error("Inference Error")
-                    except: st.error("Backend Offline")
-
-    with col2:
-        if 'last_res' in st.session_state:
-            res = st.session_state['last_res']
-            st.subheader("🔍 Analysis Result")
-            
-            # Key Results
-            c1, c2, c3 = st.columns(3)
-            with c1: st.metric("AI Category", res['category'].upper())
-            with c2: st.metric("AI Priority", res['priority'].upper())
-            with c3: st.metric("Confidence", f"{int(res['category_confidence']*100)}%")
-            
-            # Logic Summary
-            with st.container():
-                st.markdown(f"""
-                <div class="status-card">
-                    <p style='color: #64748b; font-size: 0.9em; margin-bottom: 5px;'>Auto-Generated Title</p>
-                    <h3 style='margin-top: 0;'>{res['title']}</h3>
-                    <hr>
-                    <p><b>Status:</b> <span style="color: green;">● {res['status'].upper()}</span></p>
-                    <p><b>Created At:</b> {res['created_at']}</p>
-                </div>
-                """, unsafe_allow_html=True)
-
-            # Entity Display
-            st.markdown("#### 🛠 Extracted Entities")
-            e1, e2, e3 = st.columns(3)
-            with e1:
-                st.write("**Devices**")
-                if res['entities']['devices']:
-                    for d in res['entities']['devices']: st.markdown(f'<span class="entity-tag">{d}</span>', unsafe_allow_html=True)
-                else: st.write("None")
-            with e2:
-                st.write("**Usernames**")
-                if res['entities']['usernames']:
-                    for u in res['entities']['usernames']: st.markdown(f'<span class="entity-tag">{u}</span>', unsafe_allow_html=True)
-                else: st.write("None")
-            with e3:
-                st.write("**Error Codes**")
-                if res['entities']['error_codes']:
-                    for ec in res['entities']['error_codes']: st.markdown(f'<span class="entity-tag">{ec}</span>', unsafe_allow_html=True)
-                else: st.write("None")
-            
-            with st.expander("📄 View Structured JSON Output"):
-                st.json(res)
-        else:
-            st.info("Awaiting incident description for processing.")
+                    titles = frame[columns["title"]] if "title" in columns else [""] * len(frame)
+                    # CSV data row (1-based) of every ticket, so results line up with the upload
+                    rows, tickets = [], []
+                    for row, (t, d) in enumerate(zip(titles, frame[columns["description"]]), start=1):
+                        if d.strip():
+                            rows.append(row)
+                            tickets.append({"title": t, "description": d})
+                    st.caption(f"{len(tickets)} tickets with a description ({len(frame) - len(tickets)} empty rows skipped)")
+                    if tickets and st.button(f"🚀 Classify {len(tickets)} Tickets", type="primary", use_container_width=True):
+                        progress_bar = st.progress(0.0, text=f"0 / {len(tickets)} tickets")
+                        done, failed, cached, server_timings = 0, 0, 0, Counter()
+                        # Chunks finish in any order; each one's results go back to its offset
+                        slots = [None] * len(tickets)
+                        start = time.perf_counter()
+                        with ThreadPoolExecutor(max_workers=BULK_CONCURRENCY) as pool:
+                            futures = {pool.submit(post_batch, tickets[i:i + BULK_CHUNK_SIZE]): i
+                                       for i in range(0, len(tickets), BULK_CHUNK_SIZE)}
+                            for future in as_completed(futures):
+                                offset = futures[future]
+                                size = min(BULK_CHUNK_SIZE, len(tickets) - offset)
+                                try:
+                                    data = future.result()
+                                    slots[offset:offset + size] = data['results']
+                                    cached += data.get('cached', 0)
+                                    server_timings.update(data.get('timings', {}))
+                                except requests.RequestException:
+                                    failed += size
+                                done += size
+                                rate = done / (time.perf_counter() - start)
+                                progress_bar.progress(done / len(tickets), text=f"{done} / {len(tickets)} tickets ({rate:.1f}/s)")
+                        classified = [(row, res) for row, res in zip(rows, slots) if res is not None]
+                        record_results([res for _, res in classified])
+                        st.session_state['last_bulk'] = {
+                            "classified": len(classified), "failed": failed, "cached": cached,
+                            "seconds": time.perf_counter() - start, "timings": dict(server_timings),
+                            "results": [{"row": row, **{k: res[k] for k in ('title', 'category', 'priority', 'category_confidence')}}
+                                        for row, res in classified],
+                        }
+
+        if 'last_bulk' in st.session_state:
+            bulk = st.session_state['last_bulk']
+            b1, b2, b3, b4 = st.columns(4)
+            b1.metric("Classified", bulk["classified"])
+            b2.metric("Failed", bulk["failed"])
+            b3.metric("From Cache", bulk["cached"])
+            b4.metric("Throughput", f"{bulk['classified'] / max(bulk['seconds'], 1e-9):.1f}/s")
+            if bulk["failed"]:
+                st.error(f"{bulk['failed']} tickets could not be classified (backend offline or overloaded).")
+            if bulk["timings"]:
+                st.markdown("#### ⏱ Server Time per Stage (all batches)")
+                stage_df = pd.DataFrame({"stage": [STAGE_LABELS.get(s, s) for s in bulk["timings"]], "ms": list(bulk["timings"].values())})
+                st.plotly_chart(px.bar(stage_df, x="ms", y="stage", orientation="h"), use_container_width=True)
+            st.dataframe(pd.DataFrame(bulk["results"]), use_container_width=True, hide_index=True)
+
+    else:
+        col1, col2 = st.columns([1, 1.2], gap="large")
+
+        with col1:
+            st.subheader("📝 New Incident")
+            with st.container(border=True):
+                t_input = st.text_input("Subject", placeholder="Briefly state the problem...")
+                d_input = st.text_area("Detailed Description", height=180, placeholder="Explain in any language...")
+
+                if st.button("🚀 Process with AI", type="primary", use_container_width=True):
+                    if not d_input:
+                        st.error("Description is required.")
+                    else:
+                        start = time.perf_counter()
+                        try:
+                            with st.spinner("Running the AI pipeline..."):
+                                res = get_session().post(f"{API_URL}/classify", json={"title": t_input, "description": d_input},
+                                                         timeout=REQUEST_TIMEOUT)
+                            if res.status_code == 200:
+                                data = res.json()
+                                st.session_state['last_res'] = data
+                                st.session_state['last_round_trip_ms'] = (time.perf_counter() - start) * 1000
+                                record_results([data])
+                            elif res.status_code == 503:
+                                st.error("Backend busy, please retry shortly")
+                            else: st.error("Inference Error")
+                        except requests.RequestException: st.error("Backend Offline")
+
+            # Real per-stage timings reported by the API for the last ticket
+            if 'last_res' in st.session_state:
+                st.markdown(f"<div class='log-container'>{timing_log(st.session_state['last_res'], st.session_state['last_round_trip_ms'])}</div>",
+                            unsafe_allow_html=True)
+
+        with col2:
+            if 'last_res' in st.session_state:
+                res = st.session_state['last_res']
+                st.subheader("🔍 Analysis Result")
+
+                # Key Results
+                c1, c2, c3 = st.columns(3)
+                with c1: st.metric("AI Category", res['category'].upper())
+                with c2: st.metric("AI Priority", res['priority'].upper())
+                with c3: st.metric("Confidence", f"{int(res['category_confidence']*100)}%")
+
+                # Logic Summary
+                with st.container():
+                    st.markdown(f"""
+                    <div class="status-card">
+                        <p style='color: #64748b; font-size: 0.9em; margin-bottom: 5px;'>Auto-Generated Title</p>
+                        <h3 style='margin-top: 0;'>{res['title']}</h3>
+                        <hr>
+                        <p><b>Status:</b> <span style="color: green;">● {res['status'].upper()}</span></p>
+                        <p><b>Created At:</b> {res['created_at']}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                # Entity Display
+                st.markdown("#### 🛠 Extracted Entities")
+                e1, e2, e3 = st.columns(3)
+                with e1:
+                    st.write("**Devices**")
+                    if res['entities']['devices']:
+                        for d in res['entities']['devices']: st.markdown(f'<span class="entity-tag">{d}</span>', unsafe_allow_html=True)
+                    else: st.write("None")
+                with e2:
+                    st.write("**Usernames**")
+                    if res['entities']['usernames']:
+                        for u in res['entities']['usernames']: st.markdown(f'<span class="entity-tag">{u}</span>', unsafe_allow_html=True)
+                    else: st.write("None")
+                with e3:
+                    st.write("**Error Codes**")
+                    if res['entities']['error_codes']:
+                        for ec in res['entities']['error_codes']: st.markdown(f'<span class="entity-tag">{ec}</span>', unsafe_allow_html=True)
+                    else: st.write("None")
+
+                with st.expander("📄 View Structured JSON Output"):
+                    st.json(res)
+            else:
+                st.info("Awaiting incident description for processing.")
 
 # ==========================================
 # PAGE 2: MODEL ANALYTICS
 # ==========================================
 elif page == "📊 Model Analytics":
     st.markdown("<h1 class='main-title'>Model Intelligence Dashboard</h1>", unsafe_allow_html=True)
-    
+
     view_mode = st.radio("Select View Mode:", ["📈 Live Session Performance", "📜 Model Training Reports"], horizontal=True)
     st.divider()
 
     if view_mode == "📜 Model Training Reports":
-        st.subheader("Final Training Evaluation (Kaggle Export)")
-        st.info("The following visualizations were generated during the model training phase on the validation dataset.")
+        st.subheader("Final Training Evaluation")
+        st.info("Validation-split results of the last training run published with `python -m training.train --update-dashboard`.")
 
         tab1, tab2 = st.tabs(["🏷️ Category Model", "⚡ Priority Model"])
 
         with tab1:
             st.markdown("### Category Classification Performance")
             col_c1, col_c2 = st.columns(2)
-            with col_c1: st.image("assets/category_confusion_matrix.png", caption="Category Confusion Matrix")
-            with col_c2: st.image("assets/category_classification_report.png", caption="Category Report (Precision/Recall)")
+            with col_c1: report_image("category_confusion_matrix", "Category Confusion Matrix")
+            with col_c2: report_image("category_classification_report", "Category Report (Precision/Recall)")
             st.markdown("---")
-            st.image("assets/category_epochs.png", caption="Category Training Loss & Accuracy per Epoch", use_container_width=True)
+            col_c3, col_c4 = st.columns(2)
+            with col_c3: report_image("category_epochs", "Category Training Loss & Accuracy per Epoch")
+            with col_c4: report_image("category_histogram", "Distribution of Category Classes")
 
         with tab2:
             st.markdown("### Priority Classification Performance")
             col_p1, col_p2 = st.columns(2)
-            with col_p1: st.image("assets/priority_confusion_matrix.png", caption="Priority Confusion Matrix")
-            with col_p2: st.image("assets/priority_classification_report.png", caption="Priority Report (Precision/Recall)")
+            with col_p1: report_image("priority_confusion_matrix", "Priority Confusion Matrix")
+            with col_p2: report_image("priority_classification_report", "Priority Report (Precision/Recall)")
             st.markdown("---")
             col_p3, col_p4 = st.columns(2)
-            with col_p3: st.image("assets/priority_epochs.png", caption="Priority Training Epochs")
-            with col_p4: st.image("assets/priority_histogram.png", caption="Distribution of Priority Classes")
+            with col_p3: report_image("priority_epochs", "Priority Training Epochs")
+            with col_p4: report_image("priority_histogram", "Distribution of Priority Classes")
 
     else:
-        if st.session_state['history']:
-            df = pd.DataFrame(st.session_state['history'])
+        analytics = st.session_state['analytics']
+        if analytics["count"]:
             m1, m2, m3 = st.columns(3)
-            m1.metric("Total Processed", len(df))
-            m2.metric("Avg AI Confidence", f"{round(df['category_confidence'].mean() * 100, 1)}%")
-            m3.metric("Critical Tickets", len(df[df['priority'].str.lower() == 'critical']))
-            
+            m1.metric("Total Processed", analytics["count"])
+            m2.metric("Avg AI Confidence", f"{round(analytics['confidence_sum'] / analytics['count'] * 100, 1)}%")
+            m3.metric("Critical Tickets", analytics["priorities"]["critical"])
+
+            d1, d2 = st.columns(2)
+            with d1:
+                st.plotly_chart(cached_view("category_chart", lambda: px.bar(
+                    x=list(analytics["categories"]), y=list(analytics["categories"].values()),
+                    labels={"x": "category", "y": "tickets"}, title="Category Mix")), use_container_width=True)
+            with d2:
+                st.plotly_chart(cached_view("priority_chart", lambda: px.bar(
+                    x=list(analytics["priorities"]), y=list(analytics["priorities"].values()),
+                    labels={"x": "priority", "y": "tickets"}, title="Priority Mix")), use_container_width=True)
+
             st.divider()
-            
+
             st.subheader("💡 Session Word Intelligence")
-            text_data = " ".join([t['description'] for t in st.session_state['history']])
-            wc = WordCloud(background_color="white", width=1200, height=500).generate(text_data)
-            fig_wc, ax = plt.subplots(figsize=(12, 5))
-            ax.imshow(wc, interpolation='bilinear'); ax.axis("off")
-            st.pyplot(fig_wc)
+            # Drawn from the running word counts, and only again once new tickets arrive
+            if analytics["words"]:
+                wordcloud = cached_view("wordcloud", lambda: WordCloud(background_color="white", width=1200, height=500)
+                                        .generate_from_frequencies(dict(analytics["words"].most_common(WORDCLOUD_MAX_WORDS))).to_array())
+                st.image(wordcloud, use_container_width=True)
+            else:
+                st.caption("No words to show yet.")
         else:
             st.warning("No session data available. Submit tickets to generate live trends.")
 
@@ -213,13 +374,14 @@ elif page == "📊 Model Analytics":
 elif page == "📂 History & Export":
     st.markdown("<h1 class='main-title'>Ticket Archive</h1>", unsafe_allow_html=True)
     if st.session_state['history']:
-        # Prepare a clean DataFrame for display
-        df = pd.DataFrame(st.session_state['history'])
-        
+        # The DataFrame and CSV are rebuilt only after new tickets, not on every rerun
+        df = cached_view("history_df", lambda: pd.DataFrame(st.session_state['history']))
+
         # Display simplified columns in the UI table
         display_df = df[['created_at', 'title', 'category', 'priority', 'status']]
         st.dataframe(display_df, use_container_width=True, hide_index=True)
-        
-        st.download_button("📥 Export History (CSV)", df.to_csv(index=False).encode('utf-8'), "tickets.csv", "text/csv")
+
+        csv = cached_view("history_csv", lambda: df.to_csv(index=False).encode('utf-8'))
+        st.download_button("📥 Export History (CSV)", csv, "tickets.csv", "text/csv")
     else:
-        st.warning("No records found.")
\ No newline at end of file
+        st.warning("No records found.")
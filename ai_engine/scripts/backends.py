@@ -0,0 +1,284 @@
+"""
+INFERENCE BACKENDS
+------------------
+Engines that turn a padded batch of token ids into category/priority
+probabilities. Select one with INFERENCE_BACKEND:
+
+    torch       eager FP32 PyTorch (default)
+    torch-int8  PyTorch with dynamic INT8 quantization of Linear layers (CPU)
+    onnx        ONNX Runtime over models/onnx/*.onnx (see scripts/export_onnx.py)
+    onnx-int8   ONNX Runtime over the quantized *.int8.onnx exports
+    torch-early-exit  PyTorch, stopping at intermediate layers once confident (see scripts/early_exit.py)
+
+Sequences are capped at MODEL_MAX_LENGTH tokens (default: the cap recorded by
+`python -m scripts.token_report --write-profile`, else the 96 tokens the models
+were fine-tuned with). Longer tickets keep their head and tail, and every batch
+is padded to the smallest of PAD_BUCKETS that fits its longest sequence.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import torch
+from torch import nn
+
+from scripts.multihead import use_multihead, load_multihead, load_head_configs
+
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8", "torch-early-exit")
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+CATEGORY_MODEL_PATH = os.path.join(ROOT_DIR, "models", "category_model")
+PRIORITY_MODEL_PATH = os.path.join(ROOT_DIR, "models", "priority_model")
+MULTIHEAD_MODEL_PATH = os.path.join(ROOT_DIR, "models", "multihead_model")
+ONNX_MODEL_DIR = os.path.join(ROOT_DIR, "models", "onnx")
+TOKEN_PROFILE_PATH = os.path.join(ROOT_DIR, "models", "token_lengths.json")
+
+# The notebook fine-tuned both models with padding="max_length", max_length=96
+TRAINING_MAX_LENGTH = 96
+PAD_BUCKETS = tuple(sorted(int(b) for b in os.getenv("PAD_BUCKETS", "16,24,32,48,64,96,128").split(",") if b.strip()))
+# Share of the token budget kept from the start of an over-long ticket; the rest comes from its end
+TRUNCATION_HEAD_RATIO = float(os.getenv("TRUNCATION_HEAD_RATIO", "0.5"))
+
+
+def resolve_max_length(profile_path=TOKEN_PROFILE_PATH):
+    if os.getenv("MODEL_MAX_LENGTH"):
+        return int(os.getenv("MODEL_MAX_LENGTH"))
+    if os.path.exists(profile_path):
+        try:
+            with open(profile_path) as f:
+                return int(json.load(f)["recommended_max_length"])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"WARNING: ignoring {profile_path}: {e}")
+    return TRAINING_MAX_LENGTH
+
+
+MODEL_MAX_LENGTH = resolve_max_length()
+
+
+def onnx_file(onnx_dir, name, quantized=False):
+    return os.path.join(onnx_dir, f"{name}.int8.onnx" if quantized else f"{name}.onnx")
+
+
+def checkpoint_fingerprint(*paths):
+    """Short hash of file names, sizes and mtimes under the given files/folders.
+    Changes whenever a checkpoint is replaced, without reading the weights."""
+    digest = hashlib.sha1()
+    for path in paths:
+        files = [path] if os.path.isfile(path) else sorted(
+            os.path.join(root, f) for root, _, names in os.walk(path) for f in names
+        )
+        for f in files:
+            st = os.stat(f)
+            digest.update(f"{os.path.relpath(f, path) if f != path else os.path.basename(f)}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, category_path, priority_path, multihead_path, mode="auto", device=torch.device("cpu")):
+        # transformers is imported here rather than at module level to keep `import scripts.inference` fast
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        self.device = device
+        self.multihead_model = None
+        self.category_model = self.priority_model = None
+
+        if use_multihead(mode, multihead_path):
+            # One encoder pass feeds both classification heads
+            self.multihead_model, self.category_tokenizer = load_multihead(multihead_path, device)
+            self.priority_tokenizer = self.category_tokenizer
+            self.cat_id2label = self.multihead_model.id2label("category")
+            self.pri_id2label = self.multihead_model.id2label("priority")
+        else:
+            self.category_tokenizer = AutoTokenizer.from_pretrained(category_path)
+            self.category_model = AutoModelForSequenceClassification.from_pretrained(category_path).to(device)
+            self.category_model.eval()
+            self.cat_id2label = self.category_model.config.id2label
+
+            self.priority_tokenizer = AutoTokenizer.from_pretrained(priority_path)
+            self.priority_model = AutoModelForSequenceClassification.from_pretrained(priority_path).to(device)
+            self.priority_model.eval()
+            self.pri_id2label = self.priority_model.config.id2label
+
+        # Only reuse the category encodings for the priority model when both use the same vocabulary
+        self.shared_tokenizer = (self.priority_tokenizer is self.category_tokenizer
+                                 or self.priority_tokenizer.get_vocab() == self.category_tokenizer.get_vocab())
+        checkpoints = [multihead_path] if self.multihead_model is not None else [category_path, priority_path]
+        self.version = f"{self.name}-{checkpoint_fingerprint(*checkpoints)}"
+
+    def predict_proba(self, inputs, pri_inputs):
+        with torch.no_grad():
+            if self.multihead_model is not None:
+                logits = self.multihead_model(**inputs)
+                cat_logits, pri_logits = logits["category"], logits["priority"]
+            else:
+                cat_logits = self.category_model(**inputs).logits
+                pri_logits = self.priority_model(**pri_inputs).logits
+            return (torch.softmax(cat_logits, dim=1).cpu().numpy(),
+                    torch.softmax(pri_logits, dim=1).cpu().numpy())
+
+
+class QuantizedTorchBackend(TorchBackend):
+    name = "torch-int8"
+
+    def __init__(self, category_path, priority_path, multihead_path, mode="auto", device=torch.device("cpu")):
+        # Dynamic quantization kernels are CPU-only
+        super().__init__(category_path, priority_path, multihead_path, mode=mode, device=torch.device("cpu"))
+        quantize = lambda model: torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+        if self.multihead_model is not None:
+            self.multihead_model = quantize(self.multihead_model)
+        else:
+            self.category_model = quantize(self.category_model)
+            self.priority_model = quantize(self.priority_model)
+
+
+class OnnxBackend:
+    name = "onnx"
+    device = torch.device("cpu")
+
+    def __init__(self, category_path, priority_path, multihead_path, mode="auto", onnx_dir=None, quantized=False):
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoTokenizer
+
+        onnx_dir = onnx_dir or ONNX_MODEL_DIR
+        if quantized:
+            self.name = "onnx-int8"
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = torch.get_num_threads()
+        session = lambda name: ort.InferenceSession(onnx_file(onnx_dir, name, quantized), options, providers=["CPUExecutionProvider"])
+
+        self.multihead_session = None
+        if use_multihead(mode, multihead_path):
+            self.multihead_session = session("multihead_model")
+            exported = [onnx_file(onnx_dir, "multihead_model", quantized)]
+            self.category_tokenizer = AutoTokenizer.from_pretrained(multihead_path)
+            self.priority_tokenizer = self.category_tokenizer
+            head_configs = load_head_configs(multihead_path)
+            self.cat_id2label = head_configs["category"].id2label
+            self.pri_id2label = head_configs["priority"].id2label
+        else:
+            self.category_session = session("category_model")
+            self.priority_session = session("priority_model")
+            exported = [onnx_file(onnx_dir, "category_model", quantized), onnx_file(onnx_dir, "priority_model", quantized)]
+            self.category_tokenizer = AutoTokenizer.from_pretrained(category_path)
+            self.priority_tokenizer = AutoTokenizer.from_pretrained(priority_path)
+            self.cat_id2label = AutoConfig.from_pretrained(category_path).id2label
+            self.pri_id2label = AutoConfig.from_pretrained(priority_path).id2label
+
+        self.shared_tokenizer = (self.priority_tokenizer is self.category_tokenizer
+                                 or self.priority_tokenizer.get_vocab() == self.category_tokenizer.get_vocab())
+        self.version = f"{self.name}-{checkpoint_fingerprint(*exported)}"
+
+    @staticmethod
+    def _feed(session, inputs):
+        names = {i.name for i in session.get_inputs()}
+        return {k: v.cpu().numpy().astype(np.int64) for k, v in inputs.items() if k in names}
+
+    def predict_proba(self, inputs, pri_inputs):
+        if self.multihead_session is not None:
+            cat_logits, pri_logits = self.multihead_session.run(None, self._feed(self.multihead_session, inputs))[:2]
+        else:
+            cat_logits = self.category_session.run(None, self._feed(self.category_session, inputs))[0]
+            pri_logits = self.priority_session.run(None, self._feed(self.priority_session, pri_inputs))[0]
+        return _softmax(cat_logits), _softmax(pri_logits)
+
+
+# ===============================
+# Batched prediction
+# ===============================
+def _bucketed_batches(encodings, batch_size):
+    # Sort by token length so each batch is padded only to its own longest sequence
+    order = sorted(range(len(encodings["input_ids"])), key=lambda i: len(encodings["input_ids"][i]))
+    for start in range(0, len(order), batch_size):
+        yield order[start:start + batch_size]
+
+
+def pad_length(longest, max_length, buckets=PAD_BUCKETS):
+    """Smallest bucket that fits `longest` tokens, so batches reuse a handful of shapes."""
+    for bucket in buckets:
+        if longest <= bucket <= max_length:
+            return bucket
+    return max_length if buckets else longest
+
+
+def _keep_positions(special_mask, max_length, head_ratio):
+    # Leading/trailing special tokens ([CLS] ... [SEP], <s> ... </s>) always survive
+    lead = next((i for i, m in enumerate(special_mask) if not m), len(special_mask))
+    trail = next((i for i, m in enumerate(reversed(special_mask)) if not m), 0)
+    end = len(special_mask) - trail
+    budget = max(max_length - lead - trail, 0)
+    head = int(budget * head_ratio)
+    return list(range(lead + head)) + list(range(end - (budget - head), len(special_mask)))
+
+
+def encode_head_tail(tokenizer, texts, max_length, head_ratio=TRUNCATION_HEAD_RATIO):
+    """Unpadded encodings capped at max_length tokens (special tokens included). Over-long
+    texts keep their first head_ratio of the budget and fill the rest from their end."""
+    encodings = tokenizer(list(texts), truncation=False, padding=False, return_special_tokens_mask=True)
+    special_masks = encodings.pop("special_tokens_mask")
+    for i, mask in enumerate(special_masks):
+        if len(mask) > max_length:
+            keep = _keep_positions(mask, max_length, head_ratio)
+            for name in encodings.keys():
+                encodings[name][i] = [encodings[name][i][j] for j in keep]
+    return encodings
+
+
+def _pad_batch(tokenizer, encodings, idx, device, buckets, max_length):
+    features = [{k: encodings[k][i] for k in encodings.keys()} for i in idx]
+    target = pad_length(max(len(f["input_ids"]) for f in features), max_length, buckets)
+    return tokenizer.pad(features, padding="max_length", max_length=target, return_tensors="pt").to(device)
+
+
+def predict_batch(engine, texts, batch_size=32, max_length=None, buckets=PAD_BUCKETS, head_ratio=TRUNCATION_HEAD_RATIO):
+    """Label + confidence for every text, in input order."""
+    if not texts:
+        return []
+    max_length = max_length or MODEL_MAX_LENGTH
+    cat_tok, pri_tok = engine.category_tokenizer, engine.priority_tokenizer
+    encodings = encode_head_tail(cat_tok, texts, max_length, head_ratio)
+    pri_encodings = encodings if engine.shared_tokenizer else encode_head_tail(pri_tok, texts, max_length, head_ratio)
+    results = [None] * len(texts)
+
+    for idx in _bucketed_batches(encodings, batch_size):
+        inputs = _pad_batch(cat_tok, encodings, idx, engine.device, buckets, max_length)
+        pri_inputs = inputs if engine.shared_tokenizer else _pad_batch(pri_tok, pri_encodings, idx, engine.device, buckets, max_length)
+        cat_probs, pri_probs = engine.predict_proba(inputs, pri_inputs)
+
+        for row, i in enumerate(idx):
+            cat_id = int(np.argmax(cat_probs[row]))
+            pri_id = int(np.argmax(pri_probs[row]))
+            results[i] = {
+                "category": engine.cat_id2label[cat_id],
+                "category_confidence": float(cat_probs[row][cat_id]),
+                "priority": engine.pri_id2label[pri_id],
+                "priority_confidence": float(pri_probs[row][pri_id])
+            }
+
+    return results
+
+
+def load_backend(name, category_path, priority_path, multihead_path, mode="auto", device=torch.device("cpu"),
+                 onnx_dir=None, exit_dir=None):
+    if name == "torch":
+        return TorchBackend(category_path, priority_path, multihead_path, mode=mode, device=device)
+    if name == "torch-int8":
+        return QuantizedTorchBackend(category_path, priority_path, multihead_path, mode=mode)
+    if name in ("onnx", "onnx-int8"):
+        return OnnxBackend(category_path, priority_path, multihead_path, mode=mode, onnx_dir=onnx_dir, quantized=name == "onnx-int8")
+    if name == "torch-early-exit":
+        from scripts.early_exit import EarlyExitBackend
+        return EarlyExitBackend(category_path, priority_path, multihead_path, mode=mode, device=device, exit_dir=exit_dir)
+    raise ValueError(f"Unknown inference backend '{name}' (expected one of {', '.join(BACKENDS)})")
@@ -0,0 +1,110 @@
+"""
+MICRO-BATCHING SCHEDULER
+------------------------
+Coalesces concurrent single-ticket requests into one batched call.
+Callers `await batcher.submit(item)`; a background worker collects up to
+`max_batch_size` items or waits at most `max_wait_ms` after the first one,
+runs `batch_fn(items)` off the event loop and resolves each caller's future.
+"""
+
+import asyncio
+import os
+
+# ===============================
+# Configuration (env overridable)
+# ===============================
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "16"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "5"))
+
+
+class MicroBatcher:
+    def __init__(self, batch_fn, max_batch_size=MICROBATCH_MAX_SIZE, max_wait_ms=MICROBATCH_MAX_WAIT_MS, executor=None):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.executor = executor
+        self._queue = None
+        self._worker = None
+        # The batch the worker is currently running, so close() can fail its callers
+        self._inflight = []
+
+    def _ensure_worker(self):
+        # Created lazily so the queue and task belong to the running event loop
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, item):
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                # Still take whatever is already queued, just don't wait for more
+                while len(batch) < self.max_batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    @staticmethod
+    def _fail(batch, error):
+        for _, fut in batch:
+            if not fut.done():
+                fut.set_exception(error)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Skip callers that already gave up (client disconnect / cancellation)
+            batch = [(item, fut) for item, fut in batch if not fut.done()]
+            if not batch:
+                continue
+
+            items = [item for item, _ in batch]
+            # Left set when the worker is cancelled mid-call, for close() to fail
+            self._inflight = batch
+            try:
+                results = await loop.run_in_executor(self.executor, self.batch_fn, items)
+            except Exception as e:
+                self._inflight = []
+                self._fail(batch, e)
+                continue
+            self._inflight = []
+
+            if len(results) != len(batch):
+                self._fail(batch, RuntimeError(f"batch_fn returned {len(results)} results for {len(batch)} items"))
+                continue
+            for (_, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
+
+    async def close(self):
+        """Stop the worker; callers still queued or in flight get a RuntimeError instead of waiting forever."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        error = RuntimeError("Micro-batcher closed")
+        pending, self._inflight = self._inflight, []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._fail(pending, error)
@@ -0,0 +1,76 @@
+"""
+KEYWORD EXTRACTOR BENCHMARK
+---------------------------
+Latency and auto-title quality of the keyword extractors on untitled dataset
+tickets. Quality is measured against KeyBERT (the previous behaviour) as the
+reference: word-level Jaccard overlap of the generated titles, plus the share
+of tickets left without a title.
+
+Run from the ai_engine folder (tfidf needs `python -m scripts.keywords --build-idf` first):
+    python -m scripts.bench_keywords --samples 500 --extractors keybert tfidf rake
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from scripts.dataset import sample_texts
+from scripts.inference import registry, analyze_doc, clean_text, KEYBERT_MODEL
+from scripts.keywords import load_keyword_extractor
+
+
+def _jaccard(a, b):
+    a, b = set(a.split()), set(b.split())
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark auto-title keyword extractors")
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--extractors", nargs="+", default=["keybert", "tfidf", "rake"])
+    parser.add_argument("--examples", type=int, default=5, help="titles to print side by side")
+    args = parser.parse_args()
+
+    texts = sample_texts(args.samples, seed=args.seed)
+    nlp = registry.get("nlp")
+    analyses = [analyze_doc(doc) for doc in nlp.pipe([clean_text(t) for t in texts])]
+
+    titles, rows = {}, []
+    for name in args.extractors:
+        start = time.perf_counter()
+        try:
+            extractor = load_keyword_extractor(name, KEYBERT_MODEL)
+        except Exception as e:
+            print(f"WARNING: skipping {name}: {e}")
+            continue
+        load_s = time.perf_counter() - start
+        extractor.extract(analyses[0])
+
+        latencies, out = [], []
+        for analysis in analyses:
+            start = time.perf_counter()
+            out.append(extractor.extract(analysis))
+            latencies.append(time.perf_counter() - start)
+        ms = np.array(latencies) * 1000
+        titles[name] = out
+        rows.append((name, load_s, np.percentile(ms, 50), np.percentile(ms, 99), np.mean([not t for t in out])))
+
+    reference = titles.get("keybert")
+    print(f"\n{len(texts)} untitled tickets\n")
+    print(f"{'extractor':<10} {'load s':>8} {'p50 ms':>9} {'p99 ms':>9} {'empty':>7} {'jaccard vs keybert':>19}")
+    for name, load_s, p50, p99, empty in rows:
+        overlap = f"{np.mean([_jaccard(a, b) for a, b in zip(titles[name], reference)]):.3f}" if reference else "n/a"
+        print(f"{name:<10} {load_s:8.2f} {p50:9.3f} {p99:9.3f} {empty:7.1%} {overlap:>19}")
+
+    for i in range(min(args.examples, len(texts))):
+        print(f"\n{texts[i][:100]}")
+        for name in titles:
+            print(f"  {name:<8} {titles[name][i].title()}")
+
+
+if __name__ == "__main__":
+    main()
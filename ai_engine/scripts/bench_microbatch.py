@@ -0,0 +1,76 @@
+"""
+MICRO-BATCHING BENCHMARK
+------------------------
+Compares one forward pass per request against the MicroBatcher at several
+concurrency levels and prints p50/p99 latency and tickets/sec.
+
+Run from the ai_engine folder:
+    python -m scripts.bench_microbatch --concurrency 1 4 16 64 --requests 256
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from scripts.batching import MicroBatcher, MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS
+from scripts.dataset import sample_texts
+from scripts.inference import model_predict, model_predict_batch
+
+
+async def _drive(call, texts, concurrency):
+    latencies = []
+    queue = list(texts)
+
+    async def client():
+        while queue:
+            text = queue.pop()
+            start = time.perf_counter()
+            await call(text)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    return latencies, elapsed
+
+
+async def run_level(texts, concurrency, max_batch_size, max_wait_ms):
+    loop = asyncio.get_running_loop()
+
+    async def direct(text):
+        return await loop.run_in_executor(None, model_predict, text)
+
+    batcher = MicroBatcher(model_predict_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    rows = []
+    for mode, call in (("direct", direct), ("batched", batcher.submit)):
+        latencies, elapsed = await _drive(call, texts, concurrency)
+        ms = np.array(latencies) * 1000
+        rows.append((mode, concurrency, np.percentile(ms, 50), np.percentile(ms, 99), len(texts) / elapsed))
+    await batcher.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /classify micro-batching")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=256, help="tickets sent per concurrency level")
+    parser.add_argument("--max-batch-size", type=int, default=MICROBATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MICROBATCH_MAX_WAIT_MS)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    texts = sample_texts(args.requests, seed=args.seed)
+    model_predict_batch(texts[:8])  # warm-up
+
+    print(f"\nmax_batch_size={args.max_batch_size}  max_wait_ms={args.max_wait_ms}  requests/level={len(texts)}\n")
+    print(f"{'mode':<8} {'conc':>5} {'p50 ms':>9} {'p99 ms':>9} {'tickets/s':>10}")
+    print("-" * 45)
+    for concurrency in args.concurrency:
+        for mode, conc, p50, p99, tps in asyncio.run(run_level(texts, concurrency, args.max_batch_size, args.max_wait_ms)):
+            print(f"{mode:<8} {conc:>5} {p50:>9.1f} {p99:>9.1f} {tps:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
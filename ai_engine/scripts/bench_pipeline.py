@@ -0,0 +1,200 @@
+"""
+PIPELINE BENCHMARK SUITE
+------------------------
+Where the time goes in predict_ticket_final, measured on a reproducible sample
+of dataset.zip plus the multilingual cases from demo_test_pipeline.py.
+Translation is stubbed (no network), so the translate stage measures language
+detection and the cache only.
+
+Reports:
+    per-stage latency percentiles (translate, clean, spacy, analyze, keywords, entities, model, rules)
+    end-to-end latency percentiles
+    throughput of predict_tickets_batch at several batch sizes
+    peak RSS
+
+The results are written as JSON. When a baseline exists, the run exits with
+status 1 if a stage or the end-to-end latency regresses past it by more than
+--tolerance, if throughput drops by more than that, or if peak RSS grows by
+more than that.
+
+Run from the ai_engine folder:
+    python -m scripts.bench_pipeline --save-baseline           # record a baseline on this machine
+    python -m scripts.bench_pipeline --json bench.json         # compare against it
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+# Must be set before the pipeline is imported: the translator is built at import time
+os.environ["TRANSLATION_BACKEND"] = "stub"
+
+from scripts.dataset import sample_rows
+from scripts.demo_test_pipeline import test_tickets as DEMO_TICKETS
+from scripts.inference import registry, translator, predict_ticket_final, predict_tickets_batch, _ticket_text
+from scripts.timing import StageTimer
+from scripts.translation import StubBackend
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+BASELINE_PATH = os.path.join(ROOT_DIR, "benchmarks", "pipeline_baseline.json")
+
+# What the stubbed translator returns for the non-English demo cases
+STUB_TRANSLATIONS = {
+    "Non-English Issue (Hindi)": "Network problem. The wifi is not working in the office",
+    "Non-English Issue (Kannada)": "The office laptop is not starting",
+}
+
+
+def load_tickets(samples, seed):
+    tickets = [{"title": "", "description": row["clean_text"]} for row in sample_rows(samples, seed=seed)]
+    mapping = {}
+    for case in DEMO_TICKETS:
+        if case["case"] in STUB_TRANSLATIONS:
+            tickets.append({"title": case["title"], "description": case["description"]})
+            mapping[_ticket_text(case["title"], case["description"])] = STUB_TRANSLATIONS[case["case"]]
+    translator.backend = StubBackend(mapping)
+    return tickets
+
+
+def _percentiles(values):
+    values = np.asarray(values)
+    return {
+        "mean": round(float(values.mean()), 3),
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+    }
+
+
+def bench_stages(tickets, repeat):
+    stage_ms = defaultdict(list)
+    end_to_end = []
+    for _ in range(repeat):
+        for ticket in tickets:
+            timer = StageTimer()
+            start = time.perf_counter()
+            predict_ticket_final(ticket["title"], ticket["description"], timer=timer)
+            end_to_end.append((time.perf_counter() - start) * 1000)
+            for stage, ms in timer.timings.items():
+                stage_ms[stage].append(ms)
+    return {stage: _percentiles(ms) for stage, ms in stage_ms.items()}, _percentiles(end_to_end)
+
+
+def bench_throughput(tickets, batch_sizes):
+    throughput = {}
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(tickets), batch_size):
+            predict_tickets_batch(tickets[i:i + batch_size], batch_size=batch_size)
+        throughput[str(batch_size)] = round(len(tickets) / (time.perf_counter() - start), 2)
+    return throughput
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def find_regressions(current, baseline, tolerance, min_delta_ms):
+    """Human-readable list of everything that got worse than the baseline allows."""
+    regressions = []
+
+    def check_latency(name, now, before):
+        for pct in ("p50", "p95"):
+            if pct in now and pct in before:
+                delta = now[pct] - before[pct]
+                # Tiny stages are noisy; ignore changes below min_delta_ms
+                if delta > min_delta_ms and now[pct] > before[pct] * (1 + tolerance):
+                    regressions.append(f"{name} {pct}: {before[pct]:.3f} -> {now[pct]:.3f} ms")
+
+    for stage, before in baseline.get("stages", {}).items():
+        if stage in current["stages"]:
+            check_latency(f"stage '{stage}'", current["stages"][stage], before)
+    check_latency("end-to-end", current["end_to_end"], baseline.get("end_to_end", {}))
+
+    for batch_size, before in baseline.get("throughput", {}).items():
+        now = current["throughput"].get(batch_size)
+        if now is not None and now < before * (1 - tolerance):
+            regressions.append(f"throughput @ batch {batch_size}: {before:.1f} -> {now:.1f} tickets/s")
+
+    before_rss = baseline.get("peak_rss_mb")
+    if before_rss and current["peak_rss_mb"] > before_rss * (1 + tolerance):
+        regressions.append(f"peak RSS: {before_rss:.1f} -> {current['peak_rss_mb']:.1f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage pipeline benchmark with regression thresholds")
+    parser.add_argument("--samples", type=int, default=200, help="dataset tickets (demo multilingual cases are added)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the tickets for the latency numbers")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    tickets = load_tickets(args.samples, args.seed)
+    registry.load_all()
+    # Warm-up: first calls pay for allocation and kernel selection
+    predict_tickets_batch(tickets[:8])
+    for ticket in tickets[:8]:
+        predict_ticket_final(ticket["title"], ticket["description"])
+
+    stages, end_to_end = bench_stages(tickets, args.repeat)
+    results = {
+        "created_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "tickets": len(tickets),
+        "repeat": args.repeat,
+        "stages": stages,
+        "end_to_end": end_to_end,
+        "throughput": bench_throughput(tickets, args.batch_sizes),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+    print(f"\n{len(tickets)} tickets x {args.repeat} passes (translation stubbed)\n")
+    print(f"{'stage':<12} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}   (ms)")
+    for stage, pct in list(stages.items()) + [("end-to-end", end_to_end)]:
+        print(f"{stage:<12} {pct['mean']:>9.3f} {pct['p50']:>9.3f} {pct['p95']:>9.3f} {pct['p99']:>9.3f}")
+    print("\nthroughput: " + ", ".join(f"batch {bs}: {rate:.1f} tickets/s" for bs, rate in results["throughput"].items()))
+    print(f"peak RSS: {results['peak_rss_mb']:.1f} MB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = find_regressions(results, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"\nREGRESSION against {args.baseline} (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+WORKER SCALING BENCHMARK
+------------------------
+Starts scripts.serve with 1, 2, 4, ... workers (with and without preloading
+the models before the fork), drives it with concurrent /classify requests
+built from dataset.zip, and reports:
+
+    RSS / worker        resident memory of each worker (shared pages counted in full)
+    PSS / worker        proportional share: shared pages split between the processes using them
+    private / worker    memory only that worker holds
+    total PSS           what the whole server (parent + workers) really occupies
+    tickets/s           aggregate throughput, with p50 / p99 latency
+
+Memory is read from /proc/<pid>/smaps_rollup after the load, so pages the
+workers un-shared while serving are included (Linux only). The result cache is
+disabled and translation stubbed, so every request runs the full pipeline.
+
+Run from the ai_engine folder:
+    python -m scripts.bench_workers --workers 1 2 4 --duration 20 --json workers.json
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from scripts.dataset import sample_texts
+
+
+def _http(method, url, body=None, timeout=30):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def smaps_rollup(pid):
+    """Rss / Pss / private memory of one process in MB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {"rss": values.get("Rss", 0.0), "pss": values.get("Pss", 0.0),
+            "private": values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0)}
+
+
+def child_pids(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def wait_ready(base_url, workers, server, timeout):
+    """Until /ready has answered 200 from `workers` distinct processes."""
+    ready = set()
+    deadline = time.monotonic() + timeout
+    while len(ready) < workers:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with status {server.returncode}")
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"only {len(ready)}/{workers} workers ready after {timeout}s")
+        try:
+            status, body = _http("GET", f"{base_url}/ready", timeout=5)
+            if status == 200:
+                ready.add(body["pid"])
+        except (OSError, ValueError):
+            pass
+        time.sleep(0.2)
+
+
+def drive_load(base_url, texts, concurrency, duration):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(offset):
+        i = offset
+        while time.monotonic() < stop_at:
+            # A unique suffix keeps every request a cache miss even if caching is on
+            ticket = {"title": "", "description": f"{texts[i % len(texts)]} #{offset}-{i}"}
+            start = time.perf_counter()
+            try:
+                status, _ = _http("POST", f"{base_url}/classify", ticket)
+            except OSError:
+                status = None
+            elapsed = time.perf_counter() - start
+            with lock:
+                if status == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+            i += concurrency
+
+    threads = [threading.Thread(target=client, args=(n,), daemon=True) for n in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    lat = np.asarray(latencies or [0.0]) * 1000
+    return {"requests": len(latencies), "errors": errors[0], "tickets_per_sec": round(len(latencies) / wall, 2),
+            "p50_ms": round(float(np.percentile(lat, 50)), 2), "p99_ms": round(float(np.percentile(lat, 99)), 2)}
+
+
+def bench(workers, preload, texts, args):
+    port = args.port
+    command = [sys.executable, "-m", "scripts.serve", "--workers", str(workers), "--port", str(port), "--log-level", "warning"]
+    if not preload:
+        command.append("--no-preload")
+    env = dict(os.environ, RESULT_CACHE_SIZE="0", LOG_SAMPLE_RATE="0", TRANSLATION_BACKEND="stub")
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL if not args.verbose else None,
+                              stderr=subprocess.DEVNULL if not args.verbose else None)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        start = time.perf_counter()
+        wait_ready(base_url, workers, server, args.startup_timeout)
+        startup = time.perf_counter() - start
+        drive_load(base_url, texts, max(1, workers), 2)  # warm-up
+        load = drive_load(base_url, texts, args.concurrency or 4 * workers, args.duration)
+        pids = child_pids(server.pid)
+        per_worker = [smaps_rollup(pid) for pid in pids]
+        parent = smaps_rollup(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    mean = lambda key: round(float(np.mean([m[key] for m in per_worker])), 1)
+    return {
+        "workers": workers, "preload": preload, "startup_sec": round(startup, 1),
+        "rss_per_worker_mb": mean("rss"), "pss_per_worker_mb": mean("pss"), "private_per_worker_mb": mean("private"),
+        "total_pss_mb": round(parent["pss"] + sum(m["pss"] for m in per_worker), 1),
+        **load,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory per worker and aggregate throughput as scripts.serve scales out")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load per configuration")
+    parser.add_argument("--concurrency", type=int, help="concurrent clients (default: 4 per worker)")
+    parser.add_argument("--samples", type=int, default=500, help="dataset tickets to cycle through")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--no-compare", action="store_true", help="skip the --no-preload runs")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--verbose", action="store_true", help="show the server's output")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    texts = sample_texts(args.samples)
+    results = []
+    for workers in args.workers:
+        for preload in ([True] if args.no_compare else [True, False]):
+            print(f"{workers} worker(s), {'preloaded' if preload else 'loaded per worker'}...")
+            results.append(bench(workers, preload, texts, args))
+
+    print(f"\n{'workers':>7} {'preload':>8} {'RSS/wkr':>8} {'PSS/wkr':>8} {'priv/wkr':>9} {'total PSS':>10} "
+          f"{'tickets/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    print("-" * 92)
+    for r in results:
+        print(f"{r['workers']:>7} {'yes' if r['preload'] else 'no':>8} {r['rss_per_worker_mb']:>8.1f} {r['pss_per_worker_mb']:>8.1f} "
+              f"{r['private_per_worker_mb']:>9.1f} {r['total_pss_mb']:>10.1f} {r['tickets_per_sec']:>10.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>7}")
+    print("\nMB; PSS splits shared pages between the processes mapping them, so total PSS is the server's real footprint.")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"cpus": os.cpu_count(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+BULK SCORING
+------------
+Re-scores a whole ticket archive offline. Records are streamed in chunks from
+dataset.zip, a .csv or a .jsonl file (never loaded into memory as a whole),
+fanned out to a pool of worker processes that each load the models once, and
+written incrementally as JSONL or Parquet (Parquet needs pyarrow).
+
+A checkpoint next to the output (`<output>.checkpoint.json`) records how many
+chunks are safely on disk, so an interrupted run picks up where it stopped
+with --resume.
+
+Run from the ai_engine folder:
+    python -m scripts.bulk_score --output scores.jsonl --workers 4 --keep Topic_group Priority
+    python -m scripts.bulk_score --input tickets.jsonl --output scores/ --format parquet --resume
+"""
+
+import argparse
+import glob
+import importlib.util
+import itertools
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+from scripts.dataset import DATASET_PATH, iter_records
+
+# ===============================
+# Worker processes
+# ===============================
+_worker = {}
+
+
+def _init_worker(threads):
+    import torch
+    torch.set_num_threads(threads)
+    # Imported here so the parent process never loads a model
+    from scripts.inference import registry, predict_tickets_batch
+    registry.load_all()
+    _worker["predict"] = predict_tickets_batch
+
+
+def _score_chunk(chunk, batch_size):
+    predictions = _worker["predict"]([{"title": title, "description": desc} for _, title, desc, _ in chunk],
+                                     batch_size=batch_size)
+    return [{"id": record_id, **kept, **pred} for (record_id, _, _, kept), pred in zip(chunk, predictions)]
+
+
+# ===============================
+# Input
+# ===============================
+def _ticket(row, index, args):
+    text_field = args.text_field or ("description" if "description" in row else "clean_text")
+    title = (row.get(args.title_field) or "") if args.title_field else ""
+    record_id = row.get(args.id_field, index) if args.id_field else index
+    return record_id, title, row.get(text_field) or "", {f: row.get(f) for f in args.keep}
+
+
+def _chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ===============================
+# Output
+# ===============================
+class JsonlWriter:
+    def __init__(self, path, offset=0):
+        self.f = open(path, "r+b" if offset else "wb")
+        # Drops anything written after the last checkpoint
+        self.f.truncate(offset)
+        self.f.seek(offset)
+        self.offset = offset
+        self.pending = 0
+
+    def write(self, rows):
+        self.f.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8"))
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.offset = self.f.tell()
+
+    def state(self):
+        return {"offset": self.offset}
+
+    def close(self):
+        self.f.close()
+
+
+class ParquetWriter:
+    """One part file per `rows_per_file` rows; buffered rows only count as written once their part is closed."""
+
+    def __init__(self, directory, parts=0, rows_per_file=50000):
+        if importlib.util.find_spec("pyarrow") is None:
+            raise SystemExit("ERROR: --format parquet needs pyarrow (pip install pyarrow)")
+        os.makedirs(directory, exist_ok=True)
+        # Parts beyond the checkpoint belong to an interrupted run
+        for stale in sorted(glob.glob(os.path.join(directory, "part-*.parquet")))[parts:]:
+            os.remove(stale)
+        self.directory = directory
+        self.parts = parts
+        self.rows_per_file = rows_per_file
+        self.buffer = []
+
+    @property
+    def pending(self):
+        return len(self.buffer)
+
+    def write(self, rows):
+        # Nested values (entities) are stored as JSON strings so every part has the same schema
+        self.buffer.extend({k: json.dumps(v) if isinstance(v, (dict, list)) else v for k, v in row.items()} for row in rows)
+        if len(self.buffer) >= self.rows_per_file:
+            self.flush()
+
+    def flush(self):
+        import pandas as pd
+        if self.buffer:
+            pd.DataFrame(self.buffer).to_parquet(os.path.join(self.directory, f"part-{self.parts:05d}.parquet"), index=False)
+            self.parts += 1
+            self.buffer = []
+
+    def state(self):
+        return {"parts": self.parts}
+
+    def close(self):
+        self.flush()
+
+
+# ===============================
+# Checkpoints
+# ===============================
+def _checkpoint_path(output):
+    return output.rstrip("/") + ".checkpoint.json"
+
+
+def _load_checkpoint(args):
+    path = _checkpoint_path(args.output)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    expected = {"input": os.path.abspath(args.input), "chunk_size": args.chunk_size, "format": args.format}
+    for key, value in expected.items():
+        if checkpoint.get(key) != value:
+            raise SystemExit(f"ERROR: checkpoint {path} was written with {key}={checkpoint.get(key)!r}, not {value!r}")
+    return checkpoint
+
+
+def _save_checkpoint(args, chunks_done, rows_done, writer):
+    path = _checkpoint_path(args.output)
+    checkpoint = {
+        "input": os.path.abspath(args.input),
+        "chunk_size": args.chunk_size,
+        "format": args.format,
+        "chunks_done": chunks_done,
+        "rows_done": rows_done,
+        "writer": writer.state(),
+        "updated_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+
+# ===============================
+# Main loop
+# ===============================
+def run(args):
+    checkpoint = _load_checkpoint(args) if args.resume else None
+    if checkpoint is None and os.path.exists(args.output) and not args.overwrite:
+        raise SystemExit(f"ERROR: {args.output} exists; pass --resume to continue it or --overwrite to replace it")
+
+    chunks_done = checkpoint["chunks_done"] if checkpoint else 0
+    rows_done = checkpoint["rows_done"] if checkpoint else 0
+    if args.format == "jsonl":
+        writer = JsonlWriter(args.output, offset=checkpoint["writer"]["offset"] if checkpoint else 0)
+    else:
+        writer = ParquetWriter(args.output, parts=checkpoint["writer"]["parts"] if checkpoint else 0,
+                               rows_per_file=args.rows_per_file)
+    if checkpoint:
+        print(f"Resuming after {rows_done} rows ({chunks_done} chunks)")
+
+    # Already scored rows are still read, but skipped before any work is done on them
+    records = itertools.islice(enumerate(iter_records(args.input)), rows_done, args.limit)
+    chunks = _chunks((_ticket(row, i, args) for i, row in records), args.chunk_size)
+
+    start = last_report = time.perf_counter()
+    scored = 0
+
+    def commit(rows):
+        nonlocal chunks_done, rows_done, scored, last_report
+        writer.write(rows)
+        chunks_done += 1
+        rows_done += len(rows)
+        scored += len(rows)
+        if writer.pending == 0:
+            _save_checkpoint(args, chunks_done, rows_done, writer)
+        now = time.perf_counter()
+        if now - last_report >= args.progress_every:
+            print(f"{rows_done} rows | {scored / (now - start):.1f} rows/s | {chunks_done} chunks")
+            last_report = now
+
+    threads = args.threads or max(1, (os.cpu_count() or 1) // max(1, args.workers))
+    try:
+        if args.workers == 0:
+            _init_worker(threads)
+            for chunk in chunks:
+                commit(_score_chunk(chunk, args.batch_size))
+        else:
+            # spawn: each worker starts clean and loads its own models once
+            with mp.get_context("spawn").Pool(args.workers, initializer=_init_worker, initargs=(threads,)) as pool:
+                # Bounded window of in-flight chunks; results are committed in input order
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.apply_async(_score_chunk, (chunk, args.batch_size)))
+                    if len(pending) >= args.workers * 2:
+                        commit(pending.popleft().get())
+                while pending:
+                    commit(pending.popleft().get())
+        writer.close()
+        _save_checkpoint(args, chunks_done, rows_done, writer)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; checkpoint kept at {_checkpoint_path(args.output)} (use --resume)")
+        sys.exit(130)
+
+    elapsed = time.perf_counter() - start
+    print(f"Done: {scored} rows scored in {elapsed:.1f}s ({scored / elapsed if elapsed else 0:.1f} rows/s), "
+          f"{rows_done} total in {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a ticket archive in bulk")
+    parser.add_argument("--input", default=DATASET_PATH, help=".zip / .csv / .jsonl (default: dataset.zip)")
+    parser.add_argument("--output", required=True, help="JSONL file, or directory of part files for parquet")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--text-field", help="description column (default: description, else clean_text)")
+    parser.add_argument("--title-field", default="title")
+    parser.add_argument("--id-field", help="id column (default: row number)")
+    parser.add_argument("--keep", nargs="*", default=[], help="input columns copied to the output, e.g. Topic_group Priority")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="0 scores in-process")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads per worker (default: cpus / workers)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="rows per worker task and per checkpoint")
+    parser.add_argument("--batch-size", type=int, default=32, help="model batch size inside a worker")
+    parser.add_argument("--rows-per-file", type=int, default=50000, help="parquet rows per part file")
+    parser.add_argument("--limit", type=int, help="stop after this many input rows")
+    parser.add_argument("--progress-every", type=float, default=10.0, help="seconds between progress lines")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint")
+    parser.add_argument("--overwrite", action="store_true", help="replace an existing output")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
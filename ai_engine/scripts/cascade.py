@@ -0,0 +1,166 @@
+"""
+CONFIDENCE-GATED CASCADE
+------------------------
+The TF-IDF + calibrated LinearSVC baseline from model.ipynb answers first.
+The transformer only runs on tickets where either calibrated confidence
+(category or priority) is below CASCADE_THRESHOLD. Every prediction records
+the tier that produced it ("fast" or "transformer").
+
+Configuration:
+    CASCADE             1 enables the cascade (default 0: transformer only)
+    CASCADE_THRESHOLD   minimum fast-tier confidence on both heads
+    FAST_MODEL_PATH     persisted model (default models/fast_model.joblib)
+
+The fast model sees the same lemmatised text as the transformer. Train it with
+the dataset labels, or with the transformer's own predictions (--teacher) when
+the checkpoint's label set differs from the CSV's:
+    python -m scripts.cascade --train
+    python -m scripts.cascade --train --teacher
+"""
+
+import argparse
+import itertools
+import os
+import time
+from collections import Counter
+
+import numpy as np
+
+CASCADE_ENABLED = os.getenv("CASCADE", "0") == "1"
+CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", "0.9"))
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+FAST_MODEL_PATH = os.getenv("FAST_MODEL_PATH", os.path.join(ROOT_DIR, "models", "fast_model.joblib"))
+
+
+class FastClassifier:
+    name = "fast"
+
+    def __init__(self, path=FAST_MODEL_PATH):
+        import joblib
+        from scripts.backends import checkpoint_fingerprint
+
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; train it with `python -m scripts.cascade --train`")
+        bundle = joblib.load(path)
+        self.vectorizer = bundle["vectorizer"]
+        self.category_model = bundle["category"]
+        self.priority_model = bundle["priority"]
+        self.test_index = bundle.get("test_index", [])
+        self.version = f"{self.name}-{checkpoint_fingerprint(path)}"
+
+    @property
+    def labels(self):
+        return {"category": set(map(str, self.category_model.classes_)), "priority": set(map(str, self.priority_model.classes_))}
+
+    def predict_batch(self, texts):
+        if not texts:
+            return []
+        features = self.vectorizer.transform(texts)
+        cat_probs = self.category_model.predict_proba(features)
+        pri_probs = self.priority_model.predict_proba(features)
+        cat_ids, pri_ids = cat_probs.argmax(axis=1), pri_probs.argmax(axis=1)
+        return [
+            {
+                "category": str(self.category_model.classes_[c]),
+                "category_confidence": float(cat_probs[row, c]),
+                "priority": str(self.priority_model.classes_[p]),
+                "priority_confidence": float(pri_probs[row, p])
+            }
+            for row, (c, p) in enumerate(zip(cat_ids, pri_ids))
+        ]
+
+
+def cascade_predict(fast, texts, fallback, threshold=CASCADE_THRESHOLD):
+    """Fast-tier predictions, with `fallback(texts)` (the transformer) re-scoring the doubtful ones."""
+    preds = fast.predict_batch(texts)
+    doubtful = [i for i, p in enumerate(preds) if min(p["category_confidence"], p["priority_confidence"]) < threshold]
+    for p in preds:
+        p["tier"] = "fast"
+    if doubtful:
+        for i, pred in zip(doubtful, fallback([texts[i] for i in doubtful])):
+            preds[i] = {**pred, "tier": "transformer"}
+    return preds
+
+
+# ===============================
+# Training
+# ===============================
+def lemmatize_rows(rows, batch_size=256):
+    """The `processed` text the serving pipeline feeds the models."""
+    from scripts.inference import registry, analyze_doc
+    nlp = registry.get("nlp")
+    return [analyze_doc(doc)["processed"] for doc in nlp.pipe((row["clean_text"] for row in rows), batch_size=batch_size)]
+
+
+def _fit_head(features, labels, c):
+    from sklearn.calibration import CalibratedClassifierCV
+    from sklearn.svm import LinearSVC
+    model = CalibratedClassifierCV(LinearSVC(C=c))
+    model.fit(features, labels)
+    return model
+
+
+def train_fast_model(output=FAST_MODEL_PATH, teacher=False, limit=None, test_size=0.15, seed=42, c=1.0):
+    import joblib
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.model_selection import train_test_split
+    from scripts.dataset import iter_dataset_rows
+
+    rows = list(itertools.islice(iter_dataset_rows(), limit))
+    print(f"Lemmatising {len(rows)} tickets...")
+    texts = lemmatize_rows(rows)
+
+    if teacher:
+        from scripts.inference import transformer_predict_batch
+        print("Labelling with the transformer...")
+        preds = transformer_predict_batch(texts)
+        cat_labels = [p["category"] for p in preds]
+        pri_labels = [p["priority"] for p in preds]
+    else:
+        cat_labels = [row["Topic_group"] for row in rows]
+        pri_labels = [row["Priority"] for row in rows]
+
+    # Teacher labels can leave a class with a single ticket, which stratification cannot split
+    stratify = cat_labels if min(Counter(cat_labels).values()) >= 2 else None
+    train_idx, test_idx = train_test_split(np.arange(len(rows)), test_size=test_size, random_state=seed, stratify=stratify)
+
+    # Same vectoriser settings as the notebook baseline
+    vectorizer = TfidfVectorizer(ngram_range=(1,2), max_features=150_000, min_df=2, max_df=0.9)
+    start = time.perf_counter()
+    features = vectorizer.fit_transform([texts[i] for i in train_idx])
+    category = _fit_head(features, [cat_labels[i] for i in train_idx], c)
+    priority = _fit_head(features, [pri_labels[i] for i in train_idx], c)
+    print(f"Trained in {time.perf_counter() - start:.1f}s")
+
+    test_features = vectorizer.transform([texts[i] for i in test_idx])
+    for name, model, labels in (("category", category, cat_labels), ("priority", priority, pri_labels)):
+        acc = np.mean(model.predict(test_features) == np.array([labels[i] for i in test_idx]))
+        print(f"{name} held-out accuracy: {acc:.4f}")
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    # Held-out row numbers are kept so the cascade report never scores training tickets
+    joblib.dump({"vectorizer": vectorizer, "category": category, "priority": priority,
+                 "labels": "teacher" if teacher else "dataset", "test_index": [int(i) for i in test_idx]}, output)
+    print(f"Saved {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast tier of the inference cascade")
+    parser.add_argument("--train", action="store_true", help="fit and save the TF-IDF + LinearSVC model")
+    parser.add_argument("--teacher", action="store_true", help="train on the transformer's predictions instead of dataset labels")
+    parser.add_argument("--output", default=FAST_MODEL_PATH)
+    parser.add_argument("--limit", type=int, help="only use the first N tickets")
+    parser.add_argument("--test-size", type=float, default=0.15)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--C", type=float, default=1.0, dest="c")
+    args = parser.parse_args()
+
+    if args.train:
+        train_fast_model(args.output, teacher=args.teacher, limit=args.limit, test_size=args.test_size, seed=args.seed, c=args.c)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
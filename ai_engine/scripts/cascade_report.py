@@ -0,0 +1,121 @@
+"""
+CASCADE REPORT
+--------------
+Scores the fast model's held-out tickets (never seen in training) three ways,
+transformer only, fast tier only, and the cascade at several thresholds, and
+reports for each:
+
+    short-circuit   fraction of tickets answered by the fast tier
+    accuracy        against the dataset labels (when they match the model's label set)
+    agreement       with transformer-only predictions
+    tickets/s       and speedup over transformer-only
+
+Run from the ai_engine folder (after `python -m scripts.cascade --train`):
+    python -m scripts.cascade_report --thresholds 0.6 0.8 0.9 0.95 --samples 2000
+"""
+
+import argparse
+import json
+import random
+import time
+
+from scripts.cascade import FastClassifier, cascade_predict, lemmatize_rows
+from scripts.dataset import iter_dataset_rows
+from scripts.inference import registry, transformer_predict_batch
+
+
+def _held_out_rows(test_index, samples, seed):
+    wanted = set(test_index)
+    if samples and samples < len(wanted):
+        wanted = set(random.Random(seed).sample(sorted(wanted), samples))
+    return [row for i, row in enumerate(iter_dataset_rows()) if i in wanted]
+
+
+def _accuracy(preds, labels, key, known_labels):
+    # Dataset labels are names (Topic_group / Priority); only score when they match the model's label set
+    labels = [label.lower() for label in labels]
+    if not set(labels) <= {k.lower() for k in known_labels}:
+        return None
+    return sum(p[key].lower() == label for p, label in zip(preds, labels)) / len(preds)
+
+
+def _agreement(preds, reference):
+    return sum(p["category"] == r["category"] and p["priority"] == r["priority"] for p, r in zip(preds, reference)) / len(preds)
+
+
+def _timed(fn, texts):
+    start = time.perf_counter()
+    preds = fn(texts)
+    return preds, len(texts) / (time.perf_counter() - start)
+
+
+def _summary(name, preds, rate, rows, reference, base_rate, known):
+    return {
+        "mode": name,
+        "short_circuit": sum(p.get("tier") == "fast" for p in preds) / len(preds),
+        "category_accuracy": _accuracy(preds, [r["Topic_group"] for r in rows], "category", known["category"]),
+        "priority_accuracy": _accuracy(preds, [r["Priority"] for r in rows], "priority", known["priority"]),
+        "agreement": _agreement(preds, reference),
+        "tickets_per_sec": rate,
+        "speedup": rate / base_rate,
+    }
+
+
+def _fmt(value, pattern="{:.3f}"):
+    return "n/a" if value is None else pattern.format(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast-tier cascade report on held-out tickets")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.6, 0.8, 0.9, 0.95])
+    parser.add_argument("--samples", type=int, default=2000, help="held-out tickets to score (0: all)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write the summary to this file")
+    args = parser.parse_args()
+
+    fast = FastClassifier()
+    rows = _held_out_rows(fast.test_index, args.samples, args.seed)
+    texts = lemmatize_rows(rows)
+
+    transformer = lambda batch: transformer_predict_batch(batch, batch_size=args.batch_size)
+    backend = registry.get("backend")
+    transformer(texts[:args.batch_size])  # warm-up
+    transformer_labels = {"category": set(backend.cat_id2label.values()), "priority": set(backend.pri_id2label.values())}
+    cascade_labels = {head: transformer_labels[head] | fast.labels[head] for head in transformer_labels}
+
+    reference, base_rate = _timed(transformer, texts)
+    for p in reference:
+        p["tier"] = "transformer"
+    results = [_summary("transformer", reference, base_rate, rows, reference, base_rate, transformer_labels)]
+
+    fast_preds, rate = _timed(fast.predict_batch, texts)
+    for p in fast_preds:
+        p["tier"] = "fast"
+    results.append(_summary("fast only", fast_preds, rate, rows, reference, base_rate, fast.labels))
+
+    for threshold in args.thresholds:
+        preds, rate = _timed(lambda batch: cascade_predict(fast, batch, transformer, threshold=threshold), texts)
+        results.append(_summary(f"cascade@{threshold:g}", preds, rate, rows, reference, base_rate, cascade_labels))
+
+    base = results[0]
+
+    def delta(r, key):
+        return None if r[key] is None or base[key] is None else r[key] - base[key]
+
+    print(f"\n{len(rows)} held-out tickets\n")
+    print(f"{'mode':<14} {'fast share':>10} {'cat acc':>8} {'d cat':>7} {'pri acc':>8} {'d pri':>7} {'agree':>7} {'tickets/s':>10} {'speedup':>8}")
+    print("-" * 88)
+    for r in results:
+        d_cat, d_pri = delta(r, "category_accuracy"), delta(r, "priority_accuracy")
+        print(f"{r['mode']:<14} {r['short_circuit']:>10.1%} {_fmt(r['category_accuracy']):>8} {_fmt(d_cat, '{:+.3f}'):>7} "
+              f"{_fmt(r['priority_accuracy']):>8} {_fmt(d_pri, '{:+.3f}'):>7} {r['agreement']:>7.3f} "
+              f"{r['tickets_per_sec']:>10.1f} {r['speedup']:>7.2f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"samples": len(rows), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
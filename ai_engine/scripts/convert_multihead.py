@@ -0,0 +1,132 @@
+"""
+BUILD A MULTI-HEAD CHECKPOINT
+-----------------------------
+Builds models/multihead_model from the two separate checkpoints in
+models/category_model and models/priority_model.
+
+The encoder of one checkpoint (--encoder-from) is shared. That model's head
+is kept as-is. The other head was fine-tuned against a different encoder, so
+it is re-fitted on the shared encoder's features by distilling the original
+model's predictions on a sample of dataset.zip (no labels needed). The
+script then reports how often the multi-head model agrees with the two-model
+path on held-out tickets.
+
+Run from the ai_engine folder:
+    python -m scripts.convert_multihead --encoder-from category --distill-samples 4000
+
+A jointly fine-tuned checkpoint saved in the same layout (see
+scripts/multihead.py) can be dropped into models/multihead_model directly.
+"""
+
+import argparse
+import copy
+
+import torch
+import torch.nn.functional as F
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+from scripts.backends import CATEGORY_MODEL_PATH, MODEL_MAX_LENGTH, MULTIHEAD_MODEL_PATH, PRIORITY_MODEL_PATH, encode_head_tail
+from scripts.dataset import sample_texts
+from scripts.multihead import from_sequence_classifiers, save_multihead
+
+
+def _batches(texts, batch_size):
+    for start in range(0, len(texts), batch_size):
+        yield texts[start:start + batch_size]
+
+
+def _encode(tokenizer, texts, max_length):
+    # Capped like at serving time (head + tail of over-long tickets), so the heads see production inputs
+    return tokenizer.pad(encode_head_tail(tokenizer, texts, max_length), padding=True, return_tensors="pt")
+
+
+@torch.no_grad()
+def _collect(multihead, tokenizer, teacher, teacher_tokenizer, head_name, texts, batch_size, max_length):
+    features, targets = [], []
+    for chunk in _batches(texts, batch_size):
+        inputs = _encode(tokenizer, chunk, max_length)
+        features.append(multihead.head_inputs(**inputs)[head_name])
+        t_inputs = _encode(teacher_tokenizer, chunk, max_length)
+        targets.append(torch.softmax(teacher(**t_inputs).logits, dim=-1))
+    return torch.cat(features), torch.cat(targets)
+
+
+def distill_head(multihead, tokenizer, teacher, teacher_tokenizer, head_name, texts, epochs, lr, batch_size, max_length):
+    features, targets = _collect(multihead, tokenizer, teacher, teacher_tokenizer, head_name, texts, batch_size, max_length)
+    head = multihead.heads[head_name]
+    head.train()
+    optimizer = torch.optim.AdamW(head.parameters(), lr=lr)
+    for epoch in range(epochs):
+        perm = torch.randperm(len(features))
+        total = 0.0
+        for start in range(0, len(perm), batch_size):
+            idx = perm[start:start + batch_size]
+            log_probs = F.log_softmax(head(features[idx]), dim=-1)
+            loss = F.kl_div(log_probs, targets[idx], reduction="batchmean")
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total += loss.item() * len(idx)
+        print(f"  [{head_name}] epoch {epoch + 1}/{epochs} KL={total / len(features):.4f}")
+    head.eval()
+
+
+@torch.no_grad()
+def agreement(multihead, tokenizer, teachers, texts, batch_size, max_length):
+    hits = {name: 0 for name in teachers}
+    for chunk in _batches(texts, batch_size):
+        inputs = _encode(tokenizer, chunk, max_length)
+        logits = multihead(**inputs)
+        for name, (teacher, teacher_tokenizer) in teachers.items():
+            t_inputs = _encode(teacher_tokenizer, chunk, max_length)
+            expected = teacher(**t_inputs).logits.argmax(-1)
+            hits[name] += int((logits[name].argmax(-1) == expected).sum())
+    return {name: hits[name] / max(1, len(texts)) for name in hits}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a shared-encoder multi-head checkpoint")
+    parser.add_argument("--category-model", default=CATEGORY_MODEL_PATH)
+    parser.add_argument("--priority-model", default=PRIORITY_MODEL_PATH)
+    parser.add_argument("--output", default=MULTIHEAD_MODEL_PATH)
+    parser.add_argument("--encoder-from", choices=["category", "priority"], default="category")
+    parser.add_argument("--distill-samples", type=int, default=4000, help="0 keeps the other head unchanged")
+    parser.add_argument("--eval-samples", type=int, default=500)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--max-length", type=int, default=MODEL_MAX_LENGTH)
+    args = parser.parse_args()
+
+    paths = {"category": args.category_model, "priority": args.priority_model}
+    tokenizers = {name: AutoTokenizer.from_pretrained(p) for name, p in paths.items()}
+    models = {name: AutoModelForSequenceClassification.from_pretrained(p).eval() for name, p in paths.items()}
+
+    source = args.encoder_from
+    other = "priority" if source == "category" else "category"
+    # Deep copy so the teachers keep their original heads while ours are re-fitted
+    multihead = from_sequence_classifiers(copy.deepcopy(models[source]), {n: copy.deepcopy(m) for n, m in models.items()}).eval()
+    tokenizer = tokenizers[source]
+
+    texts = sample_texts(args.distill_samples + args.eval_samples, seed=13)
+    train_texts, eval_texts = texts[:args.distill_samples], texts[args.distill_samples:]
+
+    if train_texts:
+        print(f"Distilling '{other}' head onto the '{source}' encoder with {len(train_texts)} tickets...")
+        distill_head(multihead, tokenizer, models[other], tokenizers[other], other, train_texts,
+                     args.epochs, args.lr, args.batch_size, args.max_length)
+
+    scores = {}
+    if eval_texts:
+        teachers = {name: (models[name], tokenizers[name]) for name in models}
+        scores = agreement(multihead, tokenizer, teachers, eval_texts, args.batch_size, args.max_length)
+        for name, score in scores.items():
+            print(f"Agreement with separate {name} model: {score:.3f} ({len(eval_texts)} tickets)")
+
+    meta = {"encoder_from": source, "distill_samples": len(train_texts), "agreement": scores}
+    save_multihead(multihead, tokenizer, args.output, meta=meta)
+    print(f"Saved multi-head checkpoint to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
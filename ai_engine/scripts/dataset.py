@@ -0,0 +1,60 @@
+"""
+DATASET ACCESS
+--------------
+Streams rows of the prepared ticket CSV straight out of `dataset.zip`
+(or a plain .csv / .jsonl) without extracting it or loading it into memory.
+"""
+
+import csv
+import io
+import json
+import os
+import random
+import zipfile
+
+CURRENT_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(CURRENT_SCRIPT_DIR, ".."))
+
+DATASET_CSV_NAME = "all_tickets_prepared_for_model.csv"
+DATASET_PATH = os.getenv("TICKET_DATASET_PATH", os.path.join(ROOT_DIR, "..", "dataset.zip"))
+
+
+def iter_dataset_rows(path=DATASET_PATH, member=DATASET_CSV_NAME):
+    """Yield one dict per CSV row (columns: clean_text, Topic_group, Priority, Topic_ID, Priority_ID)."""
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as zf:
+            name = member if member in zf.namelist() else next(n for n in zf.namelist() if n.endswith(".csv"))
+            with zf.open(name) as raw:
+                yield from csv.DictReader(io.TextIOWrapper(raw, encoding="utf-8", newline=""))
+    else:
+        with open(path, encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+
+
+def iter_records(path=DATASET_PATH):
+    """Like iter_dataset_rows, but also accepts JSON Lines (.jsonl / .ndjson, one object per line)."""
+    if path.endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        yield from iter_dataset_rows(path)
+
+
+def sample_rows(n, seed=42, path=DATASET_PATH):
+    """Reproducible reservoir sample of `n` rows in a single streaming pass."""
+    rng = random.Random(seed)
+    sample = []
+    for i, row in enumerate(iter_dataset_rows(path)):
+        if i < n:
+            sample.append(row)
+        else:
+            j = rng.randint(0, i)
+            if j < n:
+                sample[j] = row
+    return sample
+
+
+def sample_texts(n, seed=42, path=DATASET_PATH):
+    return [row["clean_text"] for row in sample_rows(n, seed=seed, path=path)]
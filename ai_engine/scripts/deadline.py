@@ -0,0 +1,157 @@
+"""
+LATENCY BUDGETS & OVERLOAD MODE
+-------------------------------
+A request may carry a latency budget, given as the X-Latency-Budget-Ms header
+or a `latency_budget_ms` field on the ticket (the field wins). The pipeline
+tracks the time spent since the request arrived, including time queued for
+the executor. Before each optional stage it checks whether the stage's
+expected cost still fits, after reserving time for the mandatory stages that
+follow it (spaCy, the model, rules). A stage that does not fit is skipped or
+downgraded:
+
+    translate   only a cached translation is used; otherwise the original text
+    keywords    KeyBERT auto-title replaced by RAKE on the same parse
+    entities    entity lists left empty (escalation rules still run)
+
+Expected costs are moving averages of recently observed per-ticket stage
+times, and start from STAGE_COST_PRIORS_MS. The translate cost is the backend's mean call time,
+because cache hits and ASCII text never reach the backend.
+
+Overload mode: once the executor's queue depth reaches OVERLOAD_QUEUE_DEPTH,
+every request takes the cheap path (all optional stages skipped) until the
+depth falls back to OVERLOAD_EXIT_DEPTH.
+
+Configuration:
+    LATENCY_BUDGET_MS       default budget for requests that don't set one (0 = unlimited)
+    OVERLOAD_QUEUE_DEPTH    queue depth that turns overload mode on (default 3/4 of
+                            INFERENCE_MAX_PENDING, 0 disables it)
+    OVERLOAD_EXIT_DEPTH     queue depth at or below which it turns off again (default half of the above)
+"""
+
+import os
+import threading
+import time
+
+from scripts.executor import INFERENCE_MAX_PENDING
+
+LATENCY_BUDGET_MS = float(os.getenv("LATENCY_BUDGET_MS", "0"))
+LATENCY_BUDGET_HEADER = "X-Latency-Budget-Ms"
+OVERLOAD_QUEUE_DEPTH = int(os.getenv("OVERLOAD_QUEUE_DEPTH", str(INFERENCE_MAX_PENDING * 3 // 4)))
+OVERLOAD_EXIT_DEPTH = int(os.getenv("OVERLOAD_EXIT_DEPTH", str(OVERLOAD_QUEUE_DEPTH // 2)))
+
+# Pipeline order; a stage only has to leave room for the mandatory stages after it
+PIPELINE_STAGES = ("translate", "clean", "spacy", "analyze", "keywords", "entities", "model", "rules")
+OPTIONAL_STAGES = ("translate", "keywords", "entities")
+# Per-ticket milliseconds assumed until real timings have been observed
+STAGE_COST_PRIORS_MS = {"translate": 300.0, "clean": 0.05, "spacy": 5.0, "analyze": 0.1, "keywords": 30.0,
+                        "entities": 0.2, "model": 25.0, "rules": 0.1}
+STAGE_COST_SMOOTHING = 0.1
+
+
+class StageCosts:
+    """Exponential moving average of per-ticket stage times (ms)."""
+
+    def __init__(self, priors=STAGE_COST_PRIORS_MS, smoothing=STAGE_COST_SMOOTHING, sources=None):
+        self.costs = dict(priors)
+        self.smoothing = smoothing
+        # stage -> callable returning a measured cost (or None), used instead of the average
+        self.sources = dict(sources or {})
+        self._lock = threading.Lock()
+
+    def observe(self, timings, tickets=1, skipped=()):
+        """Fold one request's stage timings in; degraded stages are left out so the cheap
+        fallback doesn't pass for the real stage's cost."""
+        with self._lock:
+            for stage, ms in timings.items():
+                if stage not in self.costs or stage in self.sources or stage in skipped:
+                    continue
+                self.costs[stage] += self.smoothing * (ms / max(1, tickets) - self.costs[stage])
+
+    def estimate(self, stage):
+        if stage in self.sources:
+            measured = self.sources[stage]()
+            if measured is not None:
+                return measured
+        return self.costs.get(stage, 0.0)
+
+    def reserve(self, after_stage):
+        """Expected time of the mandatory stages that run after `after_stage`."""
+        later = PIPELINE_STAGES[PIPELINE_STAGES.index(after_stage) + 1:]
+        return sum(self.estimate(stage) for stage in later if stage not in OPTIONAL_STAGES)
+
+    def snapshot(self):
+        return {stage: round(self.estimate(stage), 3) for stage in PIPELINE_STAGES}
+
+
+class Deadline:
+    """Budget of one request. `cheap` (overload mode) skips every optional stage."""
+
+    def __init__(self, budget_ms=None, costs=None, cheap=False, start=None):
+        self.budget_ms = budget_ms if budget_ms and budget_ms > 0 else None
+        self.costs = costs or StageCosts()
+        self.cheap = cheap
+        self.start = time.perf_counter() if start is None else start
+        self.skipped = []
+
+    @property
+    def reason(self):
+        return "overload" if self.cheap else "budget"
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def remaining_ms(self):
+        return None if self.budget_ms is None else self.budget_ms - self.elapsed_ms()
+
+    def allows(self, stage, count=1):
+        """Whether `count` tickets' worth of an optional stage still fits the budget."""
+        if self.cheap:
+            return False
+        remaining = self.remaining_ms()
+        if remaining is None:
+            return True
+        return remaining - self.costs.reserve(stage) * count >= self.costs.estimate(stage) * count
+
+    def skip(self, stage):
+        if stage not in self.skipped:
+            self.skipped.append(stage)
+
+
+def parse_budget(value):
+    """Budget in ms from a header / field value; None when absent, unparsable or <= 0."""
+    try:
+        budget = float(value)
+    except (TypeError, ValueError):
+        return None
+    return budget if budget > 0 else None
+
+
+class OverloadMonitor:
+    """Overload mode with hysteresis on a queue-depth reading."""
+
+    def __init__(self, depth_fn, enter_depth=OVERLOAD_QUEUE_DEPTH, exit_depth=OVERLOAD_EXIT_DEPTH):
+        self.depth_fn = depth_fn
+        self.enter_depth = enter_depth
+        # Readings come from admitted requests, which count themselves, so the depth never drops below 1
+        self.exit_depth = max(1, min(exit_depth, enter_depth))
+        self.overloaded = False
+        self.activations = 0
+        self.since = None
+
+    def active(self):
+        if self.enter_depth <= 0:
+            return False
+        depth = self.depth_fn()
+        if not self.overloaded and depth >= self.enter_depth:
+            self.overloaded = True
+            self.activations += 1
+            self.since = time.time()
+            print(f"WARNING: queue depth {depth} >= {self.enter_depth}; overload mode on (optional stages skipped)")
+        elif self.overloaded and depth <= self.exit_depth:
+            self.overloaded = False
+            print(f"Queue depth {depth} <= {self.exit_depth}; overload mode off after {time.time() - self.since:.1f}s")
+        return self.overloaded
+
+    def stats(self):
+        return {"overloaded": self.overloaded, "enter_depth": self.enter_depth, "exit_depth": self.exit_depth,
+                "activations": self.activations}
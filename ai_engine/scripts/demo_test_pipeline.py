@@ -11,17 +11,21 @@ This script shows EACH STEP of the AI ticket classification pipeline:
 - Rule Engine
 - Entity Extraction
 - Final JSON Output
+- Stage Timings
 """
 
-from inference import (
-    translate_to_english,
+import os
+import sys
+
+# Make the ai_engine folder importable when this file is run directly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from scripts.inference import (
     clean_text,
-    lemmatize_and_clean_text,
-    extract_entities,
-    preprocess_text,
+    prepare_ticket,
     model_predict,
     apply_minimal_rules,
-    predict_ticket_final
+    finalize_ticket
 )
 
 # ===============================
@@ -71,65 +75,74 @@ test_tickets = [
 # ===============================
 # RUN TRACE
 # ===============================
-print("\n================ FULL AI PIPELINE TRACE DEMO ================\n")
-
-for idx, ticket in enumerate(test_tickets, start=1):
-    print(f"\n🔹 TEST CASE {idx}: {ticket['case']}")
-    print("=" * 70)
-
-    title = ticket["title"]
-    desc = ticket["description"]
-    raw_text = f"{title} {desc}"
-
-    print("\n[1] RAW INPUT")
-    print("Title       :", title or "(empty)")
-    print("Description :", desc)
-
-    # Language Detection + Translation
-    translated = translate_to_english(raw_text)
-    print("\n[2] LANGUAGE DETECTION & TRANSLATION")
-    print("Translated Text:", translated)
-
-    # Cleaning
-    cleaned = clean_text(translated)
-    print("\n[3] TEXT CLEANING")
-    print("Cleaned Text:", cleaned)
-
-    # Lemmatization
-    lemmatized = lemmatize_and_clean_text(cleaned)
-    print("\n[4] LEMMATIZATION & STOPWORD REMOVAL")
-    print("Processed Text:", lemmatized)
-
-    # Keyword Extraction
-    translated_text, processed_text, keywords = preprocess_text(title, desc)
-    print("\n[5] KEYWORD EXTRACTION (KeyBERT)")
-    print("Extracted Keywords:", keywords or "(none)")
-
-    # Model Prediction
-    raw_pred = model_predict(processed_text)
-    print("\n[6] TRANSFORMER MODEL PREDICTION")
-    print("Predicted Category :", raw_pred["category"])
-    print("Category Confidence:", raw_pred["category_confidence"])
-    print("Predicted Priority :", raw_pred["priority"])
-    print("Priority Confidence:", raw_pred["priority_confidence"])
-
-    # Rule Engine
-    final_cat, final_pri = apply_minimal_rules(processed_text, raw_pred)
-    print("\n[7] RULE ENGINE OUTPUT")
-    print("Final Category :", final_cat)
-    print("Final Priority :", final_pri)
-
-    # Entity Extraction
-    entities = extract_entities(translated_text)
-    print("\n[8] ENTITY EXTRACTION")
-    print("Entities:", entities)
-
-    # Final JSON
-    final_output = predict_ticket_final(title, desc)
-    print("\n[9] FINAL JSON OUTPUT (Saved to DB)")
-    for k, v in final_output.items():
-        print(f"{k:22}: {v}")
-
-    print("\n" + "=" * 70)
-
-print("\n✅ DEMO COMPLETED SUCCESSFULLY\n")
+def run_trace():
+    print("\n================ FULL AI PIPELINE TRACE DEMO ================\n")
+
+    for idx, ticket in enumerate(test_tickets, start=1):
+        print(f"\n🔹 TEST CASE {idx}: {ticket['case']}")
+        print("=" * 70)
+
+        title = ticket["title"]
+        desc = ticket["description"]
+
+        print("\n[1] RAW INPUT")
+        print("Title       :", title or "(empty)")
+        print("Description :", desc)
+
+        # Every stage runs once; the steps below print the intermediate results
+        prepared = prepare_ticket(title, desc)
+
+        # Language Detection + Translation
+        translated_text = prepared["translated"]
+        print("\n[2] LANGUAGE DETECTION & TRANSLATION")
+        print("Translated Text:", translated_text)
+
+        # Cleaning
+        print("\n[3] TEXT CLEANING")
+        print("Cleaned Text:", clean_text(translated_text))
+
+        # Lemmatization
+        processed_text = prepared["processed"]
+        print("\n[4] LEMMATIZATION & STOPWORD REMOVAL")
+        print("Processed Text:", processed_text)
+
+        # Keyword Extraction
+        keywords = prepared["keywords"]
+        print("\n[5] KEYWORD EXTRACTION (untitled tickets only)")
+        print("Extracted Keywords:", keywords or "(none)")
+
+        # Model Prediction
+        raw_pred = model_predict(processed_text)
+        print("\n[6] TRANSFORMER MODEL PREDICTION")
+        print("Predicted Category :", raw_pred["category"])
+        print("Category Confidence:", raw_pred["category_confidence"])
+        print("Predicted Priority :", raw_pred["priority"])
+        print("Priority Confidence:", raw_pred["priority_confidence"])
+
+        # Rule Engine
+        final_cat, final_pri = apply_minimal_rules(processed_text, raw_pred, escalations=prepared["escalations"])
+        print("\n[7] RULE ENGINE OUTPUT")
+        print("Final Category :", final_cat)
+        print("Final Priority :", final_pri)
+
+        # Entity Extraction
+        print("\n[8] ENTITY EXTRACTION")
+        print("Entities:", prepared["entities"])
+
+        # Final JSON
+        final_output = finalize_ticket(prepared, raw_pred)
+        print("\n[9] FINAL JSON OUTPUT (Saved to DB)")
+        for k, v in final_output.items():
+            print(f"{k:22}: {v}")
+
+        print("\n[10] STAGE TIMINGS (ms)")
+        for stage, ms in prepared["timings"].items():
+            print(f"{stage:22}: {ms}")
+
+        print("\n" + "=" * 70)
+
+    print("\n✅ DEMO COMPLETED SUCCESSFULLY\n")
+
+
+if __name__ == "__main__":
+    run_trace()
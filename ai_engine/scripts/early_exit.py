@@ -0,0 +1,402 @@
+"""
+EARLY-EXIT INFERENCE
+--------------------
+Small classifier heads on the intermediate encoder layers of the category and
+priority models. At inference the encoder runs one layer at a time; a ticket
+stops at the first exit head whose confidence reaches that head's calibrated
+threshold, and only the remaining tickets continue to the next layer. Tickets
+no head is sure about get the full model's prediction.
+
+Enable with INFERENCE_BACKEND=torch-early-exit (separate category/priority
+checkpoints only; the base models are untouched).
+
+On-disk layout (EARLY_EXIT_DIR, default models/early_exit/):
+    category.safetensors, priority.safetensors   "<layer>.<param>" tensors of the exit heads
+    early_exit_config.json                       layers, thresholds and the checkpoints they were trained on
+
+The heads are trained with the encoder frozen. By default they learn to
+reproduce the full model's own predictions (the checkpoints' label sets differ
+from the CSV's); --dataset-labels trains and calibrates on Topic_group /
+Priority instead. Every HOLDOUT_EVERY-th dataset row is kept out of training
+for calibration and the report.
+
+    python -m scripts.early_exit --train --target 0.98
+    python -m scripts.early_exit --calibrate --target 0.99     # new thresholds, same heads
+    python -m scripts.early_exit_report
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+
+import numpy as np
+import torch
+from torch import nn
+from safetensors.torch import save_file, load_file
+
+from scripts.backends import (
+    CATEGORY_MODEL_PATH, PRIORITY_MODEL_PATH, MODEL_MAX_LENGTH, ROOT_DIR, TorchBackend, checkpoint_fingerprint, encode_head_tail,
+)
+from scripts.multihead import ROBERTA_STYLE, SUPPORTED_MODEL_TYPES
+
+EARLY_EXIT_DIR = os.getenv("EARLY_EXIT_DIR", os.path.join(ROOT_DIR, "models", "early_exit"))
+EARLY_EXIT_CONFIG_NAME = "early_exit_config.json"
+HEADS = ("category", "priority")
+HOLDOUT_EVERY = 10
+
+
+class ExitHead(nn.Module):
+    """Pooler-shaped head over the first-token hidden state of one layer."""
+
+    def __init__(self, hidden_size, num_labels):
+        super().__init__()
+        self.dense = nn.Linear(hidden_size, hidden_size)
+        self.out = nn.Linear(hidden_size, num_labels)
+
+    def forward(self, first_token):
+        return self.out(torch.tanh(self.dense(first_token)))
+
+
+def _run_layer(layer, hidden, mask):
+    output = layer(hidden, attention_mask=mask)
+    return output[0] if isinstance(output, tuple) else output
+
+
+def _final_logits(model, hidden):
+    if model.config.model_type in ROBERTA_STYLE:
+        # RobertaClassificationHead reads hidden[:, 0] itself
+        return model.classifier(hidden)
+    return model.classifier(model.dropout(model.base_model.pooler(hidden)))
+
+
+class EarlyExitClassifier(nn.Module):
+    """A *ForSequenceClassification model run layer by layer, with exit heads after some layers."""
+
+    def __init__(self, model, heads, thresholds):
+        super().__init__()
+        if model.config.model_type not in SUPPORTED_MODEL_TYPES:
+            raise ValueError(f"Early exit does not support model_type '{model.config.model_type}'")
+        self.model = model
+        self.heads = nn.ModuleDict({str(layer): head for layer, head in heads.items()})
+        # None disables a head (calibration found no threshold reaching the target)
+        self.thresholds = {int(layer): t for layer, t in thresholds.items()}
+        self.num_layers = model.config.num_hidden_layers
+        self.enabled = True
+
+    def _embed(self, inputs):
+        hidden = self.model.base_model.embeddings(input_ids=inputs["input_ids"], token_type_ids=inputs.get("token_type_ids"))
+        mask = inputs["attention_mask"][:, None, None, :].to(hidden.dtype)
+        return hidden, (1.0 - mask) * torch.finfo(hidden.dtype).min
+
+    def all_exits(self, inputs):
+        """Logits of every exit head and of the full model ({layer: logits}), without exiting."""
+        hidden, mask = self._embed(inputs)
+        logits = {}
+        for i, layer in enumerate(self.model.base_model.encoder.layer, start=1):
+            hidden = _run_layer(layer, hidden, mask)
+            if str(i) in self.heads:
+                logits[i] = self.heads[str(i)](hidden[:, 0])
+        logits[self.num_layers] = _final_logits(self.model, hidden)
+        return logits
+
+    def forward(self, inputs):
+        """(probabilities, exit layer) per row; confident rows leave the batch at their exit."""
+        hidden, mask = self._embed(inputs)
+        n = hidden.shape[0]
+        probs = torch.zeros(n, self.model.config.num_labels)
+        exit_layer = torch.full((n,), self.num_layers, dtype=torch.long)
+        active = torch.arange(n)
+
+        for i, layer in enumerate(self.model.base_model.encoder.layer, start=1):
+            hidden = _run_layer(layer, hidden, mask)
+            if i == self.num_layers:
+                probs[active] = torch.softmax(_final_logits(self.model, hidden), dim=1).float().cpu()
+                break
+            threshold = self.thresholds.get(i)
+            if not self.enabled or threshold is None or str(i) not in self.heads:
+                continue
+            p = torch.softmax(self.heads[str(i)](hidden[:, 0]), dim=1)
+            done = p.max(dim=1).values >= threshold
+            if done.any():
+                probs[active[done]] = p[done].float().cpu()
+                exit_layer[active[done]] = i
+                keep = ~done
+                if not keep.any():
+                    break
+                active, hidden, mask = active[keep], hidden[keep], mask[keep]
+        return probs.numpy(), exit_layer.numpy()
+
+
+# ===============================
+# Persistence
+# ===============================
+def _config_path(path):
+    return os.path.join(path, EARLY_EXIT_CONFIG_NAME)
+
+
+def load_exit_config(path=EARLY_EXIT_DIR):
+    if not os.path.isfile(_config_path(path)):
+        raise FileNotFoundError(f"{_config_path(path)} not found; train the exit heads with `python -m scripts.early_exit --train`")
+    with open(_config_path(path)) as f:
+        return json.load(f)
+
+
+def save_exit_config(config, path=EARLY_EXIT_DIR):
+    os.makedirs(path, exist_ok=True)
+    with open(_config_path(path), "w") as f:
+        json.dump(config, f, indent=2)
+
+
+def load_exit_heads(model, name, config, path=EARLY_EXIT_DIR):
+    entry = config["heads"][name]
+    tensors = load_file(os.path.join(path, f"{name}.safetensors"))
+    heads = {}
+    for layer in entry["layers"]:
+        head = ExitHead(model.config.hidden_size, model.config.num_labels)
+        prefix = f"{layer}."
+        head.load_state_dict({k[len(prefix):]: v for k, v in tensors.items() if k.startswith(prefix)})
+        heads[layer] = head
+    return EarlyExitClassifier(model, heads, entry["thresholds"]).to(model.device).eval()
+
+
+class EarlyExitBackend(TorchBackend):
+    name = "torch-early-exit"
+
+    def __init__(self, category_path, priority_path, multihead_path, mode="auto", device=torch.device("cpu"), exit_dir=None):
+        exit_dir = exit_dir or EARLY_EXIT_DIR
+        # Exit heads belong to one encoder each, so the separate checkpoints are always used
+        super().__init__(category_path, priority_path, multihead_path, mode="separate", device=device)
+        config = load_exit_config(exit_dir)
+        for name, path in (("category", category_path), ("priority", priority_path)):
+            if config["heads"][name].get("checkpoint") != checkpoint_fingerprint(path):
+                print(f"WARNING: {name} exit heads were trained on a different checkpoint than {path}; retrain them")
+        self.exits = {
+            "category": load_exit_heads(self.category_model, "category", config, exit_dir),
+            "priority": load_exit_heads(self.priority_model, "priority", config, exit_dir),
+        }
+        # Layers executed per ticket since start-up, for the report. Executor threads
+        # update them concurrently, so every read-modify-write holds the lock
+        self.layer_counts = {name: np.zeros(model.num_layers + 1, dtype=np.int64) for name, model in self.exits.items()}
+        self._counts_lock = threading.Lock()
+        self.version = f"{self.name}-{checkpoint_fingerprint(category_path, priority_path, exit_dir)}"
+
+    def set_early_exit(self, enabled):
+        for model in self.exits.values():
+            model.enabled = enabled
+
+    def predict_proba(self, inputs, pri_inputs):
+        with torch.no_grad():
+            cat_probs, cat_layers = self.exits["category"](inputs)
+            pri_probs, pri_layers = self.exits["priority"](pri_inputs)
+        with self._counts_lock:
+            np.add.at(self.layer_counts["category"], cat_layers, 1)
+            np.add.at(self.layer_counts["priority"], pri_layers, 1)
+        return cat_probs, pri_probs
+
+    def exit_counts(self):
+        """Copy of the per-head exit-layer histograms."""
+        with self._counts_lock:
+            return {name: counts.copy() for name, counts in self.layer_counts.items()}
+
+
+# ===============================
+# Training & calibration
+# ===============================
+def holdout_rows(calibration, limit=None, seed=42):
+    """Reproducible sample of the calibration rows (every HOLDOUT_EVERY-th) or of the rest."""
+    from scripts.dataset import iter_dataset_rows
+
+    rng = random.Random(seed)
+    sample = []
+    seen = 0
+    for i, row in enumerate(iter_dataset_rows()):
+        if (i % HOLDOUT_EVERY == 0) != calibration:
+            continue
+        if limit is None or seen < limit:
+            sample.append(row)
+        else:
+            j = rng.randint(0, seen)
+            if j < limit:
+                sample[j] = row
+        seen += 1
+    return sample
+
+
+def _padded_batches(tokenizer, texts, batch_size, device):
+    encodings = encode_head_tail(tokenizer, texts, MODEL_MAX_LENGTH)
+    for start in range(0, len(texts), batch_size):
+        features = [{k: encodings[k][i] for k in encodings.keys()} for i in range(start, min(start + batch_size, len(texts)))]
+        yield tokenizer.pad(features, padding=True, return_tensors="pt").to(device)
+
+
+def _encoder_features(model, tokenizer, texts, batch_size):
+    """First-token hidden state after every layer ([N, layers, hidden]) and the full model's logits."""
+    features, logits = [], []
+    with torch.no_grad():
+        for inputs in _padded_batches(tokenizer, texts, batch_size, model.device):
+            out = model(**inputs, output_hidden_states=True)
+            features.append(torch.stack([h[:, 0] for h in out.hidden_states[1:]], dim=1).cpu())
+            logits.append(out.logits.cpu())
+    return torch.cat(features), torch.cat(logits)
+
+
+def _dataset_targets(rows, column, label2id):
+    lookup = {label.lower(): i for label, i in label2id.items()}
+    missing = sorted({row[column] for row in rows if row[column].lower() not in lookup})
+    if missing:
+        raise ValueError(f"Dataset {column} labels {missing} are not in the model's label set; train with the default teacher targets")
+    return torch.tensor([lookup[row[column].lower()] for row in rows])
+
+
+def _train_head(features, targets, num_labels, epochs, lr, batch_size, seed):
+    torch.manual_seed(seed)
+    head = ExitHead(features.shape[1], num_labels)
+    optimizer = torch.optim.AdamW(head.parameters(), lr=lr)
+    # Soft targets (the full model's distribution) or one-hot dataset labels
+    soft = targets if targets.dim() == 2 else nn.functional.one_hot(targets, num_labels).float()
+    for _ in range(epochs):
+        order = torch.randperm(len(features))
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            loss = -(soft[idx] * torch.log_softmax(head(features[idx]), dim=1)).sum(dim=1).mean()
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+    return head.eval()
+
+
+def pick_threshold(probs, reference, target, min_exits):
+    """Lowest confidence at which the tickets exiting (confidence >= it) are at least `target` accurate."""
+    conf = probs.max(axis=1)
+    correct = probs.argmax(axis=1) == reference
+    order = np.argsort(-conf, kind="stable")
+    accuracy = np.cumsum(correct[order]) / np.arange(1, len(order) + 1)
+    ok = np.nonzero(accuracy >= target)[0]
+    ok = ok[ok + 1 >= min_exits]
+    if not len(ok):
+        return None
+    return float(conf[order[ok[-1]]])
+
+
+def calibrate(exits, tokenizers, rows, target, batch_size=64, min_exits=20, dataset_labels=False):
+    """Per-head thresholds on held-out rows; returns {model: {layer: threshold}} and applies them."""
+    from scripts.cascade import lemmatize_rows
+
+    texts = lemmatize_rows(rows)
+    chosen = {}
+    for name, model in exits.items():
+        layer_logits = {}
+        with torch.no_grad():
+            for inputs in _padded_batches(tokenizers[name], texts, batch_size, model.model.device):
+                for layer, logits in model.all_exits(inputs).items():
+                    layer_logits.setdefault(layer, []).append(torch.softmax(logits, dim=1).cpu())
+        layer_probs = {layer: torch.cat(chunks).numpy() for layer, chunks in layer_logits.items()}
+        if dataset_labels:
+            column = "Topic_group" if name == "category" else "Priority"
+            reference = _dataset_targets(rows, column, model.model.config.label2id).numpy()
+        else:
+            reference = layer_probs[model.num_layers].argmax(axis=1)
+        chosen[name] = {}
+        for layer in sorted(layer_probs):
+            if layer == model.num_layers:
+                continue
+            chosen[name][layer] = pick_threshold(layer_probs[layer], reference, target, min_exits)
+            threshold = chosen[name][layer]
+            share = 0.0 if threshold is None else float((layer_probs[layer].max(axis=1) >= threshold).mean())
+            print(f"{name} layer {layer}: threshold {'disabled' if threshold is None else f'{threshold:.4f}'} "
+                  f"({share:.1%} of tickets would reach it)")
+        model.thresholds = dict(chosen[name])
+    return chosen
+
+
+def train_exit_heads(output=EARLY_EXIT_DIR, target=0.98, limit=8000, calibration_limit=2000, layers=None,
+                     dataset_labels=False, epochs=5, lr=1e-3, batch_size=64, seed=42):
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    from scripts.cascade import lemmatize_rows
+
+    rows = holdout_rows(calibration=False, limit=limit, seed=seed)
+    print(f"Lemmatising {len(rows)} training tickets...")
+    texts = lemmatize_rows(rows)
+
+    config = {"targets": "dataset" if dataset_labels else "teacher", "target_accuracy": target, "heads": {}}
+    exits, tokenizers = {}, {}
+    for name, path in (("category", CATEGORY_MODEL_PATH), ("priority", PRIORITY_MODEL_PATH)):
+        tokenizer = AutoTokenizer.from_pretrained(path)
+        model = AutoModelForSequenceClassification.from_pretrained(path).eval()
+        num_layers, num_labels = model.config.num_hidden_layers, model.config.num_labels
+        exit_layers = [layer for layer in (layers or range(1, num_layers)) if 1 <= layer < num_layers]
+
+        start = time.perf_counter()
+        features, logits = _encoder_features(model, tokenizer, texts, batch_size)
+        if dataset_labels:
+            targets = _dataset_targets(rows, "Topic_group" if name == "category" else "Priority", model.config.label2id)
+        else:
+            targets = torch.softmax(logits, dim=1)
+        heads = {layer: _train_head(features[:, layer - 1], targets, num_labels, epochs, lr, 256, seed) for layer in exit_layers}
+        print(f"{name}: trained {len(heads)} exit heads on layers {exit_layers} in {time.perf_counter() - start:.1f}s")
+
+        os.makedirs(output, exist_ok=True)
+        tensors = {f"{layer}.{k}": v.detach().contiguous() for layer, head in heads.items() for k, v in head.state_dict().items()}
+        save_file(tensors, os.path.join(output, f"{name}.safetensors"))
+        config["heads"][name] = {"checkpoint": checkpoint_fingerprint(path), "layers": exit_layers,
+                                 "num_layers": num_layers, "thresholds": {}}
+        exits[name] = EarlyExitClassifier(model, heads, {})
+        tokenizers[name] = tokenizer
+
+    calibration_rows = holdout_rows(calibration=True, limit=calibration_limit, seed=seed)
+    print(f"Calibrating on {len(calibration_rows)} held-out tickets for {target:.1%} accuracy...")
+    for name, thresholds in calibrate(exits, tokenizers, calibration_rows, target, batch_size, dataset_labels=dataset_labels).items():
+        config["heads"][name]["thresholds"] = {str(layer): t for layer, t in thresholds.items()}
+    save_exit_config(config, output)
+    print(f"Saved exit heads to {output}")
+
+
+def recalibrate(path=EARLY_EXIT_DIR, target=0.98, calibration_limit=2000, batch_size=64, seed=42):
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    config = load_exit_config(path)
+    exits, tokenizers = {}, {}
+    for name, model_path in (("category", CATEGORY_MODEL_PATH), ("priority", PRIORITY_MODEL_PATH)):
+        tokenizers[name] = AutoTokenizer.from_pretrained(model_path)
+        exits[name] = load_exit_heads(AutoModelForSequenceClassification.from_pretrained(model_path).eval(), name, config, path)
+
+    rows = holdout_rows(calibration=True, limit=calibration_limit, seed=seed)
+    print(f"Calibrating on {len(rows)} held-out tickets for {target:.1%} accuracy...")
+    chosen = calibrate(exits, tokenizers, rows, target, batch_size, dataset_labels=config["targets"] == "dataset")
+    for name, thresholds in chosen.items():
+        config["heads"][name]["thresholds"] = {str(layer): t for layer, t in thresholds.items()}
+    config["target_accuracy"] = target
+    save_exit_config(config, path)
+    print(f"Updated {_config_path(path)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Early-exit heads for the category and priority models")
+    parser.add_argument("--train", action="store_true", help="train exit heads, then calibrate their thresholds")
+    parser.add_argument("--calibrate", action="store_true", help="only re-pick thresholds for the saved heads")
+    parser.add_argument("--target", type=float, default=0.98, help="accuracy every exit must reach (vs the full model, or the dataset labels)")
+    parser.add_argument("--dataset-labels", action="store_true", help="train/calibrate on the CSV labels instead of the full model's predictions")
+    parser.add_argument("--layers", type=int, nargs="+", help="layers to attach heads to (default: all but the last)")
+    parser.add_argument("--output", default=EARLY_EXIT_DIR)
+    parser.add_argument("--limit", type=int, default=8000, help="training tickets")
+    parser.add_argument("--calibration-limit", type=int, default=2000, help="held-out tickets for calibration")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--batch-size", type=int, default=64, help="encoder batch size")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.train:
+        train_exit_heads(args.output, args.target, args.limit, args.calibration_limit, args.layers,
+                         args.dataset_labels, args.epochs, args.lr, args.batch_size, args.seed)
+    elif args.calibrate:
+        recalibrate(args.output, args.target, args.calibration_limit, args.batch_size, args.seed)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
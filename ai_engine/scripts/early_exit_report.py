@@ -0,0 +1,103 @@
+"""
+EARLY-EXIT REPORT
+-----------------
+Scores held-out tickets (never used to train the exit heads) with the full
+models and with early exit, and reports:
+
+    layers          average encoder layers executed per ticket, per model
+    exits           share of tickets leaving at each layer
+    agreement       with the full models' predictions
+    accuracy        against the dataset labels (when they match the model's label set)
+    CPU time        process CPU seconds per 1k tickets, and the share saved
+
+Run from the ai_engine folder (after `python -m scripts.early_exit --train`):
+    python -m scripts.early_exit_report --samples 2000 --json early_exit.json
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from scripts.backends import CATEGORY_MODEL_PATH, PRIORITY_MODEL_PATH, MULTIHEAD_MODEL_PATH, predict_batch
+from scripts.cascade import lemmatize_rows
+from scripts.early_exit import EarlyExitBackend, holdout_rows
+
+
+def _accuracy(preds, labels, key, known_labels):
+    labels = [label.lower() for label in labels]
+    if not set(labels) <= {k.lower() for k in known_labels}:
+        return None
+    return sum(p[key].lower() == label for p, label in zip(preds, labels)) / len(preds)
+
+
+def _run(backend, texts, batch_size, early_exit):
+    backend.set_early_exit(early_exit)
+    before = backend.exit_counts()
+    wall, cpu = time.perf_counter(), time.process_time()
+    preds = []
+    for i in range(0, len(texts), batch_size):
+        preds.extend(predict_batch(backend, texts[i:i + batch_size], batch_size=batch_size))
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    after = backend.exit_counts()
+    exits = {name: after[name] - before[name] for name in before}
+    return preds, wall, cpu, exits
+
+
+def _summary(mode, preds, wall, cpu, exits, rows, reference, backend):
+    summary = {
+        "mode": mode,
+        "agreement": sum(p["category"] == r["category"] and p["priority"] == r["priority"] for p, r in zip(preds, reference)) / len(preds),
+        "category_accuracy": _accuracy(preds, [r["Topic_group"] for r in rows], "category", backend.cat_id2label.values()),
+        "priority_accuracy": _accuracy(preds, [r["Priority"] for r in rows], "priority", backend.pri_id2label.values()),
+        "tickets_per_sec": len(preds) / wall,
+        "cpu_sec_per_1k": cpu / len(preds) * 1000,
+    }
+    for name, counts in exits.items():
+        summary[f"{name}_layers"] = float((counts * np.arange(len(counts))).sum() / counts.sum())
+        summary[f"{name}_exits"] = {str(layer): float(n / counts.sum()) for layer, n in enumerate(counts) if layer and n}
+    return summary
+
+
+def _fmt(value):
+    return "n/a" if value is None else f"{value:.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Early exit vs full models on held-out tickets")
+    parser.add_argument("--samples", type=int, default=2000, help="held-out tickets to score")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write the summary to this file")
+    args = parser.parse_args()
+
+    rows = holdout_rows(calibration=True, limit=args.samples, seed=args.seed)
+    texts = lemmatize_rows(rows)
+    backend = EarlyExitBackend(CATEGORY_MODEL_PATH, PRIORITY_MODEL_PATH, MULTIHEAD_MODEL_PATH)
+    _run(backend, texts[:args.batch_size], args.batch_size, early_exit=True)  # warm-up
+
+    full = _run(backend, texts, args.batch_size, early_exit=False)
+    early = _run(backend, texts, args.batch_size, early_exit=True)
+    reference = full[0]
+    results = [_summary("full", *full, rows, reference, backend), _summary("early exit", *early, rows, reference, backend)]
+    base, new = results
+
+    print(f"\n{len(rows)} held-out tickets, batch size {args.batch_size}\n")
+    print(f"{'mode':<11} {'cat layers':>10} {'pri layers':>10} {'agree':>7} {'cat acc':>8} {'pri acc':>8} {'tickets/s':>10} {'CPU s/1k':>9}")
+    print("-" * 80)
+    for r in results:
+        print(f"{r['mode']:<11} {r['category_layers']:>10.2f} {r['priority_layers']:>10.2f} {r['agreement']:>7.3f} "
+              f"{_fmt(r['category_accuracy']):>8} {_fmt(r['priority_accuracy']):>8} {r['tickets_per_sec']:>10.1f} {r['cpu_sec_per_1k']:>9.2f}")
+    for name in ("category", "priority"):
+        print(f"\n{name} exits: " + ", ".join(f"layer {layer}: {share:.1%}" for layer, share in new[f"{name}_exits"].items()))
+    saved = 1 - new["cpu_sec_per_1k"] / base["cpu_sec_per_1k"]
+    print(f"\nCPU time saved: {saved:.1%} ({base['cpu_sec_per_1k']:.2f} -> {new['cpu_sec_per_1k']:.2f} s per 1k tickets)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"samples": len(rows), "batch_size": args.batch_size, "cpu_time_saved": saved, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
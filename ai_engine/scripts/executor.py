@@ -0,0 +1,77 @@
+"""
+INFERENCE EXECUTION LAYER
+-------------------------
+Runs the blocking pipeline stages (translation, spaCy, KeyBERT, PyTorch) on a
+bounded thread pool so the asyncio event loop stays free for /health and
+other requests. Admission control rejects new work once too many requests
+are pending instead of letting them pile up.
+"""
+
+import asyncio
+import contextlib
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+# ===============================
+# Configuration (env overridable)
+# ===============================
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", "64"))
+# 0 / unset keeps PyTorch's own default
+TORCH_INTRA_OP_THREADS = int(os.getenv("TORCH_INTRA_OP_THREADS", "0"))
+TORCH_INTER_OP_THREADS = int(os.getenv("TORCH_INTER_OP_THREADS", "0"))
+
+
+def configure_torch_threads(intra_op=TORCH_INTRA_OP_THREADS, inter_op=TORCH_INTER_OP_THREADS):
+    if intra_op > 0:
+        torch.set_num_threads(intra_op)
+    if inter_op > 0:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError:
+            # Can only be set once, before any inter-op parallel work has started
+            print("WARNING: torch inter-op threads already initialised; TORCH_INTER_OP_THREADS ignored")
+    return {"intra_op": torch.get_num_threads(), "inter_op": torch.get_num_interop_threads()}
+
+
+class ExecutorSaturated(Exception):
+    def __init__(self, queue_depth, max_pending):
+        super().__init__(f"Inference backlog full ({queue_depth}/{max_pending} pending)")
+        self.queue_depth = queue_depth
+        self.max_pending = max_pending
+
+
+class InferenceExecutor:
+    def __init__(self, workers=INFERENCE_WORKERS, max_pending=INFERENCE_MAX_PENDING):
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        # Only touched from the event loop thread, so no lock is needed
+        self.pending = 0
+
+    @property
+    def queue_depth(self):
+        return self.pending
+
+    @contextlib.asynccontextmanager
+    async def admit(self):
+        if self.pending >= self.max_pending:
+            raise ExecutorSaturated(self.pending, self.max_pending)
+        self.pending += 1
+        try:
+            yield
+        finally:
+            self.pending -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, functools.partial(fn, *args, **kwargs))
+
+    def stats(self):
+        return {"workers": self.workers, "queue_depth": self.pending, "max_pending": self.max_pending}
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,110 @@
+"""
+EXPORT MODELS TO ONNX
+---------------------
+Writes models/onnx/category_model.onnx and priority_model.onnx (or
+multihead_model.onnx when a multi-head checkpoint is in use) for the
+`onnx` backend. With --quantize it also writes dynamically INT8-quantized
+*.int8.onnx copies for the `onnx-int8` backend.
+
+Run from the ai_engine folder:
+    python -m scripts.export_onnx --quantize
+"""
+
+import argparse
+import os
+
+import numpy as np
+import torch
+from torch import nn
+
+from scripts.backends import (
+    CATEGORY_MODEL_PATH, PRIORITY_MODEL_PATH, MULTIHEAD_MODEL_PATH, ONNX_MODEL_DIR,
+    TorchBackend, onnx_file
+)
+
+
+class _LogitsOnly(nn.Module):
+    """Positional-argument wrapper so the exported graph returns plain logits tensors."""
+
+    def __init__(self, model, input_names, multihead=False):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+        self.multihead = multihead
+
+    def forward(self, *args):
+        inputs = dict(zip(self.input_names, args))
+        if self.multihead:
+            logits = self.model(**inputs)
+            return logits["category"], logits["priority"]
+        return self.model(**inputs).logits
+
+
+def export(model, tokenizer, path, output_names, multihead=False, opset=17):
+    sample = tokenizer(["printer not working on second floor", "vpn"], padding=True, return_tensors="pt")
+    input_names = [name for name in tokenizer.model_input_names if name in sample]
+    wrapper = _LogitsOnly(model, input_names, multihead=multihead).eval()
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes.update({name: {0: "batch"} for name in output_names})
+
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper, tuple(sample[name] for name in input_names), path,
+            input_names=input_names, output_names=output_names,
+            dynamic_axes=dynamic_axes, opset_version=opset, dynamo=False
+        )
+    print(f"Exported {path}")
+    return sample, wrapper
+
+
+def check(path, sample, wrapper):
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+    feed = {i.name: sample[i.name].numpy().astype(np.int64) for i in session.get_inputs()}
+    with torch.no_grad():
+        expected = wrapper(*[sample[name] for name in wrapper.input_names])
+    expected = expected if isinstance(expected, tuple) else (expected,)
+    diff = max(float(np.abs(out - ref.numpy()).max()) for out, ref in zip(session.run(None, feed), expected))
+    print(f"  max |logit diff| vs PyTorch: {diff:.2e}")
+
+
+def quantize(path):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    int8_path = path.replace(".onnx", ".int8.onnx")
+    quantize_dynamic(path, int8_path, weight_type=QuantType.QInt8)
+    print(f"Quantized  {int8_path}")
+    return int8_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the classifiers to ONNX")
+    parser.add_argument("--output-dir", default=ONNX_MODEL_DIR)
+    parser.add_argument("--mode", choices=["auto", "multihead", "separate"], default=os.getenv("INFERENCE_MODE", "auto"))
+    parser.add_argument("--quantize", action="store_true", help="also write dynamic INT8 *.int8.onnx files")
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    engine = TorchBackend(CATEGORY_MODEL_PATH, PRIORITY_MODEL_PATH, MULTIHEAD_MODEL_PATH, mode=args.mode)
+
+    if engine.multihead_model is not None:
+        targets = [("multihead_model", engine.multihead_model, engine.category_tokenizer, ["category_logits", "priority_logits"], True)]
+    else:
+        targets = [
+            ("category_model", engine.category_model, engine.category_tokenizer, ["logits"], False),
+            ("priority_model", engine.priority_model, engine.priority_tokenizer, ["logits"], False),
+        ]
+
+    for name, model, tokenizer, output_names, multihead in targets:
+        path = onnx_file(args.output_dir, name)
+        sample, wrapper = export(model, tokenizer, path, output_names, multihead=multihead, opset=args.opset)
+        check(path, sample, wrapper)
+        if args.quantize:
+            check(quantize(path), sample, wrapper)
+
+
+if __name__ == "__main__":
+    main()
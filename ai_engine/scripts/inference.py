@@ -1,18 +1,23 @@
 import re
+import time
 import torch
-import numpy as np
 import os
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from scripts.backends import INFERENCE_BACKEND, load_backend, predict_batch
+from scripts.registry import ModelRegistry
+from scripts.timing import StageTimer
+from scripts.translation import build_translation_service
+from scripts.result_cache import ResultCache
+from scripts.keywords import KEYWORD_EXTRACTOR, RakeExtractor, load_keyword_extractor
+from scripts.cascade import CASCADE_ENABLED, CASCADE_THRESHOLD, FastClassifier, cascade_predict
+from scripts.rules import RuleSet
+from scripts.similarity import SIMILAR_INDEX_DIR, EmbeddingIndex, index_exists
+from scripts.deadline import StageCosts
+from scripts.model_versions import active_version, model_paths
+from scripts.model_manager import ModelManager
 import spacy
-from keybert import KeyBERT
-from langdetect import detect
-from deep_translator import GoogleTranslator
-import nltk
 from spacy.lang.en.stop_words import STOP_WORDS
 from datetime import datetime
 
-nltk.download('punkt')
-
 # ===============================
 # Device & Absolute Paths
 # ===============================
@@ -27,134 +32,298 @@ ROOT_DIR = os.path.abspath(os.path.join(CURRENT_SCRIPT_DIR, ".."))
 # 3. Define model paths starting from the Root
 CATEGORY_MODEL_PATH = os.path.join(ROOT_DIR, "models", "category_model")
 PRIORITY_MODEL_PATH = os.path.join(ROOT_DIR, "models", "priority_model")
+MULTIHEAD_MODEL_PATH = os.path.join(ROOT_DIR, "models", "multihead_model")
+
+# "auto" uses the shared-encoder checkpoint when one exists, otherwise the two separate models
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "auto")
+
+# Only the tagger/attribute_ruler/lemmatizer path is used; the parser and NER are never loaded
+SPACY_EXCLUDE = ["parser", "ner"]
+
+# Sentence-transformer used by KEYWORD_EXTRACTOR=keybert; point at a local folder to run fully offline
+KEYBERT_MODEL = os.getenv("KEYBERT_MODEL", "all-MiniLM-L6-v2")
 
 # ===============================
-# Load Transformer Models
+# Model Registry (lazy loading)
 # ===============================
+# Nothing heavy is loaded at import time. Components load on first use, or all
+# at once in parallel through registry.load_all() / registry.start_background_load().
+registry = ModelRegistry()
 # Loading using absolute paths to prevent "Repository Not Found" errors
-category_tokenizer = AutoTokenizer.from_pretrained(CATEGORY_MODEL_PATH)
-category_model = AutoModelForSequenceClassification.from_pretrained(CATEGORY_MODEL_PATH).to(device)
-category_model.eval()
-cat_id2label = category_model.config.id2label
-
-priority_tokenizer = AutoTokenizer.from_pretrained(PRIORITY_MODEL_PATH)
-priority_model = AutoModelForSequenceClassification.from_pretrained(PRIORITY_MODEL_PATH).to(device)
-priority_model.eval()
-pri_id2label = priority_model.config.id2label
+def load_model_version(version=None):
+    """Inference backend over a published model version (None: the unversioned models/ folders)."""
+    paths = model_paths(version)
+    return load_backend(INFERENCE_BACKEND, paths["category"], paths["priority"], paths["multihead"], mode=INFERENCE_MODE,
+                        device=device, onnx_dir=paths["onnx"], exit_dir=paths["early_exit"])
 
+# models/versions/active.json when a version has been activated (see scripts/model_versions.py)
+ACTIVE_MODEL_VERSION = active_version()
+registry.register("backend", lambda: load_model_version(ACTIVE_MODEL_VERSION))
 # NLP Models for Preprocessing
-nlp = spacy.load("en_core_web_sm")
-kw_model = KeyBERT()
+registry.register("nlp", lambda: spacy.load("en_core_web_sm", exclude=SPACY_EXCLUDE))
+# Auto-title extractor (KEYWORD_EXTRACTOR=keybert|tfidf|rake); only keybert loads a second transformer
+registry.register("keywords", lambda: load_keyword_extractor(KEYWORD_EXTRACTOR, KEYBERT_MODEL))
+
+def _load_fast_model():
+    fast = FastClassifier()
+    backend = registry.get("backend")
+    for head, id2label in (("category", backend.cat_id2label), ("priority", backend.pri_id2label)):
+        unknown = fast.labels[head] - set(id2label.values())
+        if unknown:
+            print(f"WARNING: fast model {head} labels {sorted(unknown)} are unknown to the transformer; "
+                  f"retrain with `python -m scripts.cascade --train --teacher`")
+    return fast
+
+# Cascade tier (CASCADE=1): TF-IDF + LinearSVC first, transformer only below CASCADE_THRESHOLD
+if CASCADE_ENABLED:
+    registry.register("fast_model", _load_fast_model)
+
+# Similar-ticket search (/similar) once an index has been built with `python -m scripts.similarity --build`
+if index_exists(SIMILAR_INDEX_DIR):
+    registry.register("similar_index", lambda: EmbeddingIndex(SIMILAR_INDEX_DIR))
+
+_LAZY_ATTRIBUTES = {
+    "backend": lambda: registry.get("backend"),
+    "nlp": lambda: registry.get("nlp"),
+    "kw_model": lambda: getattr(registry.get("keywords"), "model", None),
+    "category_tokenizer": lambda: registry.get("backend").category_tokenizer,
+    "priority_tokenizer": lambda: registry.get("backend").priority_tokenizer,
+    "cat_id2label": lambda: registry.get("backend").cat_id2label,
+    "pri_id2label": lambda: registry.get("backend").pri_id2label,
+}
+
+def __getattr__(name):
+    # Keeps `inference.nlp`, `inference.category_tokenizer`, ... working for callers
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ===============================
 # Preprocessing Logic
 # ===============================
+# Cached, pluggable translation (TRANSLATION_BACKEND=google|offline|stub)
+translator = build_translation_service()
+
 def translate_to_english(text):
-    try:
-        lang = detect(text)
-        if lang != "en":
-            translated = GoogleTranslator(source=lang, target='en').translate(text)
-            return translated if translated else text
-        return text
-    except:
-        return text
+    return translator.translate(text)
 
 def clean_text(text):
     text = text.lower()
     text = re.sub(r"[^a-zA-Z0-9\s\?\.!]", "", text)
     return " ".join(text.split())
 
+# ===============================
+# Single-pass Doc Analysis
+# ===============================
+# Lemmas and keyword candidates come from one parse of the cleaned text
+# (see SPACY_EXCLUDE for the components that are skipped).
+CONTENT_POS = {"NOUN", "PROPN", "VERB", "ADJ"}
+
+def analyze_doc(doc):
+    lemmas = []
+    # Runs of consecutive content lemmas, split at any other token (RAKE phrases)
+    phrases = [[]]
+    for token in doc:
+        lemma = token.lemma_.lower()
+        if token.pos_ in CONTENT_POS and lemma not in STOP_WORDS:
+            lemmas.append(lemma)
+            phrases[-1].append(lemma)
+        elif phrases[-1]:
+            phrases.append([])
+
+    # Same unigram/bigram candidates KeyBERT's CountVectorizer would build from the lemmas
+    candidates = list(dict.fromkeys(lemmas + [f"{a} {b}" for a, b in zip(lemmas, lemmas[1:])]))
+    return {"processed": " ".join(lemmas), "candidates": candidates, "phrases": [p for p in phrases if p]}
+
 def lemmatize_and_clean_text(text):
-    doc = nlp(text)
-    tokens = [token.lemma_.lower() for token in doc 
-              if token.pos_ in ["NOUN", "PROPN", "VERB", "ADJ"] 
-              and token.lemma_.lower() not in STOP_WORDS]
-    return " ".join(tokens)
+    return analyze_doc(registry.get("nlp")(text))["processed"]
 
 # ===============================
-# Entity Extraction for JSON
+# Entity Extraction & Rules for JSON
 # ===============================
+# Gazetteers, entity regexes and escalation rules from config/rules.json,
+# compiled once and reloaded when the file changes (see scripts/rules.py)
+rules = RuleSet()
+
+def scan_ticket(text, entities=True):
+    # Runs on the translated text because cleaning strips '@', '_' and case
+    return rules.current().scan(text, entities=entities)
+
 def extract_entities(text):
-    doc = nlp(text)
-    entities = {"devices": [], "usernames": [], "error_codes": []}
-    
-    # Simple keyword-based device extraction
-    device_list = ["laptop", "mouse", "printer", "keyboard", "monitor", "server", "wifi"]
-    for token in doc:
-        if token.text.lower() in device_list:
-            entities["devices"].append(token.text.lower())
-    
-    # Regex for usernames (@name) and Error Codes (0x... or ERR_...)
-    entities["usernames"] = list(set(re.findall(r"@[a-zA-Z0-9_]+", text)))
-    entities["error_codes"] = list(set(re.findall(r"\b(?:0x[0-9A-F]+|ERR_[0-9]+|[A-Z]+-[0-9]+)\b", text)))
-    
-    entities["devices"] = list(set(entities["devices"]))
-    return entities
+    return scan_ticket(text)[0]
 
-def preprocess_text(title=None, description=None):
-    text = f"{title} {description}" if title and description else (title or description or "")
-    translated = translate_to_english(text)
-    cleaned = clean_text(translated)
-    processed = lemmatize_and_clean_text(cleaned)
-    
-    keywords = ""
-    try:
-        kw = kw_model.extract_keywords(processed, keyphrase_ngram_range=(1,2), stop_words='english', top_n=3)
-        keywords = " ".join([k[0] for k in kw])
-    except: pass
-    
-    return translated, processed, keywords
+# ===============================
+# Keyword Extraction (auto-title)
+# ===============================
+# Keywords only become the title when the ticket has none, so titled tickets skip this stage
+def _has_title(title):
+    return bool(title and title.strip())
+
+def extract_keywords(analysis):
+    return registry.get("keywords").extract(analysis)
+
+def _extract_keywords_batch(analyses):
+    return registry.get("keywords").extract_batch(analyses)
 
 # ===============================
-# Prediction & Minimal Rules
+# Latency Budgets (see scripts/deadline.py)
 # ===============================
-def model_predict(text):
-    inputs = category_tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=256).to(device)
-    with torch.no_grad():
-        cat_logits = category_model(**inputs).logits
-        pri_logits = priority_model(**inputs).logits
-        cat_probs = torch.softmax(cat_logits, dim=1).cpu().numpy()[0]
-        pri_probs = torch.softmax(pri_logits, dim=1).cpu().numpy()[0]
+# Per-ticket stage cost estimates for single tickets and for /classify/batch;
+# translation is estimated from the backend's own call times
+stage_costs = StageCosts(sources={"translate": translator.mean_call_ms})
+batch_stage_costs = StageCosts(sources={"translate": translator.mean_call_ms})
+# Only KeyBERT is worth skipping; RAKE on the existing parse stands in for it
+KEYWORDS_OPTIONAL = KEYWORD_EXTRACTOR == "keybert"
+fallback_keywords = RakeExtractor()
 
-    cat_id = int(np.argmax(cat_probs))
-    pri_id = int(np.argmax(pri_probs))
+def _translate_within(texts, deadline):
+    """Translations of `texts` and the indices left untranslated because the budget ran out.
+    Cached / ASCII text is always used; backend calls only happen if they fit."""
+    if deadline is None:
+        return [translate_to_english(text) for text in texts], set()
+    translated = [translator.cached(text) for text in texts]
+    misses = [i for i, text in enumerate(translated) if text is None]
+    allowed = not misses or deadline.allows("translate", count=len(misses))
+    for i in misses:
+        translated[i] = translate_to_english(texts[i]) if allowed else texts[i]
+    if allowed:
+        return translated, set()
+    deadline.skip("translate")
+    return translated, set(misses)
 
-    return {
-        "category": cat_id2label[cat_id],
-        "category_confidence": float(cat_probs[cat_id]),
-        "priority": pri_id2label[pri_id],
-        "priority_confidence": float(pri_probs[pri_id])
-    }
+def _keywords_within(analyses, deadline):
+    """Auto-title keywords, (keywords, downgraded) with RAKE standing in when KeyBERT doesn't fit."""
+    if deadline is None or not KEYWORDS_OPTIONAL or deadline.allows("keywords", count=len(analyses)):
+        return [extract_keywords(analyses[0])] if len(analyses) == 1 else _extract_keywords_batch(analyses), False
+    deadline.skip("keywords")
+    return fallback_keywords.extract_batch(analyses), True
+
+def _entities_within(deadline, count=1):
+    if deadline is None or deadline.allows("entities", count=count):
+        return True
+    deadline.skip("entities")
+    return False
 
-def apply_minimal_rules(text, pred, threshold=0.4):
-    text_lower = text.lower().strip()
-    if not text_lower or len(text_lower) < 5:
-        return "Needs Manual Review", "Low", 1.0
+# ===============================
+# Staged Preprocessing
+# ===============================
+def _ticket_text(title, description):
+    return f"{title} {description}" if title and description else (title or description or "")
+
+def prepare_ticket(title=None, description=None, timer=None, deadline=None):
+    """Run everything before the transformer call; the result feeds finalize_ticket.
+    Per-stage wall time (ms) is recorded under "timings". With a `deadline`, optional
+    stages that no longer fit its budget are skipped and listed under "skipped"."""
+    timer = timer or StageTimer()
+    with timer.stage("translate"):
+        (translated,), _ = _translate_within([_ticket_text(title, description)], deadline)
+    with timer.stage("clean"):
+        cleaned = clean_text(translated)
+    with timer.stage("spacy"):
+        doc = registry.get("nlp")(cleaned)
+    with timer.stage("analyze"):
+        analysis = analyze_doc(doc)
+    keywords = ""
+    if not _has_title(title):
+        with timer.stage("keywords"):
+            (keywords,), _ = _keywords_within([analysis], deadline)
+    with timer.stage("entities"):
+        entities, escalations = scan_ticket(translated, entities=_entities_within(deadline))
 
-    final_cat = pred["category"]
-    final_pri = pred["priority"]
-    
-    critical_keywords = r"server down|production down|security breach|ransomware|data loss|critical error"
-    if re.search(critical_keywords, text_lower):
-        final_pri = "Critical"
+    return {"title": title, "translated": translated, "processed": analysis["processed"],
+            "keywords": keywords, "entities": entities, "escalations": escalations, "timings": timer.timings,
+            "skipped": list(deadline.skipped) if deadline else []}
 
-    if pred["category_confidence"] < threshold:
-        final_cat = "Needs Manual Review"
-        
-    return final_cat, final_pri
+def prepare_tickets_batch(tickets, batch_size=64, timer=None, deadline=None):
+    """prepare_ticket for many (title, description) pairs, parsing them with one nlp.pipe call.
+    `timer` collects whole-batch stage totals; `deadline` covers the whole batch."""
+    timer = timer or StageTimer()
+    with timer.stage("translate"):
+        translated, untranslated = _translate_within([_ticket_text(t, d) for t, d in tickets], deadline)
+    with timer.stage("clean"):
+        cleaned = [clean_text(text) for text in translated]
+    with timer.stage("spacy"):
+        docs = list(registry.get("nlp").pipe(cleaned, batch_size=batch_size))
+    with timer.stage("analyze"):
+        analyses = [analyze_doc(doc) for doc in docs]
+    keywords = [""] * len(analyses)
+    untitled = [i for i, (title, _) in enumerate(tickets) if not _has_title(title)]
+    downgraded = False
+    if untitled:
+        with timer.stage("keywords"):
+            extracted, downgraded = _keywords_within([analyses[i] for i in untitled], deadline)
+            for i, kw in zip(untitled, extracted):
+                keywords[i] = kw
+    with timer.stage("entities"):
+        with_entities = _entities_within(deadline, count=len(translated))
+        engine = rules.current()
+        scans = [engine.scan(text, entities=with_entities) for text in translated]
+
+    def skipped(i):
+        return ((["translate"] if i in untranslated else []) + (["keywords"] if downgraded and i in untitled else [])
+                + ([] if with_entities else ["entities"]))
+
+    return [
+        {"title": title, "translated": trans, "processed": a["processed"], "keywords": kw,
+         "entities": ents, "escalations": escalations, "skipped": skipped(i)}
+        for i, ((title, _), trans, a, kw, (ents, escalations)) in enumerate(zip(tickets, translated, analyses, keywords, scans))
+    ]
+
+def processed_texts(tickets, batch_size=64):
+    """Only the lemmatised model input for many (title, description) pairs (no keywords or entities)."""
+    cleaned = [clean_text(translate_to_english(_ticket_text(t, d))) for t, d in tickets]
+    return [analyze_doc(doc)["processed"] for doc in registry.get("nlp").pipe(cleaned, batch_size=batch_size)]
+
+def preprocess_text(title=None, description=None):
+    prepared = prepare_ticket(title, description)
+    return prepared["translated"], prepared["processed"], prepared["keywords"]
 
 # ===============================
-# FINAL PIPELINE (Updated for JSON)
+# Prediction & Minimal Rules
 # ===============================
-def predict_ticket_final(title=None, description=None):
-    translated_text, processed, keywords = preprocess_text(title, description)
-    raw_pred = model_predict(processed)
-    final_cat, final_pri = apply_minimal_rules(processed, raw_pred)
+def transformer_predict_batch(texts, batch_size=32):
+    return predict_batch(registry.get("backend"), texts, batch_size=batch_size)
 
-    # Fetch entities from translated text
-    entities = extract_entities(translated_text)
+def model_predict_batch(texts, batch_size=32):
+    if CASCADE_ENABLED:
+        preds = cascade_predict(registry.get("fast_model"), texts,
+                                lambda doubtful: transformer_predict_batch(doubtful, batch_size=batch_size),
+                                threshold=CASCADE_THRESHOLD)
+    else:
+        preds = transformer_predict_batch(texts, batch_size=batch_size)
+    # A candidate model being shadow-scored gets a sample of live traffic, scored off this thread
+    shadow = model_manager.shadow
+    if shadow is not None:
+        shadow.offer(texts)
+    return preds
+
+def model_predict(text):
+    return model_predict_batch([text])[0]
 
-    auto_title = title if title and title.strip() else keywords.title() or "New Support Ticket"
+def apply_minimal_rules(text, pred, threshold=None, escalations=None):
+    """(category, priority) after the manual-review and escalation rules. `escalations` are
+    rule names from scan_ticket(); without them `text` itself is scanned."""
+    return rules.current().apply(text, pred, escalations=escalations, threshold=threshold)
+
+# ===============================
+# FINAL PIPELINE (Updated for JSON)
+# ===============================
+def finalize_ticket(prepared, raw_pred, entities=None):
+    """Apply rules, entities and the auto-title to a raw model_predict result."""
+    start = time.perf_counter()
+    # Entities and escalation matches come from the translated text
+    escalations = prepared.get("escalations")
+    if entities is None:
+        entities = prepared.get("entities")
+    if entities is None or escalations is None:
+        scanned_entities, escalations = scan_ticket(prepared["translated"])
+        entities = entities if entities is not None else scanned_entities
+    final_cat, final_pri = apply_minimal_rules(prepared["processed"], raw_pred, escalations=escalations)
+
+    title = prepared["title"]
+    auto_title = title if _has_title(title) else prepared["keywords"].title() or "New Support Ticket"
+    if "timings" in prepared:
+        prepared["timings"]["rules"] = round((time.perf_counter() - start) * 1000, 3)
 
     # Strict JSON Format Return
     return {
@@ -165,5 +334,90 @@ def predict_ticket_final(title=None, description=None):
         "status": "open",
         "created_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
         "category_confidence": round(raw_pred["category_confidence"], 3),
-        "priority_confidence": round(raw_pred["priority_confidence"], 3)
-    }
\ No newline at end of file
+        "priority_confidence": round(raw_pred["priority_confidence"], 3),
+        # Which model answered: "fast" (cascade short-circuit) or "transformer"
+        "tier": raw_pred.get("tier", "transformer"),
+        # Optional stages dropped to meet the latency budget / under overload
+        "skipped_stages": prepared.get("skipped", [])
+    }
+
+def predict_ticket_final(title=None, description=None, timer=None, deadline=None):
+    timer = timer or StageTimer()
+    prepared = prepare_ticket(title, description, timer=timer, deadline=deadline)
+    with timer.stage("model"):
+        raw_pred = model_predict(prepared["processed"])
+    return finalize_ticket(prepared, raw_pred)
+
+# ===============================
+# BATCH PIPELINE
+# ===============================
+def predict_tickets_batch(tickets, batch_size=32, timer=None, deadline=None):
+    """Classify many tickets at once; returns one predict_ticket_final-shaped dict per input, in order.
+    `timer` collects whole-batch stage totals."""
+    timer = timer or StageTimer()
+    prepared = prepare_tickets_batch([(t.get("title"), t.get("description")) for t in tickets], timer=timer, deadline=deadline)
+    with timer.stage("model"):
+        raw_preds = model_predict_batch([p["processed"] for p in prepared], batch_size=batch_size)
+    with timer.stage("rules"):
+        return [finalize_ticket(p, raw_pred) for p, raw_pred in zip(prepared, raw_preds)]
+
+# ===============================
+# SIMILAR TICKETS
+# ===============================
+def similar_tickets(title=None, description=None, k=5, timer=None):
+    """Nearest indexed tickets for one ticket; `duplicate` marks near-identical ones."""
+    timer = timer or StageTimer()
+    with timer.stage("preprocess"):
+        processed = processed_texts([(title, description)])[0]
+    results, timings = registry.get("similar_index").search(processed, k=k)
+    for stage, ms in timings.items():
+        timer.add(stage, ms)
+    return results
+
+# ===============================
+# RESULT CACHE
+# ===============================
+def model_version():
+    # None until the backend is loaded, which simply disables cache lookups
+    if not registry.is_loaded("backend"):
+        return None
+    version = registry.get("backend").version
+    if CASCADE_ENABLED:
+        if not registry.is_loaded("fast_model"):
+            return None
+        version += f"+{registry.get('fast_model').version}@{CASCADE_THRESHOLD}"
+    # Rule edits change outputs too
+    return f"{version}+rules-{rules.current().version}"
+
+# Duplicate tickets skip the pipeline (RESULT_CACHE_SIZE / RESULT_CACHE_TTL / RESULT_CACHE_PATH)
+result_cache = ResultCache(model_version, clean_text)
+
+# ===============================
+# WARM-UP
+# ===============================
+WARMUP_TICKETS = [
+    {"title": "Printer not working", "description": "The office printer shows a paper jam error"},
+    {"title": "", "description": "Cannot log in to my laptop after the password reset"},
+    {"title": "Server down", "description": "Production server down since morning, critical error in the logs"},
+]
+
+def warmup(rounds=2):
+    """Run a few dummy tickets (English, so no translation call) through both paths so the
+    first real request does not pay first-call allocation and kernel selection costs."""
+    for _ in range(rounds):
+        predict_tickets_batch(WARMUP_TICKETS)
+        for ticket in WARMUP_TICKETS:
+            predict_ticket_final(ticket["title"], ticket["description"])
+
+def warmup_backend(backend, rounds=2):
+    """warmup() for a backend that is not serving yet (a model version being deployed)."""
+    texts = processed_texts([(t["title"], t["description"]) for t in WARMUP_TICKETS])
+    for _ in range(rounds):
+        predict_batch(backend, texts)
+        for text in texts:
+            predict_batch(backend, [text])
+
+# ===============================
+# MODEL VERSIONS (hot swap / shadow scoring)
+# ===============================
+model_manager = ModelManager(registry, load_model_version, warmup_backend, version=ACTIVE_MODEL_VERSION)
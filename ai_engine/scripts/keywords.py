@@ -0,0 +1,173 @@
+"""
+KEYWORD EXTRACTORS (auto-title)
+-------------------------------
+Pick with KEYWORD_EXTRACTOR:
+
+    keybert  sentence-transformer similarity (previous behaviour; loads a second transformer)
+    tfidf    candidates scored by term frequency x IDF precomputed from dataset.zip
+    rake     RAKE-style degree/frequency scoring of content-word phrases, no statistics needed
+
+Every extractor takes the dict produced by `inference.analyze_doc` (lemmas,
+unigram/bigram candidates and content-word phrases) and returns up to three
+keyphrases joined by spaces.
+
+Build the IDF table used by `tfidf` (written to models/keyword_idf.json):
+    python -m scripts.keywords --build-idf
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+from collections import Counter
+
+KEYWORD_EXTRACTOR = os.getenv("KEYWORD_EXTRACTOR", "keybert")
+KEYWORD_TOP_N = 3
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+KEYWORD_IDF_PATH = os.getenv("KEYWORD_IDF_PATH", os.path.join(ROOT_DIR, "models", "keyword_idf.json"))
+
+
+def _top_distinct(ranked, top_n=KEYWORD_TOP_N):
+    # Skip phrases sharing a word with one already chosen ("mailbox", "mailbox full", ...)
+    chosen, seen = [], set()
+    for phrase in ranked:
+        words = set(phrase.split())
+        if words & seen:
+            continue
+        chosen.append(phrase)
+        seen |= words
+        if len(chosen) == top_n:
+            break
+    return " ".join(chosen)
+
+
+class KeyBERTExtractor:
+    name = "keybert"
+
+    def __init__(self, model_name):
+        from keybert import KeyBERT
+        self.model = KeyBERT(model_name)
+
+    def _run(self, docs, candidates):
+        return self.model.extract_keywords(docs, candidates=candidates or None,
+                                           keyphrase_ngram_range=(1,2), stop_words='english', top_n=KEYWORD_TOP_N)
+
+    def extract(self, analysis):
+        try:
+            return " ".join([k[0] for k in self._run(analysis["processed"], analysis["candidates"])])
+        except:
+            return ""
+
+    def extract_batch(self, analyses):
+        # KeyBERT embeds a list of documents in one call but unwraps single-item results
+        if not analyses:
+            return []
+        union = list(dict.fromkeys(c for a in analyses for c in a["candidates"]))
+        try:
+            kw = self._run([a["processed"] for a in analyses], union)
+            if len(analyses) == 1:
+                kw = [kw]
+            return [" ".join([k[0] for k in doc_kw]) for doc_kw in kw]
+        except:
+            return [self.extract(a) for a in analyses]
+
+
+class TfidfExtractor:
+    name = "tfidf"
+
+    def __init__(self, idf_path=KEYWORD_IDF_PATH):
+        if not os.path.exists(idf_path):
+            raise FileNotFoundError(f"{idf_path} not found; build it with `python -m scripts.keywords --build-idf`")
+        with open(idf_path) as f:
+            stats = json.load(f)
+        n_docs = stats["n_docs"]
+        # Smoothed IDF as in scikit-learn; unseen terms are treated as seen once
+        self.idf = {term: math.log((1 + n_docs) / (1 + df)) + 1 for term, df in stats["df"].items()}
+        self.default_idf = math.log((1 + n_docs) / 2) + 1
+
+    def extract(self, analysis):
+        lemmas = analysis["processed"].split()
+        tf = Counter(lemmas + [f"{a} {b}" for a, b in zip(lemmas, lemmas[1:])])
+        scored = sorted(analysis["candidates"], key=lambda c: -tf[c] * self.idf.get(c, self.default_idf))
+        return _top_distinct(scored)
+
+    def extract_batch(self, analyses):
+        return [self.extract(a) for a in analyses]
+
+
+class RakeExtractor:
+    name = "rake"
+    # Long runs are cut into chunks, matching KeyBERT's (1, 2) n-gram range
+    max_words = 2
+
+    def extract(self, analysis):
+        phrases = [p[i:i + self.max_words] for p in analysis["phrases"] for i in range(0, len(p), self.max_words)]
+        freq, degree = Counter(), Counter()
+        for phrase in phrases:
+            for word in phrase:
+                freq[word] += 1
+                degree[word] += len(phrase)
+        scores = {}
+        for phrase in phrases:
+            key = " ".join(phrase)
+            scores[key] = max(scores.get(key, 0.0), sum(degree[w] / freq[w] for w in phrase))
+        ranked = sorted(scores, key=lambda k: -scores[k])
+        return _top_distinct(ranked)
+
+    def extract_batch(self, analyses):
+        return [self.extract(a) for a in analyses]
+
+
+def load_keyword_extractor(name, keybert_model=None):
+    if name == "keybert":
+        return KeyBERTExtractor(keybert_model)
+    if name == "tfidf":
+        return TfidfExtractor()
+    if name == "rake":
+        return RakeExtractor()
+    raise ValueError(f"Unknown keyword extractor '{name}' (expected keybert, tfidf or rake)")
+
+
+# ===============================
+# IDF statistics
+# ===============================
+def build_idf(output=KEYWORD_IDF_PATH, min_df=2, limit=None):
+    """Document frequencies of lemma unigrams/bigrams over dataset.zip, produced by the same
+    spaCy analysis the pipeline uses so the terms match the runtime candidates."""
+    from scripts.dataset import iter_dataset_rows
+    from scripts.inference import registry, analyze_doc
+
+    nlp = registry.get("nlp")
+    df = Counter()
+    n_docs = 0
+    # islice stops reading the dataset at the limit instead of filtering to its end
+    texts = (row["clean_text"] for row in itertools.islice(iter_dataset_rows(), limit))
+    for doc in nlp.pipe(texts, batch_size=256):
+        df.update(set(analyze_doc(doc)["candidates"]))
+        n_docs += 1
+
+    stats = {"n_docs": n_docs, "min_df": min_df, "df": {t: c for t, c in df.items() if c >= min_df}}
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(stats, f)
+    print(f"Wrote {len(stats['df'])} terms from {n_docs} tickets to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword extractor utilities")
+    parser.add_argument("--build-idf", action="store_true", help="compute IDF statistics from dataset.zip")
+    parser.add_argument("--output", default=KEYWORD_IDF_PATH)
+    parser.add_argument("--min-df", type=int, default=2)
+    parser.add_argument("--limit", type=int, help="only use the first N tickets")
+    args = parser.parse_args()
+
+    if args.build_idf:
+        build_idf(args.output, min_df=args.min_df, limit=args.limit)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+MODEL HOT-SWAP & SHADOW SCORING
+-------------------------------
+Deploys a version from the model store (scripts/model_versions.py) into a
+running server. The candidate loads and warms up on a background thread while
+the current model keeps serving, then replaces it in the model registry in a
+single step. Requests that already fetched the old backend finish on it;
+every later batch uses the new one. The result cache is keyed on the model
+version, so it stops returning the old model's answers on its own.
+
+In shadow mode the candidate is not swapped in. A sample (SHADOW_SAMPLE_RATE)
+of the texts the live model classifies is queued and scored on a separate
+thread by both the incumbent and the candidate, off the request path. The
+report covers agreement per head, the most common disagreements and the
+per-ticket latency of each model. The queue is bounded, so shadowing never
+holds up live traffic: samples are dropped when it is full. promote() then
+swaps the candidate in without loading it again.
+
+Every worker follows the active-version pointer: when another process
+activates a version (a deploy handled by a sibling worker, or
+`python -m scripts.model_versions --activate`), each server deploys it itself
+within MODEL_SYNC_INTERVAL seconds. Shadow scoring runs in the worker that
+received the request, and its report covers only that process.
+"""
+
+import gc
+import os
+import queue
+import random
+import threading
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+from scripts.backends import predict_batch
+from scripts.model_versions import MODEL_VERSIONS_DIR, active_version, set_active, version_exists
+
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", "1000"))
+SHADOW_BATCH_SIZE = 32
+# Per-ticket latencies kept for the shadow report's percentiles
+SHADOW_LATENCY_WINDOW = 10000
+# Seconds between checks of the active-version pointer (0 disables)
+MODEL_SYNC_INTERVAL = float(os.getenv("MODEL_SYNC_INTERVAL", "5"))
+
+IDLE, LOADING, WARMING, SHADOWING, FAILED = "idle", "loading", "warming", "shadowing", "failed"
+HEADS = ("category", "priority")
+
+
+def _latency_summary(values):
+    if not values:
+        return None
+    values = np.asarray(values)
+    return {"mean_ms": round(float(values.mean()), 3), "p50_ms": round(float(np.percentile(values, 50)), 3),
+            "p95_ms": round(float(np.percentile(values, 95)), 3)}
+
+
+class ShadowScorer:
+    def __init__(self, incumbent_fn, candidate, version, sample_rate=SHADOW_SAMPLE_RATE,
+                 queue_size=SHADOW_QUEUE_SIZE, batch_size=SHADOW_BATCH_SIZE):
+        self.incumbent_fn = incumbent_fn
+        self.candidate = candidate
+        self.version = version
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.load_seconds = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.offered = self.sampled = self.dropped = self.scored = self.errors = 0
+        self.agreements = Counter()
+        self.disagreements = Counter()
+        self.latencies = {"incumbent": deque(maxlen=SHADOW_LATENCY_WINDOW), "candidate": deque(maxlen=SHADOW_LATENCY_WINDOW)}
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    def offer(self, texts):
+        """Queue a sample of texts the live model just classified; never blocks."""
+        sampled = [text for text in texts if random.random() < self.sample_rate]
+        dropped = 0
+        for text in sampled:
+            try:
+                self._queue.put_nowait(text)
+            except queue.Full:
+                dropped += 1
+        with self._lock:
+            self.offered += len(texts)
+            self.sampled += len(sampled) - dropped
+            self.dropped += dropped
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                texts = [self._queue.get(timeout=0.2)]
+            except queue.Empty:
+                continue
+            while len(texts) < self.batch_size:
+                try:
+                    texts.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._score(texts)
+
+    def _score(self, texts):
+        try:
+            start = time.perf_counter()
+            base = predict_batch(self.incumbent_fn(), texts, batch_size=len(texts))
+            middle = time.perf_counter()
+            new = predict_batch(self.candidate, texts, batch_size=len(texts))
+            end = time.perf_counter()
+        except Exception as e:
+            print(f"WARNING: shadow scoring failed: {e}")
+            with self._lock:
+                self.errors += len(texts)
+            return
+        with self._lock:
+            self.scored += len(texts)
+            self.latencies["incumbent"].append((middle - start) * 1000 / len(texts))
+            self.latencies["candidate"].append((end - middle) * 1000 / len(texts))
+            for old, cand in zip(base, new):
+                same = {head: old[head] == cand[head] for head in HEADS}
+                for head in HEADS:
+                    if same[head]:
+                        self.agreements[head] += 1
+                    else:
+                        self.disagreements[(head, old[head], cand[head])] += 1
+                self.agreements["both"] += all(same.values())
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def report(self):
+        with self._lock:
+            n = self.scored
+            incumbent, candidate = (_latency_summary(list(self.latencies[k])) for k in ("incumbent", "candidate"))
+            return {
+                "candidate": self.version,
+                "sample_rate": self.sample_rate,
+                "running_seconds": round(time.time() - self.started, 1),
+                "offered": self.offered, "sampled": self.sampled, "dropped": self.dropped,
+                "queued": self._queue.qsize(), "scored": n, "errors": self.errors,
+                "agreement": {key: round(self.agreements[key] / n, 4) if n else None for key in (*HEADS, "both")},
+                "latency_per_ticket": {"incumbent": incumbent, "candidate": candidate},
+                "candidate_latency_ratio": round(candidate["mean_ms"] / incumbent["mean_ms"], 3) if n and incumbent["mean_ms"] else None,
+                "top_disagreements": [{"head": head, "incumbent": old, "candidate": new, "count": count}
+                                      for (head, old, new), count in self.disagreements.most_common(10)],
+            }
+
+
+class ModelManager:
+    """Deploys model versions into `registry[component]`; see the module docstring."""
+
+    def __init__(self, registry, load_fn, warmup_fn, version=None, component="backend", root=MODEL_VERSIONS_DIR):
+        self.registry = registry
+        self.load_fn = load_fn
+        self.warmup_fn = warmup_fn
+        self.component = component
+        self.root = root
+        self.active = version
+        self.state = IDLE
+        self.target = None
+        self.error = None
+        self.shadow = None
+        self.history = []
+        self._lock = threading.Lock()
+        self._watch_stop = threading.Event()
+        self._watcher = None
+
+    def deploy(self, version, shadow=False, sample_rate=SHADOW_SAMPLE_RATE, persist=True):
+        """Start loading `version` in the background. It is swapped in once warm (and made the
+        active version if `persist`), or shadow-scored first with shadow=True."""
+        if not version_exists(version, self.root):
+            raise ValueError(f"Unknown model version '{version}'")
+        with self._lock:
+            if self.state in (LOADING, WARMING):
+                raise RuntimeError(f"Already deploying '{self.target}'")
+            self.state, self.target, self.error = LOADING, version, None
+            # A direct deploy supersedes a shadow candidate (a shadow deploy replaces it once warm)
+            replaced = None
+            if not shadow:
+                replaced, self.shadow = self.shadow, None
+        if replaced is not None:
+            replaced.stop()
+        threading.Thread(target=self._deploy, args=(version, shadow, sample_rate, persist),
+                         name="model-deploy", daemon=True).start()
+        return self.stats()
+
+    def _deploy(self, version, shadow, sample_rate, persist):
+        start = time.perf_counter()
+        try:
+            candidate = self.load_fn(version)
+            load_seconds = round(time.perf_counter() - start, 3)
+            with self._lock:
+                self.state = WARMING
+            self.warmup_fn(candidate)
+        except Exception as e:
+            print(f"WARNING: deploying model version '{version}' failed: {e}")
+            with self._lock:
+                # A shadow candidate still running from before keeps being scored
+                self.state, self.error = (SHADOWING if self.shadow else FAILED), str(e)
+            return
+        if shadow:
+            scorer = ShadowScorer(lambda: self.registry.get(self.component), candidate, version, sample_rate)
+            scorer.load_seconds = load_seconds
+            with self._lock:
+                replaced, self.shadow, self.state = self.shadow, scorer, SHADOWING
+            if replaced is not None:
+                replaced.stop()
+            print(f"Shadow scoring model version '{version}' on {sample_rate:.0%} of traffic")
+        else:
+            self._swap(version, candidate, load_seconds, persist)
+
+    def _swap(self, version, candidate, load_seconds, persist):
+        self.registry.replace(self.component, candidate, loader=lambda: self.load_fn(version), load_seconds=load_seconds)
+        previous, self.active = self.active, version
+        if persist:
+            set_active(version, self.root)
+        self.history.append({"version": version, "previous": previous, "load_seconds": load_seconds,
+                             "swapped_at": time.strftime("%Y-%m-%dT%H:%M:%S")})
+        with self._lock:
+            self.state, self.target = IDLE, None
+        print(f"Model version {previous or 'unversioned'} -> {version}")
+        # Free the old weights once the requests still holding them are done
+        gc.collect()
+
+    def promote(self):
+        """Swap the shadow candidate in; returns the final shadow report."""
+        with self._lock:
+            shadow = self.shadow
+            if self.state != SHADOWING or shadow is None:
+                raise RuntimeError("No shadow candidate to promote")
+            self.state, self.shadow = LOADING, None
+        shadow.stop()
+        self._swap(shadow.version, shadow.candidate, shadow.load_seconds, persist=True)
+        return shadow.report()
+
+    def stop_shadow(self):
+        """Stop shadow scoring and drop the candidate; returns its final report (or None)."""
+        with self._lock:
+            shadow, self.shadow = self.shadow, None
+            if self.state == SHADOWING:
+                self.state, self.target = IDLE, None
+        if shadow is None:
+            return None
+        shadow.stop()
+        return shadow.report()
+
+    def sync(self):
+        """Deploy the active version if another process changed the pointer."""
+        version = active_version(self.root)
+        if version is None or version == self.active or self.state not in (IDLE, FAILED):
+            return
+        if self.state == FAILED and self.target == version:
+            return  # already failed on this version; wait for a new pointer or an explicit deploy
+        print(f"Active model version changed to '{version}'; deploying")
+        self.deploy(version, persist=False)
+
+    def start_watch(self, interval=MODEL_SYNC_INTERVAL):
+        if interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+
+        def watch():
+            while not self._watch_stop.wait(interval):
+                try:
+                    self.sync()
+                except Exception as e:
+                    print(f"WARNING: model version sync failed: {e}")
+
+        self._watch_stop.clear()
+        self._watcher = threading.Thread(target=watch, name="model-sync", daemon=True)
+        self._watcher.start()
+
+    def stop_watch(self):
+        self._watch_stop.set()
+
+    def stats(self):
+        return {"active": self.active, "state": self.state, "target": self.target, "error": self.error,
+                "shadow": self.shadow.version if self.shadow else None, "history": self.history[-10:]}
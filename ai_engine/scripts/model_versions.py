@@ -0,0 +1,159 @@
+"""
+VERSIONED MODEL STORE
+---------------------
+Immutable model versions under MODEL_VERSIONS_DIR (default models/versions/),
+plus a pointer to the one the API serves. Without an active version the API
+keeps loading the fixed folders under models/ as before.
+
+On-disk layout:
+    versions/active.json                  {"version": "...", "activated_at": "..."}
+    versions/<name>/manifest.json         created_at, source, note, components
+    versions/<name>/category_model/       Hugging Face checkpoints, as under models/
+    versions/<name>/priority_model/
+    versions/<name>/multihead_model/      (optional) see scripts/convert_multihead.py
+    versions/<name>/onnx/                 (optional) see scripts/export_onnx.py
+    versions/<name>/early_exit/           (optional) see scripts/early_exit.py
+
+A version is never modified after publishing; deploying a retrained model
+means publishing a new version and activating it, either with --activate
+(picked up by running servers within MODEL_SYNC_INTERVAL seconds) or through
+POST /admin/models/deploy, which also supports shadow scoring first.
+
+Run from the ai_engine folder:
+    python -m scripts.model_versions --publish --note "retrained on March tickets"
+    python -m scripts.model_versions --publish --from-dir /tmp/run-42 --name v2026-03-b
+    python -m scripts.model_versions --list
+    python -m scripts.model_versions --activate v2026-03-b
+"""
+
+import argparse
+import json
+import os
+import shutil
+from datetime import datetime
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+MODELS_DIR = os.path.join(ROOT_DIR, "models")
+MODEL_VERSIONS_DIR = os.getenv("MODEL_VERSIONS_DIR", os.path.join(MODELS_DIR, "versions"))
+ACTIVE_FILE = "active.json"
+MANIFEST_FILE = "manifest.json"
+
+# Folders a version may hold, and the models/ folder each replaces
+COMPONENTS = ("category_model", "priority_model", "multihead_model", "onnx", "early_exit")
+REQUIRED_COMPONENTS = ("category_model", "priority_model")
+
+
+def version_dir(version, root=MODEL_VERSIONS_DIR):
+    if not version or os.path.basename(version) != version or version.startswith("."):
+        raise ValueError(f"Invalid model version name '{version}'")
+    return os.path.join(root, version)
+
+
+def version_exists(version, root=MODEL_VERSIONS_DIR):
+    try:
+        return os.path.isfile(os.path.join(version_dir(version, root), MANIFEST_FILE))
+    except ValueError:
+        return False
+
+
+def list_versions(root=MODEL_VERSIONS_DIR):
+    """Manifests of every published version, oldest first."""
+    if not os.path.isdir(root):
+        return []
+    manifests = []
+    for name in os.listdir(root):
+        if version_exists(name, root):
+            with open(os.path.join(root, name, MANIFEST_FILE)) as f:
+                manifests.append(json.load(f))
+    return sorted(manifests, key=lambda m: m["created_at"])
+
+
+def active_version(root=MODEL_VERSIONS_DIR):
+    """Name of the active version, None when serving the unversioned models/ folders."""
+    try:
+        with open(os.path.join(root, ACTIVE_FILE)) as f:
+            version = json.load(f)["version"]
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        print(f"WARNING: ignoring {os.path.join(root, ACTIVE_FILE)}: {e}")
+        return None
+    if not version_exists(version, root):
+        print(f"WARNING: active model version '{version}' not found under {root}; using the unversioned models")
+        return None
+    return version
+
+
+def set_active(version, root=MODEL_VERSIONS_DIR):
+    if not version_exists(version, root):
+        raise ValueError(f"Unknown model version '{version}'")
+    tmp = os.path.join(root, f".{ACTIVE_FILE}.{os.getpid()}")
+    with open(tmp, "w") as f:
+        json.dump({"version": version, "activated_at": datetime.now().isoformat(timespec="seconds")}, f)
+    # Readers see either the old pointer or the new one, never a partial file
+    os.replace(tmp, os.path.join(root, ACTIVE_FILE))
+
+
+def model_paths(version=None, root=MODEL_VERSIONS_DIR):
+    """Checkpoint locations for load_backend. onnx / early_exit are None for the unversioned
+    models, so the backends fall back to their own defaults."""
+    if version is None:
+        return {"category": os.path.join(MODELS_DIR, "category_model"), "priority": os.path.join(MODELS_DIR, "priority_model"),
+                "multihead": os.path.join(MODELS_DIR, "multihead_model"), "onnx": None, "early_exit": None}
+    base = version_dir(version, root)
+    return {"category": os.path.join(base, "category_model"), "priority": os.path.join(base, "priority_model"),
+            "multihead": os.path.join(base, "multihead_model"), "onnx": os.path.join(base, "onnx"),
+            "early_exit": os.path.join(base, "early_exit")}
+
+
+def publish(source=MODELS_DIR, name=None, note="", root=MODEL_VERSIONS_DIR):
+    """Copy the model folders found in `source` into a new version; returns its manifest."""
+    name = name or datetime.now().strftime("v%Y%m%d-%H%M%S")
+    target = version_dir(name, root)
+    if os.path.exists(target):
+        raise ValueError(f"Model version '{name}' already exists")
+    missing = [c for c in REQUIRED_COMPONENTS if not os.path.isdir(os.path.join(source, c))]
+    if missing:
+        raise ValueError(f"{source} has no {', '.join(missing)} folder")
+
+    # Copy next to the final location and rename, so a half-copied version is never listed
+    staging = os.path.join(root, f".{name}.partial")
+    shutil.rmtree(staging, ignore_errors=True)
+    components = [c for c in COMPONENTS if os.path.isdir(os.path.join(source, c))]
+    for component in components:
+        shutil.copytree(os.path.join(source, component), os.path.join(staging, component))
+    manifest = {"version": name, "created_at": datetime.now().isoformat(timespec="seconds"),
+                "source": os.path.abspath(source), "note": note, "components": components}
+    with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.rename(staging, target)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish, list and activate model versions")
+    parser.add_argument("--publish", action="store_true", help="copy the model folders of --from-dir into a new version")
+    parser.add_argument("--from-dir", default=MODELS_DIR, help="folder holding category_model/, priority_model/, ...")
+    parser.add_argument("--name", help="version name (default: v<timestamp>)")
+    parser.add_argument("--note", default="")
+    parser.add_argument("--activate", metavar="VERSION", help="make VERSION the one servers load")
+    parser.add_argument("--list", action="store_true")
+    args = parser.parse_args()
+
+    if args.publish:
+        manifest = publish(args.from_dir, args.name, args.note)
+        print(f"Published {manifest['version']} ({', '.join(manifest['components'])})")
+    if args.activate:
+        set_active(args.activate)
+        print(f"Activated {args.activate}; running servers switch within their MODEL_SYNC_INTERVAL")
+    if args.list or not (args.publish or args.activate):
+        active = active_version()
+        for manifest in list_versions():
+            marker = "*" if manifest["version"] == active else " "
+            print(f"{marker} {manifest['version']:<24} {manifest['created_at']}  {', '.join(manifest['components'])}  {manifest['note']}")
+        if active is None:
+            print("(no active version: serving the unversioned models/ folders)")
+
+
+if __name__ == "__main__":
+    main()
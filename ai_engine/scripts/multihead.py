@@ -0,0 +1,134 @@
+"""
+MULTI-HEAD INFERENCE
+--------------------
+One encoder forward pass whose output feeds both the category and the
+priority classification heads.
+
+On-disk layout (models/multihead_model/):
+    config.json, model.safetensors   shared encoder (AutoModel)
+    tokenizer files                  tokenizer for the shared encoder
+    heads.safetensors                "<head>.<param>" tensors for every head
+    multihead_config.json            {"heads": {"category": <config>, "priority": <config>}, ...}
+"""
+
+import json
+import os
+
+import torch
+from torch import nn
+from safetensors.torch import save_file, load_file
+
+MULTIHEAD_CONFIG_NAME = "multihead_config.json"
+HEADS_WEIGHTS_NAME = "heads.safetensors"
+
+# Heads that read the first-token hidden state instead of the encoder's pooler
+ROBERTA_STYLE = {"roberta", "xlm-roberta", "camembert"}
+SUPPORTED_MODEL_TYPES = ROBERTA_STYLE | {"bert"}
+
+
+def is_multihead_checkpoint(path):
+    return os.path.isfile(os.path.join(path, MULTIHEAD_CONFIG_NAME))
+
+
+def use_multihead(mode, path):
+    """Resolve INFERENCE_MODE (auto|multihead|separate) against what exists on disk."""
+    return mode == "multihead" or (mode == "auto" and is_multihead_checkpoint(path))
+
+
+def _check_supported(config):
+    if config.model_type not in SUPPORTED_MODEL_TYPES:
+        raise ValueError(f"Multi-head mode does not support model_type '{config.model_type}'")
+
+
+def build_head(config):
+    _check_supported(config)
+    if config.model_type in ROBERTA_STYLE:
+        from transformers.models.roberta.modeling_roberta import RobertaClassificationHead
+        return RobertaClassificationHead(config)
+    return nn.Linear(config.hidden_size, config.num_labels)
+
+
+def head_input(config, encoder_outputs):
+    if config.model_type in ROBERTA_STYLE:
+        # RobertaClassificationHead only looks at features[:, 0, :]
+        return encoder_outputs.last_hidden_state[:, :1, :]
+    return encoder_outputs.pooler_output
+
+
+class MultiHeadClassifier(nn.Module):
+    def __init__(self, encoder, heads, head_configs):
+        super().__init__()
+        self.encoder = encoder
+        self.heads = nn.ModuleDict(heads)
+        self.head_configs = head_configs
+
+    def head_inputs(self, **inputs):
+        outputs = self.encoder(**inputs)
+        return {name: head_input(cfg, outputs) for name, cfg in self.head_configs.items()}
+
+    def forward(self, **inputs):
+        features = self.head_inputs(**inputs)
+        return {name: self.heads[name](features[name]) for name in self.heads}
+
+    def id2label(self, name):
+        return self.head_configs[name].id2label
+
+
+def from_sequence_classifiers(encoder_model, models):
+    """Share `encoder_model`'s encoder; keep each model's own classification head."""
+    configs = {name: model.config for name, model in models.items()}
+    for cfg in configs.values():
+        _check_supported(cfg)
+        if cfg.model_type != encoder_model.config.model_type or cfg.hidden_size != encoder_model.config.hidden_size:
+            raise ValueError("All heads must come from the same architecture as the shared encoder")
+    heads = {name: model.classifier for name, model in models.items()}
+    return MultiHeadClassifier(encoder_model.base_model, heads, configs)
+
+
+def save_multihead(model, tokenizer, path, meta=None):
+    os.makedirs(path, exist_ok=True)
+    model.encoder.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+    tensors = {f"{name}.{k}": v.detach().cpu().contiguous() for name, head in model.heads.items() for k, v in head.state_dict().items()}
+    save_file(tensors, os.path.join(path, HEADS_WEIGHTS_NAME))
+
+    config = {"heads": {name: cfg.to_dict() for name, cfg in model.head_configs.items()}}
+    config.update(meta or {})
+    with open(os.path.join(path, MULTIHEAD_CONFIG_NAME), "w") as f:
+        json.dump(config, f, indent=2)
+
+
+def load_head_configs(path):
+    from transformers import AutoConfig
+
+    with open(os.path.join(path, MULTIHEAD_CONFIG_NAME)) as f:
+        config = json.load(f)
+
+    head_configs = {}
+    for name, cfg in config["heads"].items():
+        cfg = dict(cfg)
+        head_configs[name] = AutoConfig.for_model(cfg.pop("model_type"), **cfg)
+    return head_configs
+
+
+def load_multihead(path, device=torch.device("cpu")):
+    from transformers import AutoModel, AutoTokenizer
+
+    head_configs = load_head_configs(path)
+
+    model_type = next(iter(head_configs.values())).model_type
+    encoder = AutoModel.from_pretrained(path, add_pooling_layer=model_type not in ROBERTA_STYLE)
+
+    tensors = load_file(os.path.join(path, HEADS_WEIGHTS_NAME))
+    heads = {}
+    for name, cfg in head_configs.items():
+        head = build_head(cfg)
+        prefix = f"{name}."
+        head.load_state_dict({k[len(prefix):]: v for k, v in tensors.items() if k.startswith(prefix)})
+        heads[name] = head
+
+    model = MultiHeadClassifier(encoder, heads, head_configs).to(device)
+    model.eval()
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    return model, tokenizer
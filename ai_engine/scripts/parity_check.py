@@ -0,0 +1,96 @@
+"""
+BACKEND ACCURACY PARITY CHECK
+-----------------------------
+Scores a reproducible sample of dataset.zip with each inference backend and
+reports accuracy against the dataset labels, agreement with the first
+(reference) backend, and throughput, so a measured accuracy delta can be
+traded for latency.
+
+Run from the ai_engine folder:
+    python -m scripts.parity_check --backends torch torch-int8 onnx onnx-int8 --samples 2000
+"""
+
+import argparse
+import json
+import os
+import time
+
+from scripts.backends import (
+    BACKENDS, CATEGORY_MODEL_PATH, PRIORITY_MODEL_PATH, MULTIHEAD_MODEL_PATH,
+    load_backend, predict_batch
+)
+from scripts.dataset import sample_rows
+
+
+def _accuracy(preds, rows, pred_key, label_key, known_labels):
+    # Dataset labels are names (Topic_group / Priority); only score when they match the model's label set
+    labels = [row[label_key].lower() for row in rows]
+    if not set(labels) <= known_labels:
+        return None
+    return sum(p[pred_key].lower() == label for p, label in zip(preds, labels)) / len(rows)
+
+
+def evaluate(name, rows, batch_size, mode, reference=None):
+    engine = load_backend(name, CATEGORY_MODEL_PATH, PRIORITY_MODEL_PATH, MULTIHEAD_MODEL_PATH, mode=mode)
+    texts = [row["clean_text"] for row in rows]
+
+    predict_batch(engine, texts[:batch_size], batch_size=batch_size)  # warm-up
+    start = time.perf_counter()
+    preds = predict_batch(engine, texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "backend": name,
+        "tickets_per_sec": len(texts) / elapsed,
+        "category_accuracy": _accuracy(preds, rows, "category", "Topic_group", {v.lower() for v in engine.cat_id2label.values()}),
+        "priority_accuracy": _accuracy(preds, rows, "priority", "Priority", {v.lower() for v in engine.pri_id2label.values()}),
+    }
+    if reference is not None:
+        ref_preds = reference["predictions"]
+        result["category_agreement"] = sum(p["category"] == r["category"] for p, r in zip(preds, ref_preds)) / len(preds)
+        result["priority_agreement"] = sum(p["priority"] == r["priority"] for p, r in zip(preds, ref_preds)) / len(preds)
+        result["max_confidence_delta"] = max(
+            max(abs(p["category_confidence"] - r["category_confidence"]), abs(p["priority_confidence"] - r["priority_confidence"]))
+            for p, r in zip(preds, ref_preds)
+        )
+    result["predictions"] = preds
+    return result
+
+
+def _fmt(value, pattern="{:.3f}"):
+    return "n/a" if value is None else pattern.format(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inference backends on dataset.zip")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=["torch", "torch-int8"])
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--mode", choices=["auto", "multihead", "separate"], default=os.getenv("INFERENCE_MODE", "auto"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write the summary to this file")
+    args = parser.parse_args()
+
+    rows = sample_rows(args.samples, seed=args.seed)
+    results = []
+    for name in args.backends:
+        results.append(evaluate(name, rows, args.batch_size, args.mode, reference=results[0] if results else None))
+
+    base = results[0]
+    print(f"\n{len(rows)} tickets, reference backend: {base['backend']}\n")
+    print(f"{'backend':<11} {'cat acc':>8} {'pri acc':>8} {'cat agree':>10} {'pri agree':>10} {'max dconf':>10} {'tickets/s':>10} {'speedup':>8}")
+    print("-" * 82)
+    for r in results:
+        print(f"{r['backend']:<11} {_fmt(r['category_accuracy']):>8} {_fmt(r['priority_accuracy']):>8} "
+              f"{_fmt(r.get('category_agreement', 1.0)):>10} {_fmt(r.get('priority_agreement', 1.0)):>10} "
+              f"{_fmt(r.get('max_confidence_delta', 0.0)):>10} {r['tickets_per_sec']:>10.1f} "
+              f"{r['tickets_per_sec'] / base['tickets_per_sec']:>7.2f}x")
+
+    if args.json:
+        summary = [{k: v for k, v in r.items() if k != "predictions"} for r in results]
+        with open(args.json, "w") as f:
+            json.dump({"samples": len(rows), "results": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
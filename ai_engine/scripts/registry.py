@@ -0,0 +1,120 @@
+"""
+MODEL REGISTRY
+--------------
+Lazy, thread-safe holder for the heavy pipeline components (transformer
+backend, spaCy, KeyBERT). Nothing is loaded at import: a component loads on
+first `get()`, or all of them load concurrently via `load_all()` /
+`start_background_load()`. `status()` reports which components are warm, and
+`replace()` swaps a loaded component for a new one without a reload.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+COLD, LOADING, READY, FAILED = "cold", "loading", "ready", "failed"
+
+
+class _Component:
+    def __init__(self, loader):
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.value = None
+        self.state = COLD
+        self.load_seconds = None
+        self.error = None
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._components = {}
+        self._background = None
+        self.warmed_up = False
+
+    def register(self, name, loader):
+        self._components[name] = _Component(loader)
+
+    def names(self):
+        return list(self._components)
+
+    def get(self, name):
+        component = self._components[name]
+        if component.state == READY:
+            return component.value
+        with component.lock:
+            # Another thread may have finished loading while we waited for the lock
+            if component.state != READY:
+                component.state = LOADING
+                start = time.perf_counter()
+                try:
+                    component.value = component.loader()
+                except Exception as e:
+                    component.state = FAILED
+                    component.error = str(e)
+                    raise
+                component.load_seconds = round(time.perf_counter() - start, 3)
+                component.error = None
+                component.state = READY
+        return component.value
+
+    def replace(self, name, value, loader=None, load_seconds=None):
+        """Swap in an already loaded component. Callers that fetched the old value keep using it
+        until they finish; every later get() returns the new one. `loader` replaces the loader
+        used if the component ever has to be loaded again."""
+        component = self._components[name]
+        with component.lock:
+            if loader is not None:
+                component.loader = loader
+            previous = component.value
+            component.value = value
+            component.load_seconds = load_seconds
+            component.error = None
+            component.state = READY
+        return previous
+
+    def is_loaded(self, name):
+        return self._components[name].state == READY
+
+    def load_all(self, names=None, parallel=True):
+        names = names or self.names()
+
+        def load(name):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"WARNING: failed to load '{name}': {e}")
+
+        if parallel and len(names) > 1:
+            with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="model-load") as pool:
+                list(pool.map(load, names))
+        else:
+            for name in names:
+                load(name)
+        return self.status()
+
+    def start_background_load(self, names=None, then=None):
+        """Load everything on a daemon thread; `then` (e.g. a warm-up pass) runs afterwards."""
+        if self._background is not None and self._background.is_alive():
+            return self._background
+
+        def run():
+            self.load_all(names)
+            if then is not None and self.ready(names):
+                try:
+                    then()
+                    self.warmed_up = True
+                except Exception as e:
+                    print(f"WARNING: warm-up failed: {e}")
+
+        self._background = threading.Thread(target=run, name="model-preload", daemon=True)
+        self._background.start()
+        return self._background
+
+    def ready(self, names=None):
+        return all(self._components[n].state == READY for n in (names or self.names()))
+
+    def status(self):
+        return {
+            name: {"state": c.state, "load_seconds": c.load_seconds, "error": c.error}
+            for name, c in self._components.items()
+        }
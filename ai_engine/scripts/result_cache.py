@@ -0,0 +1,94 @@
+"""
+RESULT CACHE
+------------
+Content-addressed cache of final predictions so duplicate tickets (outage
+storms, resubmissions, bots) skip the whole pipeline.
+
+The key is a SHA-256 of the model version plus the normalised title and
+description. ASCII text is normalised with `clean_text`. Other scripts use
+NFKC + case-folding, because `clean_text` strips every non-Latin letter and
+would make all such tickets collide. A changed model version therefore never
+returns stale results. Hits are returned with a fresh `created_at`.
+
+Configuration:
+    RESULT_CACHE_SIZE   in-memory entries (0 disables the cache)
+    RESULT_CACHE_TTL    seconds an entry stays valid
+    RESULT_CACHE_PATH   optional SQLite file shared by all uvicorn workers
+"""
+
+import copy
+import hashlib
+import os
+import threading
+from datetime import datetime
+
+from scripts.cache import build_cache
+from scripts.translation import normalize_text
+
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "5000"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "3600"))
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "")
+
+
+class ResultCache:
+    def __init__(self, version_fn, normalize_fn, max_size=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL, path=RESULT_CACHE_PATH):
+        self.version_fn = version_fn
+        self.normalize_fn = normalize_fn
+        self.enabled = max_size > 0
+        self.cache = build_cache(max(1, max_size), ttl=ttl, path=path or None, table="results") if self.enabled else None
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _normalize(self, text):
+        text = text or ""
+        return self.normalize_fn(text) if text.isascii() else normalize_text(text)
+
+    def _current_version(self):
+        version = self.version_fn()
+        if version is not None and version != self._version:
+            # New model: drop in-memory entries; on-disk ones are keyed by the old version and age out
+            with self._lock:
+                if self._version is not None:
+                    getattr(self.cache, "memory", self.cache).clear()
+                self._version = version
+        return version
+
+    def key(self, title, description, version):
+        raw = "\x1f".join([version, self._normalize(title), self._normalize(description)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, title, description):
+        if not self.enabled:
+            return None
+        version = self._current_version()
+        if version is None:
+            return None
+        value = self.cache.get(self.key(title, description, version))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        value = copy.deepcopy(value)
+        value["created_at"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+        return value
+
+    def set(self, title, description, prediction):
+        if not self.enabled:
+            return
+        version = self._current_version()
+        if version is not None:
+            self.cache.set(self.key(title, description, version), prediction)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self.cache) if self.enabled else 0,
+            "model_version": self._version,
+        }
@@ -0,0 +1,307 @@
+"""
+RULE & ENTITY ENGINE
+--------------------
+Gazetteers (devices, software, locations, ...), regex entity patterns and
+escalation rules are loaded from a JSON config (config/rules.json, or
+RULES_CONFIG_PATH) and compiled once:
+
+    gazetteer terms + escalation terms   one word-level Aho-Corasick automaton
+    regex entity patterns                one compiled pattern per kind
+
+Scanning a ticket costs O(text length) whatever the number of gazetteer terms,
+so gazetteers with tens of thousands of entries are fine. The config file is
+re-read on change (checked at most every RULES_RELOAD_INTERVAL seconds), so
+edits apply without a restart. A broken edit keeps the previous rules.
+
+Gazetteer entries are a term, or {"name": canonical, "aliases": [...]};
+matches report the canonical name. Each regex kind is scanned on its own, so
+matches of different kinds may overlap (a username and an error code in
+"user@HOST-42"). Matches report the whole match, so use (?:...) groups.
+
+Validate a config / measure scan cost with a synthetic gazetteer:
+    python -m scripts.rules --check config/rules.json
+    python -m scripts.rules --bench-terms 50000
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+RULES_CONFIG_PATH = os.getenv("RULES_CONFIG_PATH", os.path.join(ROOT_DIR, "config", "rules.json"))
+RULES_RELOAD_INTERVAL = float(os.getenv("RULES_RELOAD_INTERVAL", "5"))
+
+# Previous hardcoded behaviour, used when no config file exists
+DEFAULT_CONFIG = {
+    "gazetteers": {"devices": ["laptop", "mouse", "printer", "keyboard", "monitor", "server", "wifi"]},
+    "patterns": {
+        "usernames": r"@[a-zA-Z0-9_]+",
+        "error_codes": r"\b(?:0x[0-9A-F]+|ERR_[0-9]+|[A-Z]+-[0-9]+)\b",
+    },
+    "escalation": [{
+        "name": "critical_outage",
+        "terms": ["server down", "production down", "security breach", "ransomware", "data loss", "critical error"],
+        "set_priority": "Critical",
+    }],
+    "manual_review": {"min_chars": 5, "category_confidence": 0.4},
+    "priority_order": ["Low", "Medium", "High", "Critical"],
+}
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+# Possessive 's, so "laptop's" still matches the term "laptop"
+_POSSESSIVE = re.compile(r"'s\b")
+
+
+def tokenize(text):
+    """Lower-cased word tokens; hyphenated words stay whole, possessives are dropped.
+
+    >>> tokenize("The laptop's screen and the printers' trays; Wi-Fi won't connect")
+    ['the', 'laptop', 'screen', 'and', 'the', 'printers', 'trays', 'wi-fi', "won't", 'connect']
+    >>> RuleEngine(DEFAULT_CONFIG).scan("My printer’s tray is stuck, laptop's fine")[0]["devices"]
+    ['printer', 'laptop']
+    """
+    return _TOKEN.findall(_POSSESSIVE.sub("", text.lower().replace("\u2019", "'")))
+
+
+class WordAutomaton:
+    """Aho-Corasick over word tokens: reports every (possibly overlapping) term occurrence
+    in one left-to-right pass. Terms match whole words only."""
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+
+    def add(self, words, payload):
+        state = 0
+        for word in words:
+            nxt = self.goto[state].get(word)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][word] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(())
+            state = nxt
+        self.out[state] += (payload,)
+
+    def build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self.goto[state].items():
+                queue.append(child)
+                f = self.fail[state]
+                while f and word not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(word, 0)
+                self.out[child] += self.out[self.fail[child]]
+        return self
+
+    def search(self, words):
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        hits = []
+        for word in words:
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            if out[state]:
+                hits.extend(out[state])
+        return hits
+
+    def __len__(self):
+        return len(self.goto)
+
+
+def _entries(terms):
+    for entry in terms:
+        if isinstance(entry, str):
+            yield entry, [entry]
+        else:
+            yield entry["name"], [entry["name"]] + list(entry.get("aliases", []))
+
+
+class RuleEngine:
+    def __init__(self, config, source=None):
+        self.config = config
+        self.source = source
+        self.version = hashlib.sha1(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+        self.entity_kinds = list(config.get("gazetteers", {})) + list(config.get("patterns", {}))
+        self.automaton = WordAutomaton()
+        self.terms = 0
+        for kind, terms in config.get("gazetteers", {}).items():
+            for name, surface_forms in _entries(terms):
+                for form in surface_forms:
+                    words = tokenize(form)
+                    if words:
+                        self.automaton.add(words, ("entity", kind, name))
+                        self.terms += 1
+
+        self.rules = config.get("escalation", [])
+        self.rules_by_name = {rule["name"]: rule for rule in self.rules}
+        for index, rule in enumerate(self.rules):
+            for term in rule.get("terms", []):
+                words = tokenize(term)
+                if words:
+                    self.automaton.add(words, ("rule", index, term))
+                    self.terms += 1
+        self.automaton.build()
+
+        # Separate scans per kind: in a single alternation the first match would consume
+        # text another kind also matches
+        self.patterns = [(kind, re.compile(pattern)) for kind, pattern in config.get("patterns", {}).items()]
+
+        review = config.get("manual_review", {})
+        self.min_chars = review.get("min_chars", 5)
+        self.category_threshold = review.get("category_confidence", 0.4)
+        self.priority_rank = {p.lower(): i for i, p in enumerate(config.get("priority_order", []))}
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), source=path)
+
+    def scan(self, text, entities=True):
+        """Entities (one list per configured kind) and the names of the escalation rules that fire.
+        With entities=False only the escalation rules are matched and the entity lists stay empty."""
+        found = {kind: {} for kind in self.entity_kinds}
+        fired = {}
+        for tag, key, value in self.automaton.search(tokenize(text)):
+            if tag == "entity":
+                if entities:
+                    found[key][value] = None
+            else:
+                fired[key] = None
+        if entities:
+            for kind, pattern in self.patterns:
+                for match in pattern.finditer(text):
+                    found[kind][match.group()] = None
+        # dicts keep first-seen order and drop duplicates
+        return {kind: list(values) for kind, values in found.items()}, [self.rules[i]["name"] for i in fired]
+
+    def apply(self, text, pred, escalations=None, threshold=None):
+        """Final (category, priority) for a raw model prediction. `text` is the processed ticket text;
+        `escalations` are rule names from scan() (scanned from `text` when not given)."""
+        if not text.strip() or len(text.strip()) < self.min_chars:
+            return "Needs Manual Review", "Low"
+
+        final_cat, final_pri = pred["category"], pred["priority"]
+        if escalations is None:
+            escalations = self.scan(text)[1]
+        for name in escalations:
+            rule = self.rules_by_name.get(name, {})
+            if rule.get("set_category"):
+                final_cat = rule["set_category"]
+            # Only ever raise the priority
+            target = rule.get("set_priority")
+            if target and self.priority_rank.get(target.lower(), -1) > self.priority_rank.get(final_pri.lower(), -1):
+                final_pri = target
+
+        threshold = self.category_threshold if threshold is None else threshold
+        if pred["category_confidence"] < threshold:
+            final_cat = "Needs Manual Review"
+        return final_cat, final_pri
+
+    def stats(self):
+        return {"version": self.version, "source": self.source, "terms": self.terms,
+                "states": len(self.automaton), "rules": len(self.rules)}
+
+
+class RuleSet:
+    """Holds the current RuleEngine and swaps in a recompiled one when the config file changes."""
+
+    def __init__(self, path=RULES_CONFIG_PATH, reload_interval=RULES_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked = 0.0
+        self.reloads = 0
+        self.errors = 0
+        self.last_error = None
+        self.loaded_at = None
+        if os.path.exists(path):
+            self._engine = RuleEngine.from_file(path)
+            self._mtime = os.stat(path).st_mtime_ns
+        else:
+            print(f"WARNING: {path} not found; using the built-in rules")
+            self._engine = RuleEngine(DEFAULT_CONFIG)
+        self.loaded_at = time.time()
+
+    def current(self):
+        now = time.monotonic()
+        if self.reload_interval >= 0 and now - self._checked >= self.reload_interval:
+            self._checked = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                mtime = self._mtime
+            if mtime != self._mtime:
+                self.reload()
+        return self._engine
+
+    def reload(self):
+        with self._lock:
+            try:
+                engine = RuleEngine.from_file(self.path)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                print(f"WARNING: could not reload {self.path}, keeping rules {self._engine.version}: {e}")
+                # Don't retry the same broken file on every check
+                self._mtime = os.stat(self.path).st_mtime_ns if os.path.exists(self.path) else self._mtime
+                return False
+            self._engine = engine
+            self._mtime = os.stat(self.path).st_mtime_ns
+            self.reloads += 1
+            self.loaded_at = time.time()
+            return True
+
+    def stats(self):
+        return {**self._engine.stats(), "reloads": self.reloads, "reload_errors": self.errors,
+                "last_error": self.last_error, "loaded_at": self.loaded_at}
+
+
+def _bench(n_terms, tickets=2000):
+    import random
+    rng = random.Random(0)
+    vocab = [f"term{i}" for i in range(n_terms)]
+    config = json.loads(json.dumps(DEFAULT_CONFIG))
+    config["gazetteers"]["synthetic"] = [" ".join(rng.sample(vocab, rng.randint(1, 3))) for _ in range(n_terms)]
+    start = time.perf_counter()
+    engine = RuleEngine(config)
+    compile_s = time.perf_counter() - start
+    texts = [" ".join(rng.choice(vocab) if rng.random() < 0.1 else "printer" for _ in range(60)) + " ERR_42"
+             for _ in range(tickets)]
+    start = time.perf_counter()
+    for text in texts:
+        engine.scan(text)
+    per_ticket_us = (time.perf_counter() - start) / tickets * 1e6
+    print(f"{n_terms:>8} terms: compile {compile_s:6.2f}s, {len(engine.automaton):>8} states, {per_ticket_us:8.1f} us/ticket")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule & entity engine utilities")
+    parser.add_argument("--check", metavar="PATH", help="compile a config file and print its size")
+    parser.add_argument("--bench-terms", type=int, nargs="*", help="scan cost with synthetic gazetteers of these sizes")
+    args = parser.parse_args()
+
+    if args.check:
+        engine = RuleEngine.from_file(args.check)
+        print(json.dumps(engine.stats(), indent=2))
+    elif args.bench_terms is not None:
+        for n in args.bench_terms or [100, 1000, 10000, 50000]:
+            _bench(n)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+MULTI-WORKER SERVER
+-------------------
+Pre-fork serving for app.py. The parent process imports the app and loads
+every model component (both transformers, spaCy, the keyword extractor, ...)
+once, freezes the garbage collector so the loaded objects are not written to
+again, binds the listening socket and then forks the workers. Model weights
+are only read after the fork, so all workers share the parent's pages
+copy-on-write instead of each holding a private copy.
+
+Each worker runs its own uvicorn server on the shared socket, with its torch
+intra-op threads and inference executor sized so that workers x threads does
+not exceed the machine's cores (override with --threads-per-worker, or
+TORCH_INTRA_OP_THREADS / INFERENCE_WORKERS). Workers that die are restarted;
+SIGTERM / SIGINT shut everything down gracefully.
+
+The parent never runs a forward pass (warm-up happens in each worker), so no
+OpenMP thread pool exists before the fork.
+
+Run from the ai_engine folder:
+    python -m scripts.serve --workers 4 --port 8000
+    python -m scripts.serve --workers 4 --no-preload     # every worker loads its own copy (for comparison)
+
+Measure memory per worker and throughput as workers scale:
+    python -m scripts.bench_workers --workers 1 2 4
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0"))
+
+
+def threads_per_worker(workers, cpus=None):
+    return max(1, (cpus or os.cpu_count() or 1) // workers)
+
+
+def _bind(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock, threads, log_level):
+    import uvicorn
+    from scripts.executor import configure_torch_threads
+    import app as service
+
+    # torch resets its thread pools in a forked child; apply the per-worker size again
+    configure_torch_threads(intra_op=threads)
+    config = uvicorn.Config(service.app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    def __init__(self, sock, workers, threads, log_level="info"):
+        self.sock = sock
+        self.workers = workers
+        self.threads = threads
+        self.log_level = log_level
+        self.children = {}
+        self.stopping = False
+
+    def spawn(self, index):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                _run_worker(self.sock, self.threads, self.log_level)
+            except BaseException as e:
+                print(f"Worker {os.getpid()} failed: {e}", file=sys.stderr)
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = (index, time.monotonic())
+        print(f"Started worker {index} (pid {pid}, {self.threads} torch threads)")
+
+    def stop(self, signum=signal.SIGTERM, frame=None):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for index in range(self.workers):
+            self.spawn(index)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            index, started = self.children.pop(pid, (None, 0.0))
+            if index is None or self.stopping:
+                continue
+            print(f"WARNING: worker {index} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}; restarting")
+            # Don't spin if a worker dies straight away (e.g. a bad config)
+            if time.monotonic() - started < 1.0:
+                time.sleep(1.0)
+            self.spawn(index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork multi-worker server for the classification API")
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY or os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--threads-per-worker", type=int, help="torch intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--no-preload", action="store_true", help="load the models in each worker instead of once before forking")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+    threads = args.threads_per_worker or int(os.getenv("TORCH_INTRA_OP_THREADS", "0")) or threads_per_worker(workers)
+    # Read by scripts.executor when the app is imported below
+    os.environ["TORCH_INTRA_OP_THREADS"] = str(threads)
+    os.environ.setdefault("INFERENCE_WORKERS", str(max(2, threads)))
+
+    import app as service
+
+    if not args.no_preload:
+        start = time.perf_counter()
+        status = service.registry.load_all()
+        failed = [name for name, s in status.items() if s["error"]]
+        if failed:
+            print(f"WARNING: could not preload {', '.join(failed)}; workers will retry on first use")
+        print(f"Preloaded {len(status) - len(failed)} components in {time.perf_counter() - start:.1f}s")
+        if threading.active_count() > 1:
+            print(f"WARNING: {threading.active_count() - 1} extra threads alive before fork: "
+                  + ", ".join(t.name for t in threading.enumerate() if t is not threading.current_thread()))
+        # Move everything loaded so far out of the collector's reach, so GC passes in the
+        # workers don't write to (and un-share) the pages holding it
+        gc.collect()
+        gc.freeze()
+
+    sock = _bind(args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port} with {workers} workers x {threads} torch threads")
+    Supervisor(sock, workers, threads, args.log_level).run()
+
+
+if __name__ == "__main__":
+    main()
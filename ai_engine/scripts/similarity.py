@@ -0,0 +1,539 @@
+"""
+SIMILAR-TICKET INDEX
+--------------------
+Nearest-neighbour search over historical tickets, for /similar and duplicate
+detection. Tickets are embedded (on their lemmatised text, like the
+classifier sees them), L2-normalised and stored as a float16 matrix that is
+memory-mapped, so the index costs page cache rather than heap and is shared
+by every worker process.
+
+Embedders (chosen when the index is built and recorded in index.json):
+    sentence   the KeyBERT sentence-transformer (KEYBERT_MODEL); reused when KEYWORD_EXTRACTOR=keybert
+    encoder    mean-pooled hidden states of the fine-tuned category model (of the active
+               model version at build time, recorded in index.json and kept for queries
+               and appends; rebuild after deploying a new version)
+    tfidf      TF-IDF (notebook settings) reduced to --dim dimensions with truncated SVD
+
+On-disk layout (SIMILAR_INDEX_DIR, default models/similar_index/):
+    index.json       embedder, dimension, IVF settings
+    vectors.f16      row-major float16 [rows, dim]
+    rows.jsonl       one metadata object per row (id, title, text, category, priority, ...)
+    lists.i32        IVF list of every row (only with IVF)
+    centroids.npy    IVF centroids (only with IVF)
+    tfidf.joblib     fitted vectoriser + SVD (tfidf embedder only)
+
+With IVF (k-means partitioning, on by default past 10k rows) a query only
+scores the rows of its SIMILAR_NPROBE nearest lists. New tickets are appended
+to all files in place; readers pick the new rows up on their next search.
+
+    python -m scripts.similarity --build --embedder sentence
+    python -m scripts.similarity --append new_tickets.jsonl
+    python -m scripts.similarity --query "printer paper jam on floor 3" -k 5
+    python -m scripts.similarity --bench 500
+"""
+
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends from several processes are not coordinated
+    fcntl = None
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+SIMILAR_INDEX_DIR = os.getenv("SIMILAR_INDEX_DIR", os.path.join(ROOT_DIR, "models", "similar_index"))
+SIMILAR_NPROBE = int(os.getenv("SIMILAR_NPROBE", "8"))
+SIMILAR_DUPLICATE_THRESHOLD = float(os.getenv("SIMILAR_DUPLICATE_THRESHOLD", "0.92"))
+# 1 appends every ticket classified by the API to the index
+SIMILAR_APPEND = os.getenv("SIMILAR_APPEND", "0") == "1"
+
+EMBEDDERS = ("sentence", "encoder", "tfidf")
+INDEX_META_NAME = "index.json"
+IVF_MIN_ROWS = 10_000
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def index_exists(path=SIMILAR_INDEX_DIR):
+    return os.path.isfile(os.path.join(path, INDEX_META_NAME))
+
+
+# ===============================
+# Embedders
+# ===============================
+class SentenceEmbedder:
+    name = "sentence"
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self.model = self._shared_model() or self._load()
+
+    def _shared_model(self):
+        # KEYWORD_EXTRACTOR=keybert already holds this sentence-transformer
+        from scripts.inference import registry, KEYBERT_MODEL
+        if self.model_name != KEYBERT_MODEL:
+            return None
+        try:
+            backend = getattr(getattr(registry.get("keywords"), "model", None), "model", None)
+        except Exception:
+            return None
+        return getattr(backend, "embedding_model", None)
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(self.model_name)
+
+    @property
+    def dim(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts, batch_size=64):
+        return _normalize(self.model.encode(list(texts), batch_size=batch_size, show_progress_bar=False))
+
+
+class EncoderEmbedder:
+    name = "encoder"
+
+    def __init__(self, model_path, model_version=None):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+        self.torch = torch
+        self.model_version = model_version
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.model = AutoModel.from_pretrained(model_path).eval()
+
+    @property
+    def dim(self):
+        return self.model.config.hidden_size
+
+    def embed(self, texts, batch_size=64):
+        from scripts.backends import MODEL_MAX_LENGTH, encode_head_tail
+        texts = list(texts)
+        encodings = encode_head_tail(self.tokenizer, texts, MODEL_MAX_LENGTH)
+        out = []
+        with self.torch.no_grad():
+            for start in range(0, len(texts), batch_size):
+                features = [{k: encodings[k][i] for k in encodings.keys()} for i in range(start, min(start + batch_size, len(texts)))]
+                inputs = self.tokenizer.pad(features, padding=True, return_tensors="pt")
+                hidden = self.model(**inputs).last_hidden_state
+                mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                out.append(((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)).numpy())
+        return _normalize(np.concatenate(out) if out else np.zeros((0, self.dim)))
+
+
+class TfidfEmbedder:
+    name = "tfidf"
+    FILE = "tfidf.joblib"
+
+    def __init__(self, vectorizer, svd):
+        self.vectorizer = vectorizer
+        self.svd = svd
+        # svd.transform copies components_ (vocabulary x dim, float64) on every call; a float32
+        # sparse x float32 dense product uses it in place
+        self.projection = np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+
+    @classmethod
+    def fit(cls, texts, dim):
+        from sklearn.decomposition import TruncatedSVD
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        # Same vectoriser settings as the notebook baseline
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2), max_features=150_000, min_df=2, max_df=0.9)
+        features = vectorizer.fit_transform(texts)
+        svd = TruncatedSVD(n_components=min(dim, features.shape[1] - 1), random_state=0).fit(features)
+        return cls(vectorizer, svd)
+
+    @classmethod
+    def load(cls, path):
+        import joblib
+        bundle = joblib.load(os.path.join(path, cls.FILE))
+        return cls(bundle["vectorizer"], bundle["svd"])
+
+    def save(self, path):
+        import joblib
+        joblib.dump({"vectorizer": self.vectorizer, "svd": self.svd}, os.path.join(path, self.FILE))
+
+    @property
+    def dim(self):
+        return self.svd.n_components
+
+    def embed(self, texts, batch_size=None):
+        return _normalize(self.vectorizer.transform(list(texts)).astype(np.float32) @ self.projection)
+
+
+def load_embedder(name, path=SIMILAR_INDEX_DIR, model_version=None):
+    """`model_version` picks the encoder's category model (None: the unversioned models/ folder)."""
+    if name == "sentence":
+        from scripts.inference import KEYBERT_MODEL
+        return SentenceEmbedder(KEYBERT_MODEL)
+    if name == "encoder":
+        from scripts.model_versions import model_paths
+        return EncoderEmbedder(model_paths(model_version)["category"], model_version)
+    if name == "tfidf":
+        return TfidfEmbedder.load(path)
+    raise ValueError(f"Unknown embedder '{name}' (expected one of {', '.join(EMBEDDERS)})")
+
+
+# ===============================
+# Index
+# ===============================
+class EmbeddingIndex:
+    def __init__(self, path=SIMILAR_INDEX_DIR, embedder=None):
+        self.path = path
+        with open(self._file(INDEX_META_NAME)) as f:
+            self.meta = json.load(f)
+        self.dim = self.meta["dim"]
+        # Queries and appends must use the encoder the stored vectors came from
+        self.embedder = embedder or load_embedder(self.meta["embedder"], path, self.meta.get("model_version"))
+        if self.stale():
+            print(f"WARNING: similar-ticket index was embedded with model version {self.meta.get('model_version') or 'unversioned'}, "
+                  f"not the active one; rebuild it with `python -m scripts.similarity --build --embedder encoder`")
+        self.centroids = np.load(self._file("centroids.npy")) if self.meta.get("nlist") else None
+        self._lock = threading.Lock()
+        self._offsets = []
+        # (vectors memmap, rows, IVF lists) replaced as one tuple, so a search never mixes
+        # lists that already hold new rows with the shorter memmap from before the refresh
+        lists = [np.zeros(0, dtype=np.int64) for _ in range(len(self.centroids))] if self.centroids is not None else None
+        self._snapshot = (None, 0, lists)
+        self.appended = 0
+        self.refresh()
+
+    @property
+    def vectors(self):
+        return self._snapshot[0]
+
+    @property
+    def rows(self):
+        return self._snapshot[1]
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    @contextlib.contextmanager
+    def _file_lock(self, exclusive):
+        # Serialises appends (possibly from several worker processes) against readers catching up
+        if fcntl is None:
+            yield
+            return
+        with open(self._file(".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def refresh(self):
+        """Pick up rows appended since the last call (by this or another process)."""
+        row_bytes = self.dim * 2
+        if os.path.getsize(self._file("vectors.f16")) // row_bytes == self.rows:
+            return
+        with self._lock, self._file_lock(exclusive=False):
+            rows = os.path.getsize(self._file("vectors.f16")) // row_bytes
+            if rows == self.rows:
+                return
+            with open(self._file("rows.jsonl"), "rb") as f:
+                f.seek(self._offsets[-1] if self._offsets else 0)
+                if self._offsets:
+                    f.readline()
+                while len(self._offsets) < rows:
+                    offset = f.tell()
+                    if not f.readline():
+                        break
+                    self._offsets.append(offset)
+            _, old_rows, lists = self._snapshot
+            if lists is not None:
+                lists = list(lists)
+                assignments = np.fromfile(self._file("lists.i32"), dtype=np.int32, offset=old_rows * 4, count=rows - old_rows)
+                new_ids = np.arange(old_rows, rows)
+                for centroid in np.unique(assignments):
+                    lists[centroid] = np.concatenate([lists[centroid], new_ids[assignments == centroid]])
+            vectors = np.memmap(self._file("vectors.f16"), dtype=np.float16, mode="r", shape=(rows, self.dim))
+            self._snapshot = (vectors, rows, lists)
+
+    def record(self, row):
+        with open(self._file("rows.jsonl"), "rb") as f:
+            f.seek(self._offsets[row])
+            return json.loads(f.readline())
+
+    def _candidates(self, lists, query, nprobe):
+        if lists is None:
+            return None
+        probe = np.argsort(self.centroids @ query)[-nprobe:]
+        return np.sort(np.concatenate([lists[c] for c in probe]))
+
+    def search_vector(self, query, k=5, nprobe=SIMILAR_NPROBE, chunk=16384):
+        self.refresh()
+        vectors, rows, lists = self._snapshot
+        if not rows:
+            return []
+        candidates = self._candidates(lists, query, nprobe)
+        if candidates is not None:
+            scores = vectors[candidates].astype(np.float32) @ query
+            ids = candidates
+        else:
+            # float16 matmul is not BLAS-backed; score in float32 chunks instead
+            scores = np.concatenate([vectors[s:s + chunk].astype(np.float32) @ query for s in range(0, rows, chunk)])
+            ids = np.arange(rows)
+        k = min(k, len(scores))
+        if not k:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def search(self, text, k=5, nprobe=SIMILAR_NPROBE, duplicate_threshold=SIMILAR_DUPLICATE_THRESHOLD):
+        """Top-k most similar indexed tickets for one processed text, plus embed/search timings (ms)."""
+        start = time.perf_counter()
+        query = self.embedder.embed([text])[0]
+        embedded = time.perf_counter()
+        hits = self.search_vector(query, k, nprobe)
+        searched = time.perf_counter()
+        # float16 storage can put an identical ticket a hair above 1
+        results = [{**self.record(row), "score": round(min(score, 1.0), 4), "duplicate": score >= duplicate_threshold}
+                   for row, score in hits]
+        return results, {"embed": round((embedded - start) * 1000, 3), "search": round((searched - embedded) * 1000, 3)}
+
+    def add(self, texts, records):
+        """Append processed texts and their metadata; returns the new row ids."""
+        if not texts:
+            return []
+        vectors = self.embedder.embed(texts).astype(np.float16)
+        with self._file_lock(exclusive=True):
+            start = os.path.getsize(self._file("vectors.f16")) // (self.dim * 2)
+            # Metadata and IVF lists first: readers size the index from vectors.f16
+            with open(self._file("rows.jsonl"), "a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if self.centroids is not None:
+                assign = np.argmax(vectors.astype(np.float32) @ self.centroids.T, axis=1).astype(np.int32)
+                with open(self._file("lists.i32"), "ab") as f:
+                    f.write(assign.tobytes())
+            with open(self._file("vectors.f16"), "ab") as f:
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        self.appended += len(texts)
+        self.refresh()
+        return list(range(start, start + len(texts)))
+
+    def stale(self):
+        """True when the index embeds with a category model other than the active version's."""
+        if self.meta["embedder"] != "encoder":
+            return False
+        from scripts.model_versions import active_version
+        return self.meta.get("model_version") != active_version()
+
+    def stats(self):
+        return {"rows": self.rows, "dim": self.dim, "embedder": self.meta["embedder"], "nlist": self.meta.get("nlist", 0),
+                "nprobe": SIMILAR_NPROBE, "appended": self.appended, "built_at": self.meta.get("built_at"),
+                "model_version": self.meta.get("model_version"), "stale": self.stale()}
+
+
+def _kmeans(path, rows, dim, nlist, sample=100_000, seed=0):
+    from sklearn.cluster import MiniBatchKMeans
+    vectors = np.memmap(os.path.join(path, "vectors.f16"), dtype=np.float16, mode="r", shape=(rows, dim))
+    rng = np.random.default_rng(seed)
+    picked = np.sort(rng.choice(rows, size=min(rows, sample), replace=False))
+    kmeans = MiniBatchKMeans(n_clusters=nlist, batch_size=4096, n_init=3, random_state=seed)
+    kmeans.fit(vectors[picked].astype(np.float32))
+    centroids = _normalize(kmeans.cluster_centers_)
+    assignments = np.concatenate([
+        np.argmax(vectors[s:s + 16384].astype(np.float32) @ centroids.T, axis=1) for s in range(0, rows, 16384)
+    ]).astype(np.int32)
+    return centroids, assignments
+
+
+def build_index(texts, records, path=SIMILAR_INDEX_DIR, embedder="sentence", nlist=None, dim=256, batch_size=256):
+    """Write a fresh index for processed `texts` (one metadata dict per text). nlist None: IVF past IVF_MIN_ROWS."""
+    os.makedirs(path, exist_ok=True)
+    model_version = None
+    if embedder == "tfidf":
+        model = TfidfEmbedder.fit(texts, dim)
+        model.save(path)
+    else:
+        if embedder == "encoder":
+            from scripts.model_versions import active_version
+            model_version = active_version()
+        model = load_embedder(embedder, path, model_version)
+
+    start = time.perf_counter()
+    with open(os.path.join(path, "vectors.f16"), "wb") as vec_file, open(os.path.join(path, "rows.jsonl"), "w", encoding="utf-8") as row_file:
+        for s in range(0, len(texts), batch_size):
+            vec_file.write(model.embed(texts[s:s + batch_size]).astype(np.float16).tobytes())
+            for record in records[s:s + batch_size]:
+                row_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if (s // batch_size) % 20 == 19:
+                print(f"  embedded {s + batch_size}/{len(texts)}")
+    print(f"Embedded {len(texts)} tickets in {time.perf_counter() - start:.1f}s")
+
+    if nlist is None:
+        nlist = int(4 * np.sqrt(len(texts))) if len(texts) >= IVF_MIN_ROWS else 0
+    for name in ("centroids.npy", "lists.i32"):
+        if os.path.exists(os.path.join(path, name)):
+            os.remove(os.path.join(path, name))
+    if nlist:
+        centroids, assignments = _kmeans(path, len(texts), model.dim, nlist)
+        np.save(os.path.join(path, "centroids.npy"), centroids)
+        assignments.tofile(os.path.join(path, "lists.i32"))
+        print(f"IVF: {nlist} lists, {len(texts) / nlist:.0f} tickets per list on average")
+
+    meta = {"embedder": model.name, "dim": model.dim, "nlist": nlist, "rows_at_build": len(texts),
+            "built_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S")}
+    if embedder == "encoder":
+        meta["model_version"] = model_version
+    with open(os.path.join(path, INDEX_META_NAME), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def ticket_record(title, description, category=None, priority=None, ticket_id=None, source="live"):
+    return {"id": ticket_id or uuid.uuid4().hex[:12], "title": title or "", "text": (description or "")[:500],
+            "category": category, "priority": priority, "source": source,
+            "created_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+# ===============================
+# Background appends from the API
+# ===============================
+class IndexAppender:
+    """Adds classified tickets to the index on one background thread, so requests never wait
+    for the extra embedding. Drops work (and counts it) when the queue is full."""
+
+    def __init__(self, index_fn, processed_fn, max_pending=1000, batch_size=64):
+        self.index_fn = index_fn
+        self.processed_fn = processed_fn
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self.added = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def submit(self, items):
+        """items: dicts with title, description, category, priority and optionally processed."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="similar-append", daemon=True)
+            self._thread.start()
+        for item in items:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                missing = [i for i, item in enumerate(batch) if not item.get("processed")]
+                if missing:
+                    for i, text in zip(missing, self.processed_fn([(batch[i]["title"], batch[i]["description"]) for i in missing])):
+                        batch[i]["processed"] = text
+                keep = [item for item in batch if item["processed"].strip()]
+                self.index_fn().add([item["processed"] for item in keep],
+                                    [ticket_record(item["title"], item["description"], item["category"], item["priority"])
+                                     for item in keep])
+                self.added += len(keep)
+            except Exception as e:
+                self.errors += 1
+                print(f"WARNING: could not append {len(batch)} tickets to the similar-ticket index: {e}")
+
+    def stats(self):
+        return {"queued": self._queue.qsize(), "added": self.added, "dropped": self.dropped, "errors": self.errors}
+
+
+# ===============================
+# CLI
+# ===============================
+def _dataset_records(limit):
+    from scripts.cascade import lemmatize_rows
+    from scripts.dataset import iter_dataset_rows
+
+    rows = list(itertools.islice(iter_dataset_rows(), limit))
+    print(f"Lemmatising {len(rows)} tickets...")
+    texts = lemmatize_rows(rows)
+    keep = [i for i, text in enumerate(texts) if text.strip()]
+    records = [ticket_record("", rows[i]["clean_text"], rows[i]["Topic_group"], rows[i]["Priority"],
+                             ticket_id=f"ds-{i}", source="dataset") for i in keep]
+    return [texts[i] for i in keep], records
+
+
+def _bench(index, queries, k, nprobe):
+    embed_ms, search_ms = [], []
+    for text in queries:
+        _, timings = index.search(text, k=k, nprobe=nprobe)
+        embed_ms.append(timings["embed"])
+        search_ms.append(timings["search"])
+    return {name: {"p50": float(np.percentile(v, 50)), "p99": float(np.percentile(v, 99))}
+            for name, v in (("embed", embed_ms), ("search", search_ms))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Similar-ticket embedding index")
+    parser.add_argument("--build", action="store_true", help="embed dataset.zip into a fresh index")
+    parser.add_argument("--embedder", choices=EMBEDDERS, default="sentence")
+    parser.add_argument("--ivf", type=int, help="IVF lists (0: flat; default 4*sqrt(rows) past 10k rows)")
+    parser.add_argument("--dim", type=int, default=256, help="tfidf embedder: SVD dimensions")
+    parser.add_argument("--limit", type=int, help="only index the first N dataset tickets")
+    parser.add_argument("--append", metavar="JSONL", help="append tickets ({title, description, category?, priority?, id?} per line)")
+    parser.add_argument("--query", help="print the nearest tickets for this text")
+    parser.add_argument("--bench", type=int, metavar="N", help="search latency over N dataset queries")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, default=SIMILAR_NPROBE)
+    parser.add_argument("--path", default=SIMILAR_INDEX_DIR)
+    args = parser.parse_args()
+
+    if args.build:
+        texts, records = _dataset_records(args.limit)
+        meta = build_index(texts, records, args.path, args.embedder, nlist=args.ivf, dim=args.dim)
+        size_mb = os.path.getsize(os.path.join(args.path, "vectors.f16")) / 2 ** 20
+        print(f"Index written to {args.path}: {meta['rows_at_build']} x {meta['dim']} float16 ({size_mb:.1f} MB)")
+    elif args.append:
+        from scripts.inference import processed_texts
+        from scripts.dataset import iter_records
+        index = EmbeddingIndex(args.path)
+        tickets = list(iter_records(args.append))
+        texts = processed_texts([(t.get("title", ""), t.get("description", "")) for t in tickets])
+        ids = index.add(texts, [ticket_record(t.get("title"), t.get("description"), t.get("category"), t.get("priority"),
+                                              ticket_id=t.get("id"), source="import") for t in tickets])
+        print(f"Appended {len(ids)} tickets; index now has {index.rows} rows")
+    elif args.query:
+        from scripts.inference import processed_texts
+        index = EmbeddingIndex(args.path)
+        results, timings = index.search(processed_texts([("", args.query)])[0], k=args.k, nprobe=args.nprobe)
+        for r in results:
+            print(f"{r['score']:.3f}{' DUP' if r['duplicate'] else '    '} [{r['category']}/{r['priority']}] {r['id']}: {r['text'][:100]}")
+        print(f"embed {timings['embed']:.2f} ms, search {timings['search']:.2f} ms over {index.rows} tickets")
+    elif args.bench:
+        from scripts.cascade import lemmatize_rows
+        from scripts.dataset import sample_rows
+        index = EmbeddingIndex(args.path)
+        queries = [t for t in lemmatize_rows(sample_rows(args.bench, seed=7)) if t.strip()]
+        index.search(queries[0])  # warm-up
+        probes = [args.nprobe] if index.centroids is None else sorted({1, args.nprobe, 4 * args.nprobe})
+        print(f"{len(queries)} queries over {index.rows} tickets (k={args.k})")
+        for nprobe in probes:
+            result = _bench(index, queries, args.k, nprobe)
+            label = "flat" if index.centroids is None else f"nprobe {nprobe}"
+            print(f"{label:<10} embed p50 {result['embed']['p50']:.2f} ms p99 {result['embed']['p99']:.2f} ms | "
+                  f"search p50 {result['search']['p50']:.2f} ms p99 {result['search']['p99']:.2f} ms")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
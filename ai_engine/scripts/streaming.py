@@ -0,0 +1,140 @@
+"""
+STREAMING CLASSIFICATION
+------------------------
+Many tickets over one connection, as an NDJSON request body
+(POST /classify/stream) or WebSocket messages (/classify/ws). Every ticket is
+classified on its own task through the same path as /classify, so tickets
+from a stream share micro-batched model calls with each other and with other
+clients. Results are sent back as soon as each one completes, which is not
+necessarily input order, tagged with the ticket's correlation id.
+
+Input, one JSON object per line / message:
+    {"id": "mail-8812", "title": "...", "description": "..."}      (id and title optional)
+Output, one JSON object per ticket:
+    {"id": "mail-8812", "seq": 1, "status": "ok", "result": {...}}
+    {"id": "mail-8813", "seq": 2, "status": "error", "error": "..."}
+
+`seq` is the 1-based position of the line in the stream and identifies
+tickets sent without an id.
+
+Backpressure: at most STREAM_MAX_INFLIGHT tickets of a stream are in
+progress. Beyond that the server stops reading the connection, so the
+producer's writes block instead of piling up in server memory. A ticket that
+finds the inference executor full waits for a slot instead of failing.
+"""
+
+import asyncio
+import json
+import os
+
+STREAM_MAX_INFLIGHT = int(os.getenv("STREAM_MAX_INFLIGHT", "64"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", str(1024 * 1024)))
+# Pause before retrying a ticket that found the inference executor full
+STREAM_RETRY_SECONDS = float(os.getenv("STREAM_RETRY_SECONDS", "0.02"))
+
+_DONE = object()
+
+
+class LineTooLong(Exception):
+    pass
+
+
+async def iter_lines(chunks, max_line_bytes=STREAM_MAX_LINE_BYTES):
+    """Lines of an async stream of byte chunks; a final line without a newline is still yielded."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+        if len(buffer) > max_line_bytes:
+            raise LineTooLong(f"line longer than {max_line_bytes} bytes")
+    if buffer.strip():
+        yield buffer
+
+
+def parse_ticket(line):
+    """(ticket dict, None) or (None, error message) for one NDJSON line / WebSocket message."""
+    try:
+        ticket = json.loads(line)
+    except ValueError as e:
+        return None, f"invalid JSON: {e}"
+    if not isinstance(ticket, dict):
+        return None, "expected a JSON object"
+    if not isinstance(ticket.get("description"), str) or not isinstance(ticket.get("title") or "", str):
+        return ticket, "'description' (and 'title', if given) must be strings"
+    return ticket, None
+
+
+class TicketStream:
+    """Runs `classify_fn(ticket)` (async, returns a result dict) for every submitted ticket and
+    hands the outcomes back through results() in completion order."""
+
+    def __init__(self, classify_fn, max_inflight=STREAM_MAX_INFLIGHT):
+        self.classify_fn = classify_fn
+        self._slots = asyncio.Semaphore(max(1, max_inflight))
+        self._results = asyncio.Queue()
+        self._tasks = set()
+        self._closed = False
+        self.seq = 0
+        self.submitted = 0
+        self.failed = 0
+
+    @property
+    def inflight(self):
+        return len(self._tasks)
+
+    async def submit(self, line):
+        """Parse and start one ticket; waits while the stream already has max_inflight in progress."""
+        self.seq += 1
+        ticket, error = parse_ticket(line)
+        correlation_id = ticket.get("id") if isinstance(ticket, dict) else None
+        if error:
+            self.failed += 1
+            self._results.put_nowait({"id": correlation_id, "seq": self.seq, "status": "error", "error": error})
+            return
+        await self._slots.acquire()
+        self.submitted += 1
+        task = asyncio.get_running_loop().create_task(self._run(correlation_id, self.seq, ticket))
+        self._tasks.add(task)
+        task.add_done_callback(self._finished)
+
+    def reject(self, error):
+        """Report a problem with the stream itself (e.g. an over-long line)."""
+        self.failed += 1
+        self._results.put_nowait({"id": None, "seq": self.seq, "status": "error", "error": error})
+
+    async def _run(self, correlation_id, seq, ticket):
+        try:
+            result = await self.classify_fn(ticket)
+            message = {"id": correlation_id, "seq": seq, "status": "ok", "result": result}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            message = {"id": correlation_id, "seq": seq, "status": "error", "error": str(getattr(e, "detail", e))}
+        finally:
+            self._slots.release()
+        self._results.put_nowait(message)
+
+    def _finished(self, task):
+        self._tasks.discard(task)
+        if self._closed and not self._tasks:
+            self._results.put_nowait(_DONE)
+
+    def close(self):
+        """No more input; results() ends once every submitted ticket has been reported."""
+        self._closed = True
+        if not self._tasks:
+            self._results.put_nowait(_DONE)
+
+    def cancel(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def results(self):
+        while True:
+            message = await self._results.get()
+            if message is _DONE:
+                return
+            yield message
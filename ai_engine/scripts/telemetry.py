@@ -0,0 +1,246 @@
+"""
+TELEMETRY
+---------
+Prometheus text-format metrics and sampled, structured (JSON) logging for the
+API. No client library: counters, gauges and histograms are plain Python
+objects with one lock each, so an observation costs well under a microsecond
+and is fine to keep on in production.
+
+Configuration:
+    LOG_SAMPLE_RATE   fraction of successful requests logged (errors are always logged)
+    LOG_LEVEL         level of the "ai_engine" logger
+"""
+
+import bisect
+import json
+import logging
+import math
+import os
+import random
+import threading
+from datetime import datetime
+
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+# ===============================
+# Metric types
+# ===============================
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._series.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+    def samples(self):
+        with self._lock:
+            items = list(self._series.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts + overflow, sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Values read at scrape time, e.g. from an existing stats() dict: fn() -> [(labels_dict, value), ...]."""
+
+    def __init__(self, name, help, kind, fn, labels=()):
+        super().__init__(name, help, labels)
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self):
+        try:
+            values = self.fn()
+        except Exception:
+            return []
+        return [f"{self.name}{_labels(self.labelnames, self._key(labels))} {_number(value)}" for labels, value in values]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def callback(self, name, help, kind, fn, labels=()):
+        return self.register(CallbackMetric(name, help, kind, fn, labels))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ===============================
+# API metrics
+# ===============================
+metrics = MetricsRegistry()
+
+REQUEST_LATENCY = metrics.histogram(
+    "ticket_request_duration_seconds", "End-to-end request latency", labels=("endpoint", "outcome"))
+STAGE_LATENCY = metrics.histogram(
+    "ticket_stage_duration_seconds", "Pipeline stage latency (path=batch records whole-batch totals)",
+    labels=("stage", "path"))
+REQUESTS_REJECTED = metrics.counter(
+    "ticket_requests_rejected_total", "Requests refused with 503 because the inference backlog was full")
+MICROBATCH_SIZE = metrics.histogram(
+    "ticket_microbatch_size", "Tickets per coalesced transformer call from /classify", buckets=SIZE_BUCKETS)
+BATCH_REQUEST_SIZE = metrics.histogram(
+    "ticket_batch_request_size", "Tickets per /classify/batch request", buckets=SIZE_BUCKETS)
+STREAM_TICKETS = metrics.counter(
+    "ticket_stream_tickets_total", "Tickets answered on streaming connections", labels=("transport", "status"))
+STREAM_WAITS = metrics.counter(
+    "ticket_stream_executor_waits_total", "Times a streamed ticket waited for a free inference slot", labels=("transport",))
+STAGES_SKIPPED = metrics.counter(
+    "ticket_stages_skipped_total", "Optional pipeline stages skipped or downgraded", labels=("stage", "reason"))
+PREDICTIONS = metrics.counter(
+    "ticket_predictions_total", "Tickets classified, by final label and answering tier",
+    labels=("category", "priority", "tier"))
+CATEGORY_CONFIDENCE = metrics.histogram(
+    "ticket_category_confidence", "Category confidence of returned predictions", buckets=CONFIDENCE_BUCKETS)
+PRIORITY_CONFIDENCE = metrics.histogram(
+    "ticket_priority_confidence", "Priority confidence of returned predictions", buckets=CONFIDENCE_BUCKETS)
+
+
+def observe_stages(timings_ms, path="single"):
+    for stage, ms in timings_ms.items():
+        STAGE_LATENCY.observe(ms / 1000, stage=stage, path=path)
+
+
+def observe_prediction(response):
+    PREDICTIONS.inc(category=response["category"], priority=response["priority"], tier=response.get("tier", "transformer"))
+    CATEGORY_CONFIDENCE.observe(response["category_confidence"])
+    PRIORITY_CONFIDENCE.observe(response["priority_confidence"])
+
+
+def stats_callback(stats_fn, mapping):
+    """Scrape-time samples from a stats() dict: mapping is {stats_key: labels_dict}."""
+    def collect():
+        stats = stats_fn()
+        return [(labels, stats[key]) for key, labels in mapping.items() if key in stats]
+    return collect
+
+
+# ===============================
+# Structured, sampled logging
+# ===============================
+logger = logging.getLogger("ai_engine")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+
+def log_event(event, sampled=True, level=logging.INFO, exc_info=False, **fields):
+    """One JSON line per event. Sampled events are only written for LOG_SAMPLE_RATE of calls;
+    never pass ticket text here, only sizes and labels."""
+    if sampled and random.random() >= LOG_SAMPLE_RATE:
+        return
+    if not logger.isEnabledFor(level):
+        return
+    record = {"ts": datetime.now().isoformat(timespec="milliseconds"), "event": event, **fields}
+    logger.log(level, json.dumps(record, default=str), exc_info=exc_info)
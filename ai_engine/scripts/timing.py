@@ -0,0 +1,28 @@
+"""
+STAGE TIMING
+------------
+Collects wall-clock time per pipeline stage (milliseconds) for one ticket.
+"""
+
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    def __init__(self):
+        self.timings = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def add(self, name, ms):
+        self.timings[name] = round(self.timings.get(name, 0.0) + ms, 3)
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self._start) * 1000
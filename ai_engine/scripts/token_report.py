@@ -0,0 +1,142 @@
+"""
+TOKEN BUDGET REPORT
+-------------------
+How many tokens the transformer processes per ticket, measured on the
+lemmatized text the serving pipeline feeds it, for:
+
+    previous    cap 256, tail truncation, pad to each batch's longest sequence
+    current     cap MODEL_MAX_LENGTH, head+tail truncation, pad to PAD_BUCKETS
+    training    the notebook's fixed padding to 96 tokens, for reference
+
+Token counts are simulated per batch size (tickets arrive in random order, as
+they do in production). --time also runs both configurations through the
+loaded backend and reports throughput and label agreement.
+
+--write-profile stores the dataset's token-length distribution and the
+recommended cap (the smallest pad bucket covering --percentile of tickets, at
+most the training length) in models/token_lengths.json, which predict_batch
+then uses as its default cap.
+
+Run from the ai_engine folder:
+    python -m scripts.token_report --samples 5000 --write-profile
+    python -m scripts.token_report --samples 1000 --time
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from scripts.backends import (
+    MODEL_MAX_LENGTH, PAD_BUCKETS, TOKEN_PROFILE_PATH, TRAINING_MAX_LENGTH, pad_length, predict_batch,
+)
+from scripts.cascade import lemmatize_rows
+from scripts.dataset import sample_rows
+from scripts.inference import registry
+
+PREVIOUS = {"max_length": 256, "buckets": (), "head_ratio": 1.0}
+
+
+def token_lengths(tokenizer, texts):
+    """Untruncated lengths, special tokens included."""
+    return np.array([len(ids) for ids in tokenizer(list(texts), truncation=False)["input_ids"]])
+
+
+def simulate(lengths, batch_size, max_length, buckets=(), fixed=False):
+    """Real and padded tokens per ticket when tickets are scored in arrival-order batches."""
+    capped = np.minimum(lengths, max_length)
+    padded = 0
+    for start in range(0, len(capped), batch_size):
+        batch = capped[start:start + batch_size]
+        width = max_length if fixed else pad_length(int(batch.max()), max_length, buckets)
+        padded += width * len(batch)
+    return {
+        "real_tokens": round(float(capped.mean()), 2),
+        "padded_tokens": round(padded / len(capped), 2),
+        "truncated": round(float((lengths > max_length).mean()), 4),
+    }
+
+
+def recommend_max_length(lengths, percentile):
+    return pad_length(int(np.ceil(np.percentile(lengths, percentile))), TRAINING_MAX_LENGTH, PAD_BUCKETS)
+
+
+def _timed(engine, texts, batch_size, **config):
+    start = time.perf_counter()
+    preds = []
+    for i in range(0, len(texts), batch_size):
+        preds.extend(predict_batch(engine, texts[i:i + batch_size], batch_size=batch_size, **config))
+    return preds, len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokens processed per ticket, previous vs current truncation/padding")
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--max-length", type=int, help=f"cap to evaluate (default: {MODEL_MAX_LENGTH})")
+    parser.add_argument("--percentile", type=float, default=99.0, help="share of tickets the recommended cap must fit")
+    parser.add_argument("--write-profile", action="store_true", help=f"store the recommended cap in {TOKEN_PROFILE_PATH}")
+    parser.add_argument("--time", action="store_true", help="also time both configurations on the loaded backend")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    rows = sample_rows(args.samples, seed=args.seed)
+    texts = [text for text in lemmatize_rows(rows) if text.strip()]
+    engine = registry.get("backend")
+    lengths = token_lengths(engine.category_tokenizer, texts)
+
+    percentiles = {f"p{p:g}": int(np.percentile(lengths, p)) for p in (50, 90, 95, 99, 99.9)}
+    recommended = recommend_max_length(lengths, args.percentile)
+    max_length = args.max_length or MODEL_MAX_LENGTH
+
+    print(f"\n{len(texts)} tickets, token length (untruncated): "
+          + ", ".join(f"{k} {v}" for k, v in percentiles.items()) + f", max {int(lengths.max())}")
+    print(f"recommended cap (p{args.percentile:g}, at most {TRAINING_MAX_LENGTH}): {recommended}; evaluating cap {max_length}\n")
+
+    schemes = {
+        "previous": lambda bs: simulate(lengths, bs, PREVIOUS["max_length"]),
+        "current": lambda bs: simulate(lengths, bs, max_length, PAD_BUCKETS),
+        "training": lambda bs: simulate(lengths, bs, TRAINING_MAX_LENGTH, fixed=True),
+    }
+    report = {"samples": len(texts), "percentiles": percentiles, "recommended_max_length": recommended,
+              "max_length": max_length, "buckets": list(PAD_BUCKETS), "tokens_per_ticket": {}}
+    print(f"{'batch':>5} {'scheme':<9} {'real tok':>9} {'padded tok':>11} {'truncated':>10} {'vs previous':>12}")
+    print("-" * 61)
+    for batch_size in args.batch_sizes:
+        results = {name: fn(batch_size) for name, fn in schemes.items()}
+        report["tokens_per_ticket"][str(batch_size)] = results
+        base = results["previous"]["padded_tokens"]
+        for name, r in results.items():
+            print(f"{batch_size:>5} {name:<9} {r['real_tokens']:>9.1f} {r['padded_tokens']:>11.1f} "
+                  f"{r['truncated']:>10.2%} {r['padded_tokens'] / base:>11.2f}x")
+
+    if args.time:
+        batch_size = max(args.batch_sizes)
+        _timed(engine, texts[:batch_size], batch_size)  # warm-up
+        before, before_rate = _timed(engine, texts, batch_size, **PREVIOUS)
+        after, after_rate = _timed(engine, texts, batch_size, max_length=max_length)
+        agree = sum(a["category"] == b["category"] and a["priority"] == b["priority"] for a, b in zip(after, before)) / len(texts)
+        report["timing"] = {"batch_size": batch_size, "previous_tickets_per_sec": before_rate,
+                            "current_tickets_per_sec": after_rate, "agreement": agree}
+        print(f"\nbatch {batch_size}: previous {before_rate:.1f} tickets/s, current {after_rate:.1f} tickets/s "
+              f"({after_rate / before_rate:.2f}x), label agreement {agree:.3f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.write_profile:
+        profile = {"tokenizer": engine.category_tokenizer.name_or_path, "samples": len(texts),
+                   "percentiles": percentiles, "percentile": args.percentile,
+                   "training_max_length": TRAINING_MAX_LENGTH, "recommended_max_length": recommended}
+        os.makedirs(os.path.dirname(TOKEN_PROFILE_PATH), exist_ok=True)
+        with open(TOKEN_PROFILE_PATH, "w") as f:
+            json.dump(profile, f, indent=2)
+        print(f"\nProfile written to {TOKEN_PROFILE_PATH} (MODEL_MAX_LENGTH={recommended} from the next start)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+TRANSLATION LAYER
+-----------------
+Language detection + translation to English with a pluggable backend and a
+cache keyed on normalised text, so a repeated ticket is never translated
+twice. Select the backend with TRANSLATION_BACKEND:
+
+    google    deep_translator.GoogleTranslator (network; previous behaviour)
+    offline   local M2M100-style seq2seq model from OFFLINE_TRANSLATION_MODEL
+    stub      no network, returns the text unchanged (tests / benchmarks)
+
+Pure-ASCII text skips detection entirely. Text in an unambiguous non-Latin
+script (Kannada, Tamil, ...) is identified from its code points instead of
+running langdetect.
+"""
+
+import os
+import re
+import threading
+import time
+import unicodedata
+
+from scripts.cache import build_cache
+
+# ===============================
+# Configuration (env overridable)
+# ===============================
+TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", "google")
+OFFLINE_TRANSLATION_MODEL = os.getenv("OFFLINE_TRANSLATION_MODEL", "facebook/m2m100_418M")
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "10000"))
+# Set to a file path to share translations on disk across restarts and workers
+TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", "")
+
+# Unicode blocks used by exactly one language we see in tickets
+SCRIPT_LANGUAGES = [
+    (0x0C80, 0x0CFF, "kn"),  # Kannada
+    (0x0B80, 0x0BFF, "ta"),  # Tamil
+    (0x0C00, 0x0C7F, "te"),  # Telugu
+    (0x0D00, 0x0D7F, "ml"),  # Malayalam
+    (0x0A80, 0x0AFF, "gu"),  # Gujarati
+    (0x0A00, 0x0A7F, "pa"),  # Gurmukhi (Punjabi)
+    (0x0E00, 0x0E7F, "th"),  # Thai
+    (0x3040, 0x30FF, "ja"),  # Hiragana / Katakana
+    (0xAC00, 0xD7AF, "ko"),  # Hangul
+]
+
+
+def normalize_text(text):
+    """Cache key: NFKC, case-folded, whitespace collapsed."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip().casefold()
+
+
+def script_language(text):
+    for ch in text:
+        code = ord(ch)
+        if code < 0x80:
+            continue
+        for start, end, lang in SCRIPT_LANGUAGES:
+            if start <= code <= end:
+                return lang
+    return None
+
+
+def detect_language(text):
+    if text.isascii():
+        return "en"
+    lang = script_language(text)
+    if lang:
+        return lang
+    from langdetect import detect, DetectorFactory
+    # langdetect is randomised by default; a fixed seed keeps cache entries stable
+    DetectorFactory.seed = 0
+    return detect(text)
+
+
+# ===============================
+# Backends
+# ===============================
+class GoogleBackend:
+    name = "google"
+
+    def translate(self, text, source_lang):
+        from deep_translator import GoogleTranslator
+        return GoogleTranslator(source=source_lang, target="en").translate(text)
+
+
+class StubBackend:
+    name = "stub"
+
+    def __init__(self, mapping=None):
+        self.mapping = mapping or {}
+
+    def translate(self, text, source_lang):
+        return self.mapping.get(text, text)
+
+
+class OfflineBackend:
+    """Any multilingual seq2seq checkpoint with M2M100-style language codes (m2m100_418M, m2m100_1.2B)."""
+    name = "offline"
+
+    def __init__(self, model_path=OFFLINE_TRANSLATION_MODEL, max_length=256):
+        self.model_path = model_path
+        self.max_length = max_length
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+                self._tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+                model = AutoModelForSeq2SeqLM.from_pretrained(self.model_path)
+                model.eval()
+                self._model = model
+        return self._model
+
+    def translate(self, text, source_lang):
+        import torch
+
+        model = self._load()
+        with self._lock:
+            # src_lang is tokenizer state, so tokenisation must not interleave across threads
+            self._tokenizer.src_lang = source_lang
+            inputs = self._tokenizer(text, return_tensors="pt", truncation=True, max_length=self.max_length)
+        with torch.no_grad():
+            output = model.generate(**inputs, forced_bos_token_id=self._tokenizer.get_lang_id("en"), max_length=self.max_length)
+        return self._tokenizer.batch_decode(output, skip_special_tokens=True)[0]
+
+
+def load_translation_backend(name):
+    if name == "google":
+        return GoogleBackend()
+    if name == "offline":
+        return OfflineBackend()
+    if name == "stub":
+        return StubBackend()
+    raise ValueError(f"Unknown translation backend '{name}' (expected google, offline or stub)")
+
+
+# ===============================
+# Cached translation service
+# ===============================
+class TranslationService:
+    def __init__(self, backend, cache=None):
+        self.backend = backend
+        self.cache = cache if cache is not None else build_cache(TRANSLATION_CACHE_SIZE)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.ascii_skips = 0
+        self.hits = 0
+        self.misses = 0
+        self.english = 0
+        self.calls = 0
+        self.errors = 0
+        self.call_seconds = 0.0
+        self.max_call_seconds = 0.0
+
+    def cached(self, text):
+        """The translation if it needs no backend call (ASCII or cached), else None."""
+        if not text or text.isascii():
+            return text
+        cached = self.cache.get(normalize_text(text))
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+        return cached
+
+    def mean_call_ms(self):
+        """Average backend call time, None before the first call."""
+        return self.call_seconds / self.calls * 1000 if self.calls else None
+
+    def translate(self, text):
+        if not text or text.isascii():
+            with self._lock:
+                self.ascii_skips += 1
+            return text
+
+        key = normalize_text(text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            return cached
+
+        with self._lock:
+            self.misses += 1
+        try:
+            lang = detect_language(text)
+            if lang == "en":
+                with self._lock:
+                    self.english += 1
+                translated = text
+            else:
+                start = time.perf_counter()
+                translated = self.backend.translate(text, lang) or text
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.calls += 1
+                    self.call_seconds += elapsed
+                    self.max_call_seconds = max(self.max_call_seconds, elapsed)
+        except Exception:
+            # Same fallback as before: keep the original text, but don't cache the failure
+            with self._lock:
+                self.errors += 1
+            return text
+
+        self.cache.set(key, translated)
+        return translated
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "ascii_skips": self.ascii_skips,
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "cache_size": len(self.cache),
+            "detected_english": self.english,
+            "translation_calls": self.calls,
+            "translation_errors": self.errors,
+            "avg_call_ms": round(self.call_seconds / self.calls * 1000, 2) if self.calls else 0.0,
+            "max_call_ms": round(self.max_call_seconds * 1000, 2),
+        }
+
+
+def build_translation_service(name=TRANSLATION_BACKEND):
+    cache = build_cache(TRANSLATION_CACHE_SIZE, path=TRANSLATION_CACHE_PATH or None, table="translations")
+    return TranslationService(load_translation_backend(name), cache=cache)
@@ -0,0 +1,129 @@
+"""
+DATA LOADING
+------------
+Batches straight from a TokenCache:
+
+    TokenDataset                 one ticket = a slice of the memory-mapped token array
+    LengthGroupedBatchSampler    shuffles, then groups tickets of similar length into a batch
+    PadCollator                  pads each batch only to its own longest ticket
+
+Together they replace padding every ticket to 96 tokens: most tickets are
+far shorter, and a batch of similar lengths wastes almost no compute on
+padding. Worker processes open the memory maps themselves, so the token
+arrays are never pickled or copied into them.
+"""
+
+import os
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset, Sampler
+
+from training.token_cache import TokenCache
+
+# Leave a core for the training loop itself
+TRAINING_WORKERS = int(os.getenv("TRAINING_WORKERS", str(max(0, min(4, (os.cpu_count() or 1) - 1)))))
+# Batches per shuffled group that get sorted by length
+LENGTH_GROUP_BATCHES = 50
+# Batch widths are rounded up to a multiple of this (friendlier shapes for the matmul kernels)
+PAD_TO_MULTIPLE_OF = 8
+
+
+class TokenDataset(Dataset):
+    def __init__(self, cache, indices, task, label_map=None):
+        self.cache_path = cache.path
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.task = task
+        # Cache label id -> model label id, when a checkpoint orders its labels differently
+        self.label_map = None if label_map is None else np.asarray(label_map, dtype=np.int64)
+        self.lengths = cache.lengths[self.indices]
+        self._cache = cache
+
+    def __getstate__(self):
+        # Workers re-open the memory maps instead of receiving a pickled copy
+        state = self.__dict__.copy()
+        state["_cache"] = None
+        return state
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, i):
+        if self._cache is None:
+            self._cache = TokenCache(self.cache_path)
+        row = self.indices[i]
+        ids = self._cache.input_ids[self._cache.offsets[row]:self._cache.offsets[row + 1]]
+        label = int(self._cache.labels[self.task][row])
+        return ids, label if self.label_map is None else int(self.label_map[label])
+
+
+class LengthGroupedBatchSampler(Sampler):
+    """Batches of positions into `lengths`. With shuffle, positions are shuffled, cut into groups of
+    LENGTH_GROUP_BATCHES batches, sorted by length within each group, and the batches shuffled
+    again; without, everything is sorted (longest first), which is what evaluation wants."""
+
+    def __init__(self, lengths, batch_size, shuffle=True, seed=42, group_batches=LENGTH_GROUP_BATCHES):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.group_size = batch_size * group_batches
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _batches(self):
+        if not self.shuffle:
+            order = np.argsort(-self.lengths, kind="stable")
+            return [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+        rng = np.random.default_rng(self.seed + self.epoch)
+        order = rng.permutation(len(self.lengths))
+        batches = []
+        for start in range(0, len(order), self.group_size):
+            group = order[start:start + self.group_size]
+            group = group[np.argsort(-self.lengths[group], kind="stable")]
+            batches.extend(group[i:i + self.batch_size] for i in range(0, len(group), self.batch_size))
+        rng.shuffle(batches)
+        return batches
+
+    def __iter__(self):
+        for batch in self._batches():
+            yield batch.tolist()
+
+    def __len__(self):
+        return (len(self.lengths) + self.batch_size - 1) // self.batch_size
+
+
+class PadCollator:
+    def __init__(self, pad_token_id, pad_to_multiple_of=PAD_TO_MULTIPLE_OF):
+        self.pad_token_id = pad_token_id
+        self.multiple = max(1, pad_to_multiple_of)
+
+    def __call__(self, items):
+        longest = max(len(ids) for ids, _ in items)
+        width = -(-longest // self.multiple) * self.multiple
+        input_ids = np.full((len(items), width), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(items), width), dtype=np.int64)
+        for row, (ids, _) in enumerate(items):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+        return {"input_ids": torch.from_numpy(input_ids), "attention_mask": torch.from_numpy(attention_mask),
+                "labels": torch.tensor([label for _, label in items], dtype=torch.long)}
+
+
+def make_loader(dataset, batch_size, pad_token_id, shuffle, seed=42, workers=TRAINING_WORKERS, pin_memory=False):
+    sampler = LengthGroupedBatchSampler(dataset.lengths, batch_size, shuffle=shuffle, seed=seed)
+    return DataLoader(dataset, batch_sampler=sampler, collate_fn=PadCollator(pad_token_id), num_workers=workers,
+                      persistent_workers=workers > 0, pin_memory=pin_memory)
+
+
+def padding_stats(lengths, batch_size, shuffle=True, seed=42, fixed_length=None):
+    """Real / padded token counts for one epoch of batches, against padding every ticket to fixed_length."""
+    sampler = LengthGroupedBatchSampler(lengths, batch_size, shuffle=shuffle, seed=seed)
+    lengths = np.asarray(lengths)
+    padded = sum(-(-int(lengths[b].max()) // PAD_TO_MULTIPLE_OF) * PAD_TO_MULTIPLE_OF * len(b) for b in sampler._batches())
+    stats = {"real_tokens": int(lengths.sum()), "padded_tokens": int(padded)}
+    if fixed_length:
+        stats["fixed_padded_tokens"] = int(fixed_length * len(lengths))
+    return stats
@@ -0,0 +1,129 @@
+"""
+EVALUATION REPORTS
+------------------
+Validation metrics for a trained model, written as <task>_report.json plus the
+PNGs the dashboard's "Model Training Reports" page shows (model.py reads them
+from assets/):
+
+    <task>_confusion_matrix.png          counts, true label x predicted label
+    <task>_classification_report.png     precision / recall / F1 / support per class
+    <task>_epochs.png                    training loss, validation loss, accuracy and F1 per epoch
+    <task>_histogram.png                 class distribution of the training split
+
+PNGs need matplotlib; without it only the JSON is written.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+REPORT_IMAGES = ("confusion_matrix", "classification_report", "epochs", "histogram")
+
+
+def evaluation_report(labels, preds, label_names):
+    from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, f1_score
+
+    ids = list(range(len(label_names)))
+    return {
+        "accuracy": float(accuracy_score(labels, preds)),
+        "macro_f1": float(f1_score(labels, preds, labels=ids, average="macro", zero_division=0)),
+        "per_class": classification_report(labels, preds, labels=ids, target_names=label_names, output_dict=True, zero_division=0),
+        "text": classification_report(labels, preds, labels=ids, target_names=label_names, digits=2, zero_division=0),
+        "confusion_matrix": confusion_matrix(labels, preds, labels=ids).tolist(),
+        "labels": list(label_names),
+    }
+
+
+def _plot_confusion_matrix(plt, report, title, path):
+    matrix = np.asarray(report["confusion_matrix"])
+    names = report["labels"]
+    size = max(5, 0.8 * len(names) + 2)
+    fig, ax = plt.subplots(figsize=(size, size * 0.85))
+    ax.imshow(matrix, cmap="Blues")
+    ax.set_xticks(range(len(names)), labels=names, rotation=45, ha="right")
+    ax.set_yticks(range(len(names)), labels=names)
+    ax.set_xlabel("Predicted")
+    ax.set_ylabel("True")
+    ax.set_title(title)
+    threshold = matrix.max() / 2 if matrix.size else 0
+    for (i, j), count in np.ndenumerate(matrix):
+        ax.text(j, i, str(count), ha="center", va="center", color="white" if count > threshold else "black", fontsize=9)
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+
+def _plot_text(plt, text, path):
+    lines = text.rstrip().splitlines()
+    fig = plt.figure(figsize=(max(6, 0.11 * max(len(line) for line in lines)), 0.32 * len(lines) + 0.6))
+    fig.text(0.03, 0.5, text.rstrip(), family="monospace", fontsize=11, va="center")
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+
+def _plot_epochs(plt, history, title, path):
+    fig, (table_ax, curve_ax) = plt.subplots(1, 2, figsize=(13, 0.4 * len(history) + 2.5), gridspec_kw={"width_ratios": [3, 2]})
+    table_ax.axis("off")
+    rows = [[e["epoch"], f"{e['train_loss']:.6f}", f"{e['val_loss']:.6f}", f"{e['accuracy']:.6f}", f"{e['macro_f1']:.6f}"]
+            for e in history]
+    table = table_ax.table(cellText=rows, colLabels=["Epoch", "Training Loss", "Validation Loss", "Accuracy", "F1"],
+                           loc="center", cellLoc="left")
+    table.scale(1, 1.4)
+    epochs = [e["epoch"] for e in history]
+    curve_ax.plot(epochs, [e["train_loss"] for e in history], marker="o", label="training loss")
+    curve_ax.plot(epochs, [e["val_loss"] for e in history], marker="o", label="validation loss")
+    curve_ax.plot(epochs, [e["accuracy"] for e in history], marker="s", label="accuracy")
+    curve_ax.plot(epochs, [e["macro_f1"] for e in history], marker="s", label="F1")
+    curve_ax.set_xlabel("epoch")
+    curve_ax.set_xticks(epochs)
+    curve_ax.legend()
+    fig.suptitle(title)
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+
+def _plot_histogram(plt, counts, title, path):
+    names = list(counts)
+    fig, ax = plt.subplots(figsize=(max(5, 0.9 * len(names) + 2), 4))
+    ax.bar(names, [counts[n] for n in names], color="#4c78a8")
+    ax.set_ylabel("tickets")
+    ax.set_title(title)
+    ax.tick_params(axis="x", rotation=30)
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+
+def write_reports(task, report, history, class_counts, out_dir, extra=None):
+    """report.json and the PNGs for one task; returns the PNG paths written."""
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, f"{task}_report.json"), "w") as f:
+        json.dump({"task": task, **report, "history": history, "class_counts": class_counts, **(extra or {})}, f, indent=2)
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("WARNING: matplotlib is not installed; skipping the report images")
+        return []
+
+    name = task.capitalize()
+    paths = {kind: os.path.join(out_dir, f"{task}_{kind}.png") for kind in REPORT_IMAGES}
+    _plot_confusion_matrix(plt, report, f"{name} Confusion Matrix", paths["confusion_matrix"])
+    _plot_text(plt, report["text"], paths["classification_report"])
+    if history:
+        _plot_epochs(plt, history, f"{name} Training Loss & Accuracy per Epoch", paths["epochs"])
+    else:
+        del paths["epochs"]
+    _plot_histogram(plt, class_counts, f"Distribution of {name} Classes", paths["histogram"])
+    return list(paths.values())
+
+
+def publish_to_dashboard(paths, assets_dir=ASSETS_DIR):
+    for path in paths:
+        shutil.copy(path, os.path.join(assets_dir, os.path.basename(path)))
+    print(f"Updated {len(paths)} dashboard images in {assets_dir}")
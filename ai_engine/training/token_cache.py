@@ -0,0 +1,146 @@
+"""
+PRE-TOKENIZED DATASET CACHE
+---------------------------
+Tokenizes the ticket dataset once and keeps the result as memory-mapped NumPy
+arrays, so repeated experiments skip straight to training. The cache key
+covers everything that changes the tokens:
+- the tokenizer's full definition
+- the dataset file (size and mtime)
+- the text preparation
+- max length and truncation split
+- the row limit
+
+On-disk layout (TRAINING_CACHE_DIR/<key>/, default models/training_cache/):
+    meta.json          key inputs, row / token counts, label names per task
+    input_ids.npy      int32, every ticket's tokens back to back (special tokens included)
+    offsets.npy        int64 [rows + 1], ticket i is input_ids[offsets[i]:offsets[i + 1]]
+    <task>.npy         int16 label id per ticket (category, priority)
+
+Texts are prepared the way the serving pipeline prepares them (lemmatised, see
+scripts/cascade.lemmatize_rows) unless --text clean is given. Sequences are
+capped like at inference: head and tail of over-long tickets are kept (see
+scripts/backends.encode_head_tail).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import numpy as np
+
+from scripts.backends import MODEL_MAX_LENGTH, ROOT_DIR, TRUNCATION_HEAD_RATIO, encode_head_tail
+from scripts.dataset import DATASET_PATH, iter_dataset_rows
+
+TRAINING_CACHE_DIR = os.getenv("TRAINING_CACHE_DIR", os.path.join(ROOT_DIR, "models", "training_cache"))
+CACHE_FORMAT = 1
+# Dataset column holding each task's label
+LABEL_COLUMNS = {"category": "Topic_group", "priority": "Priority"}
+TEXT_MODES = ("lemmatized", "clean")
+
+
+def tokenizer_fingerprint(tokenizer):
+    # The fast tokenizer's JSON covers vocabulary, normaliser and special tokens in one string
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    definition = backend.to_str() if backend is not None else json.dumps(tokenizer.get_vocab(), sort_keys=True)
+    return hashlib.sha1(f"{type(tokenizer).__name__}:{definition}".encode()).hexdigest()[:12]
+
+
+def cache_key(tokenizer, dataset_path, text_mode, max_length, head_ratio, limit):
+    st = os.stat(dataset_path)
+    parts = [f"format={CACHE_FORMAT}", f"tokenizer={tokenizer_fingerprint(tokenizer)}",
+             f"dataset={os.path.abspath(dataset_path)}:{st.st_size}:{st.st_mtime_ns}", f"text={text_mode}",
+             f"max_length={max_length}", f"head_ratio={head_ratio}", f"limit={limit}"]
+    return hashlib.sha1(";".join(parts).encode()).hexdigest()[:16]
+
+
+def _prepare_texts(rows, text_mode):
+    if text_mode == "lemmatized":
+        from scripts.cascade import lemmatize_rows
+        return lemmatize_rows(rows)
+    return [row["clean_text"] for row in rows]
+
+
+class TokenCache:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.input_ids = np.load(os.path.join(path, "input_ids.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.lengths = np.diff(self.offsets)
+        self.labels = {task: np.load(os.path.join(path, f"{task}.npy"), mmap_mode="r") for task in LABEL_COLUMNS}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def label_names(self, task):
+        return self.meta["labels"][task]
+
+    @classmethod
+    def load_or_build(cls, tokenizer, dataset_path=DATASET_PATH, text_mode="lemmatized", max_length=MODEL_MAX_LENGTH,
+                      head_ratio=TRUNCATION_HEAD_RATIO, limit=None, root=TRAINING_CACHE_DIR, chunk_size=2048):
+        """(cache, seconds spent building it); 0.0 when an existing cache was reused."""
+        key = cache_key(tokenizer, dataset_path, text_mode, max_length, head_ratio, limit)
+        path = os.path.join(root, key)
+        if os.path.isfile(os.path.join(path, "meta.json")):
+            return cls(path), 0.0
+        start = time.perf_counter()
+        cls._build(path, tokenizer, dataset_path, text_mode, max_length, head_ratio, limit, chunk_size)
+        return cls(path), time.perf_counter() - start
+
+    @staticmethod
+    def _build(path, tokenizer, dataset_path, text_mode, max_length, head_ratio, limit, chunk_size):
+        if text_mode not in TEXT_MODES:
+            raise ValueError(f"Unknown text mode '{text_mode}' (expected one of {', '.join(TEXT_MODES)})")
+        ids, lengths = [], []
+        labels = {task: [] for task in LABEL_COLUMNS}
+        chunk = []
+
+        def flush():
+            encodings = encode_head_tail(tokenizer, _prepare_texts(chunk, text_mode), max_length, head_ratio)
+            for seq in encodings["input_ids"]:
+                ids.append(np.asarray(seq, dtype=np.int32))
+                lengths.append(len(seq))
+            for task, column in LABEL_COLUMNS.items():
+                labels[task].extend(row[column] for row in chunk)
+            print(f"  tokenized {len(lengths)} tickets")
+            chunk.clear()
+
+        for i, row in enumerate(iter_dataset_rows(dataset_path)):
+            if limit is not None and i >= limit:
+                break
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+
+        # Written next to the final folder and renamed, so a half-built cache is never picked up
+        staging = f"{path}.partial-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        np.save(os.path.join(staging, "input_ids.npy"), np.concatenate(ids) if ids else np.zeros(0, dtype=np.int32))
+        np.save(os.path.join(staging, "offsets.npy"), np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]))
+        names = {}
+        for task, values in labels.items():
+            names[task] = sorted(set(values))
+            index = {name: i for i, name in enumerate(names[task])}
+            np.save(os.path.join(staging, f"{task}.npy"), np.asarray([index[v] for v in values], dtype=np.int16))
+        meta = {
+            "format": CACHE_FORMAT, "created_at": datetime.now().isoformat(timespec="seconds"),
+            "tokenizer": getattr(tokenizer, "name_or_path", ""), "tokenizer_fingerprint": tokenizer_fingerprint(tokenizer),
+            "pad_token_id": tokenizer.pad_token_id, "dataset": os.path.abspath(dataset_path), "text_mode": text_mode,
+            "max_length": max_length, "head_ratio": head_ratio, "limit": limit,
+            "rows": len(lengths), "tokens": int(sum(lengths)), "labels": names,
+        }
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.rename(staging, path)
+        except OSError:
+            # Another run built the same cache meanwhile; theirs is identical
+            shutil.rmtree(staging, ignore_errors=True)
@@ -0,0 +1,276 @@
+"""
+TRAINING & EVALUATION
+---------------------
+Scriptable version of the fine-tuning in model.ipynb. For each task
+(category, priority) it:
+1. splits the dataset 85/15, stratified, with seed 42, as the notebook does
+2. fine-tunes a sequence classifier with AdamW, linear warm-up/decay and early stopping on validation accuracy
+3. keeps the best epoch
+4. writes the checkpoint and its evaluation reports
+
+Tokens come from the memory-mapped cache in training/token_cache.py (built
+on the first run, reused after). Batches come from the length-grouped,
+dynamically padded loaders in training/data.py.
+
+Output (TRAINING_RUNS_DIR/<run>/, default models/training_runs/<timestamp>/):
+    category_model/, priority_model/    Hugging Face checkpoints the API loads
+    reports/                            <task>_report.json + dashboard PNGs (see training/reports.py)
+    run.json                            arguments, data / padding statistics, timings
+
+A finished run can go straight into the versioned model store (--publish, see
+scripts/model_versions.py) and the dashboard's Training Reports page
+(--update-dashboard).
+
+Run from the ai_engine folder:
+    python -m training.train --base-model roberta-base --epochs 5
+    python -m training.train --tasks priority --base-model models/priority_model --limit 4000 --epochs 2
+    python -m training.train --publish v2026-10-a --update-dashboard
+    python -m training.train --evaluate models/category_model --tasks category
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+import torch
+
+from scripts.backends import MODEL_MAX_LENGTH, ROOT_DIR, TRAINING_MAX_LENGTH, TRUNCATION_HEAD_RATIO
+from scripts.dataset import DATASET_PATH
+from training.data import TRAINING_WORKERS, TokenDataset, make_loader, padding_stats
+from training.reports import evaluation_report, publish_to_dashboard, write_reports
+from training.token_cache import LABEL_COLUMNS, TEXT_MODES, TokenCache
+
+TRAINING_RUNS_DIR = os.getenv("TRAINING_RUNS_DIR", os.path.join(ROOT_DIR, "models", "training_runs"))
+TRAINING_BASE_MODEL = os.getenv("TRAINING_BASE_MODEL", "roberta-base")
+
+
+def split_indices(labels, test_size=0.15, seed=42):
+    from sklearn.model_selection import train_test_split
+
+    labels = np.asarray(labels)
+    # A class with a single ticket cannot be stratified (small --limit runs)
+    counts = np.bincount(labels)
+    stratify = labels if counts[counts > 0].min() >= 2 else None
+    return train_test_split(np.arange(len(labels)), test_size=test_size, random_state=seed, stratify=stratify)
+
+
+def _device(name=None):
+    return torch.device(name or ("cuda" if torch.cuda.is_available() else "cpu"))
+
+
+def _batch_to(batch, device):
+    return {k: v.to(device, non_blocking=True) for k, v in batch.items()}
+
+
+def evaluate(model, loader, device):
+    """(mean loss, predictions, labels) over a loader."""
+    model.eval()
+    losses, preds, labels = [], [], []
+    with torch.no_grad():
+        for batch in loader:
+            batch = _batch_to(batch, device)
+            out = model(**batch)
+            losses.append(out.loss.item() * len(batch["labels"]))
+            preds.append(out.logits.argmax(dim=1).cpu().numpy())
+            labels.append(batch["labels"].cpu().numpy())
+    n = sum(len(l) for l in labels)
+    return sum(losses) / max(1, n), np.concatenate(preds), np.concatenate(labels)
+
+
+def _optimizer(model, lr, weight_decay):
+    # No weight decay on biases and LayerNorm weights, as in the Trainer defaults
+    decay, no_decay = [], []
+    for name, param in model.named_parameters():
+        if param.requires_grad:
+            (no_decay if param.ndim < 2 or "LayerNorm" in name or "layer_norm" in name else decay).append(param)
+    return torch.optim.AdamW([{"params": decay, "weight_decay": weight_decay}, {"params": no_decay, "weight_decay": 0.0}], lr=lr)
+
+
+def train_task(task, cache, tokenizer, args, run_dir):
+    from sklearn.metrics import accuracy_score, f1_score
+    from transformers import AutoModelForSequenceClassification, get_linear_schedule_with_warmup
+
+    device = _device(args.device)
+    label_names = cache.label_names(task)
+    train_idx, val_idx = split_indices(cache.labels[task], args.test_size, args.seed)
+    train_set, val_set = TokenDataset(cache, train_idx, task), TokenDataset(cache, val_idx, task)
+    pin = device.type == "cuda"
+    train_loader = make_loader(train_set, args.batch_size, tokenizer.pad_token_id, shuffle=True, seed=args.seed,
+                               workers=args.workers, pin_memory=pin)
+    val_loader = make_loader(val_set, args.eval_batch_size, tokenizer.pad_token_id, shuffle=False, workers=args.workers,
+                             pin_memory=pin)
+
+    model = AutoModelForSequenceClassification.from_pretrained(
+        args.base_model, id2label=dict(enumerate(label_names)),
+        label2id={name: i for i, name in enumerate(label_names)}, ignore_mismatched_sizes=True,
+    ).to(device)
+    optimizer = _optimizer(model, args.lr, args.weight_decay)
+    total_steps = args.epochs * len(train_loader)
+    scheduler = get_linear_schedule_with_warmup(optimizer, int(args.warmup_ratio * total_steps), total_steps)
+    use_amp = args.fp16 and device.type == "cuda"
+    if args.fp16 and not use_amp:
+        print("WARNING: --fp16 needs CUDA; training in FP32")
+    scaler = torch.amp.GradScaler("cuda", enabled=use_amp)
+
+    output = os.path.join(run_dir, f"{task}_model")
+    staging = f"{output}.partial"
+    history, best, best_preds, stale = [], None, None, 0
+    print(f"\n[{task}] {len(train_idx)} train / {len(val_idx)} validation tickets, {len(label_names)} labels, "
+          f"{len(train_loader)} batches per epoch on {device}")
+    for epoch in range(1, args.epochs + 1):
+        model.train()
+        train_loader.batch_sampler.set_epoch(epoch)
+        start, loss_sum, seen = time.perf_counter(), 0.0, 0
+        for step, batch in enumerate(train_loader, 1):
+            batch = _batch_to(batch, device)
+            with torch.autocast(device.type, dtype=torch.float16, enabled=use_amp):
+                loss = model(**batch).loss
+            scaler.scale(loss).backward()
+            scaler.unscale_(optimizer)
+            torch.nn.utils.clip_grad_norm_(model.parameters(), args.max_grad_norm)
+            scaler.step(optimizer)
+            scaler.update()
+            scheduler.step()
+            optimizer.zero_grad(set_to_none=True)
+            loss_sum += loss.item() * len(batch["labels"])
+            seen += len(batch["labels"])
+            if args.log_every and step % args.log_every == 0:
+                print(f"  epoch {epoch} step {step}/{len(train_loader)}  loss {loss_sum / seen:.4f}")
+        train_seconds = time.perf_counter() - start
+
+        val_loss, preds, labels = evaluate(model, val_loader, device)
+        entry = {"epoch": epoch, "train_loss": loss_sum / max(1, seen), "val_loss": val_loss,
+                 "accuracy": float(accuracy_score(labels, preds)),
+                 "macro_f1": float(f1_score(labels, preds, average="macro", zero_division=0)),
+                 "train_seconds": round(train_seconds, 1), "tickets_per_sec": round(seen / train_seconds, 1)}
+        history.append(entry)
+        print(f"  epoch {epoch}: train loss {entry['train_loss']:.4f}, val loss {val_loss:.4f}, "
+              f"accuracy {entry['accuracy']:.4f}, F1 {entry['macro_f1']:.4f} ({train_seconds:.0f}s)")
+
+        if best is None or entry["accuracy"] > best["accuracy"]:
+            best, best_preds, best_labels, stale = entry, preds, labels, 0
+            shutil.rmtree(staging, ignore_errors=True)
+            model.save_pretrained(staging)
+            tokenizer.save_pretrained(staging)
+        else:
+            stale += 1
+            if stale >= args.patience:
+                print(f"  no improvement for {stale} epochs; stopping early")
+                break
+
+    shutil.rmtree(output, ignore_errors=True)
+    os.rename(staging, output)
+    print(f"  best epoch {best['epoch']} (accuracy {best['accuracy']:.4f}) saved to {output}")
+    report = evaluation_report(best_labels, best_preds, label_names)
+    counts = Counter(label_names[i] for i in cache.labels[task][train_idx])
+    images = write_reports(task, report, history, {name: counts[name] for name in label_names},
+                           os.path.join(run_dir, "reports"), extra={"best_epoch": best["epoch"], "checkpoint": output})
+    return {"best_epoch": best["epoch"], "accuracy": report["accuracy"], "macro_f1": report["macro_f1"],
+            "history": history, "train_tickets": len(train_idx), "validation_tickets": len(val_idx),
+            "padding": padding_stats(train_set.lengths, args.batch_size, seed=args.seed, fixed_length=TRAINING_MAX_LENGTH),
+            "images": images}
+
+
+def evaluate_checkpoint(task, checkpoint, args, report_dir):
+    """Reports for an existing checkpoint on the validation split it would have been trained against."""
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(checkpoint)
+    cache, _ = TokenCache.load_or_build(tokenizer, args.dataset, args.text, args.max_length, args.head_ratio, args.limit)
+    model = AutoModelForSequenceClassification.from_pretrained(checkpoint).to(_device(args.device))
+    model_labels = {name.lower(): int(i) for i, name in model.config.id2label.items()}
+    names = cache.label_names(task)
+    unknown = [name for name in names if name.lower() not in model_labels]
+    if unknown:
+        raise SystemExit(f"{checkpoint} has no labels for {', '.join(unknown)} (model labels: "
+                         f"{', '.join(model.config.id2label.values())}); it was not trained on this dataset's {LABEL_COLUMNS[task]}")
+    label_map = [model_labels[name.lower()] for name in names]
+    _, val_idx = split_indices(cache.labels[task], args.test_size, args.seed)
+    loader = make_loader(TokenDataset(cache, val_idx, task, label_map=label_map), args.eval_batch_size,
+                         tokenizer.pad_token_id, shuffle=False, workers=args.workers)
+    loss, preds, labels = evaluate(model, loader, _device(args.device))
+    label_names = [model.config.id2label[i] for i in range(len(model.config.id2label))]
+    report = evaluation_report(labels, preds, label_names)
+    counts = Counter(names[i] for i in cache.labels[task])
+    images = write_reports(task, report, [], dict(counts), report_dir, extra={"checkpoint": checkpoint, "val_loss": loss})
+    print(f"[{task}] {checkpoint}: accuracy {report['accuracy']:.4f}, macro F1 {report['macro_f1']:.4f} on {len(val_idx)} tickets")
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fine-tune and evaluate the category / priority classifiers")
+    parser.add_argument("--tasks", nargs="+", choices=list(LABEL_COLUMNS), default=list(LABEL_COLUMNS))
+    parser.add_argument("--base-model", default=TRAINING_BASE_MODEL, help="checkpoint or hub name to fine-tune (and tokenize with)")
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument("--text", choices=TEXT_MODES, default="lemmatized", help="train on the serving pipeline's lemmatised text or the raw clean_text")
+    parser.add_argument("--limit", type=int, help="only use the first N tickets")
+    parser.add_argument("--max-length", type=int, default=MODEL_MAX_LENGTH)
+    parser.add_argument("--head-ratio", type=float, default=TRUNCATION_HEAD_RATIO)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--eval-batch-size", type=int, default=32)
+    parser.add_argument("--lr", type=float, default=2e-5)
+    parser.add_argument("--weight-decay", type=float, default=0.01)
+    parser.add_argument("--warmup-ratio", type=float, default=0.06)
+    parser.add_argument("--max-grad-norm", type=float, default=1.0)
+    parser.add_argument("--patience", type=int, default=2, help="epochs without a better validation accuracy before stopping")
+    parser.add_argument("--test-size", type=float, default=0.15)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fp16", action="store_true", help="mixed precision (CUDA only)")
+    parser.add_argument("--device", help="cpu / cuda (default: cuda when available)")
+    parser.add_argument("--workers", type=int, default=TRAINING_WORKERS, help="data loader processes (0: load in the training process)")
+    parser.add_argument("--log-every", type=int, default=100, help="print the running loss every N steps (0: never)")
+    parser.add_argument("--run-name", help="output folder under TRAINING_RUNS_DIR (default: timestamp)")
+    parser.add_argument("--publish", metavar="VERSION", help="publish the run as this model version (scripts/model_versions.py)")
+    parser.add_argument("--update-dashboard", action="store_true", help="copy the report images into assets/ for model.py")
+    parser.add_argument("--evaluate", metavar="CHECKPOINT", help="only evaluate this checkpoint (reports go to --report-dir)")
+    parser.add_argument("--report-dir", default=os.path.join(TRAINING_RUNS_DIR, "evaluations"))
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    if args.evaluate:
+        images = []
+        for task in args.tasks:
+            images += evaluate_checkpoint(task, args.evaluate, args, args.report_dir)
+        if args.update_dashboard and images:
+            publish_to_dashboard(images)
+        return
+
+    from transformers import AutoTokenizer
+
+    run_dir = os.path.join(TRAINING_RUNS_DIR, args.run_name or datetime.now().strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(run_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(args.base_model)
+    print(f"Loading token cache for {args.base_model}...")
+    cache, build_seconds = TokenCache.load_or_build(tokenizer, args.dataset, args.text, args.max_length, args.head_ratio, args.limit)
+    print(f"{'Built' if build_seconds else 'Reused'} {cache.path}: {len(cache)} tickets, {cache.meta['tokens']} tokens"
+          + (f" in {build_seconds:.1f}s" if build_seconds else ""))
+
+    results = {}
+    for task in args.tasks:
+        results[task] = train_task(task, cache, tokenizer, args, run_dir)
+
+    with open(os.path.join(run_dir, "run.json"), "w") as f:
+        json.dump({"args": vars(args), "cache": cache.path, "cache_build_seconds": round(build_seconds, 1),
+                   "results": results}, f, indent=2)
+    print(f"\nRun saved to {run_dir}")
+    for task, result in results.items():
+        pad = result["padding"]
+        print(f"  {task}: accuracy {result['accuracy']:.4f}, macro F1 {result['macro_f1']:.4f} (epoch {result['best_epoch']}); "
+              f"padded tokens per epoch {pad['padded_tokens']} vs {pad['fixed_padded_tokens']} at a fixed {TRAINING_MAX_LENGTH}")
+
+    if args.update_dashboard:
+        publish_to_dashboard([path for result in results.values() for path in result["images"]])
+    if args.publish:
+        from scripts.model_versions import publish
+        manifest = publish(run_dir, args.publish, note=f"training run {os.path.basename(run_dir)}")
+        print(f"Published model version {manifest['version']} ({', '.join(manifest['components'])})")
+
+
+if __name__ == "__main__":
+    main()